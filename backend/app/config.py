@@ -9,6 +9,10 @@ class Settings(BaseSettings):
     # API Keys - DEFAULT EMPTY (actual keys go in .env)
     GEMINI_API_KEY: str = ""
     
+    # Local fake Gemini model for offline development and load tests
+    GEMINI_FAKE: bool = False
+    GEMINI_FAKE_LATENCY_SECONDS: float = 0.5
+    
     # CORS
     CORS_ORIGINS: str = "http://localhost:5173"
     
@@ -21,6 +25,123 @@ class Settings(BaseSettings):
     PROPERTY_TAX_RATE: float = 0.011
     WALK_SPEED_MS: float = 1.4
     
+    # Reference Data (REFERENCE_DATA_DIR overrides app/data for the station,
+    # intersection, school and zoning files; changed files are reloaded on the
+    # first access after DATASET_RELOAD_CHECK_SECONDS, negative disables).
+    # SCHOOLS_COLUMNS_DIR overrides where the columnar school table is written.
+    REFERENCE_DATA_DIR: str = ""
+    DATASET_RELOAD_CHECK_SECONDS: float = 5.0
+    SCHOOLS_COLUMNS_DIR: str = ""
+    
+    # Walk Network (optional pedestrian street graph in the reference data
+    # dir, built by scripts/build_walk_network.py; without it walk times use
+    # straight-line distance). Points farther than WALK_SNAP_MAX_M from every
+    # graph node also fall back to straight-line distance.
+    WALK_NETWORK_FILE: str = "atlanta_walk_network.npz"
+    WALK_SNAP_MAX_M: float = 300.0
+    WALK_SNAP_CANDIDATES: int = 4
+    
+    # Road Network (optional drivable road graph in the reference data dir,
+    # built by scripts/build_road_network.py; without it, or for sites farther
+    # than ROAD_SNAP_MAX_M from a road node, trips use distance decay).
+    # Routes count at an intersection when they pass a node within
+    # INTERSECTION_MATCH_M of it; trip shares are cached per origin node.
+    ROAD_NETWORK_FILE: str = "atlanta_road_network.npz"
+    ROAD_SNAP_MAX_M: float = 250.0
+    INTERSECTION_MATCH_M: float = 50.0
+    TRAFFIC_ROUTE_CACHE_SIZE: int = 20000
+    
+    # Analysis Execution
+    ANALYSIS_THREADS: int = 8
+    STAGE_TIMEOUT_SECONDS: float = 5.0
+    AI_REPORT_TIMEOUT_SECONDS: float = 20.0
+    
+    # Worker Tier (batch analyses, shadow studies and heatmaps; 0 processes
+    # runs them on threads, N > 0 on N pre-warmed worker processes).
+    # Requests beyond WORKER_MAX_PENDING queued or running jobs get a 503.
+    # Workers start from a fork server ("spawn" also works; "fork" copies a
+    # process that already runs threads and database connections).
+    WORKER_PROCESSES: int = 0
+    WORKER_MAX_PENDING: int = 64
+    WORKER_START_METHOD: str = "forkserver"
+    WORKER_RETRY_AFTER_SECONDS: int = 2
+    
+    # Shadow Analysis (PARCELS_DATA_PATH: optional parcel GeoJSON; a grid of
+    # PARCEL_SIZE_SQFT lots is used without it)
+    SHADOW_TIMEZONE: str = "America/New_York"
+    SHADOW_MIN_ALTITUDE_DEG: float = 3.0
+    SHADOW_MIN_OVERLAP_M: float = 1.0
+    PARCEL_SIZE_SQFT: float = 5000
+    PARCELS_DATA_PATH: str = ""
+    # Largest footprint accepted (meters across, east-west or north-south),
+    # and most synthetic lots enumerated for one shadow
+    FOOTPRINT_MAX_EXTENT_M: float = 1000.0
+    PARCEL_MAX_GRID_LOTS: int = 500_000
+    SHADOW_MAX_STUDY_DAYS: int = 366
+    
+    # Analyzer Result Cache (0.0001 deg is roughly 11 m; 0 disables snapping)
+    ANALYSIS_CACHE_SIZE: int = 4096
+    ANALYSIS_CACHE_QUANTUM_DEG: float = 0.0001
+    
+    # AI Report Cache (REPORT_CACHE_DIR enables the on-disk store)
+    REPORT_CACHE_SIZE: int = 512
+    REPORT_CACHE_TTL_SECONDS: float = 86400
+    REPORT_CACHE_DIR: str = ""
+    REPORT_CACHE_COORD_DECIMALS: int = 4
+    
+    # Impact Heatmap
+    HEATMAP_CACHE_SIZE: int = 16
+    HEATMAP_REFERENCE_UNITS: int = 300
+    HEATMAP_MAX_RESOLUTION: int = 1000
+    HEATMAP_MAX_GEOJSON_RESOLUTION: int = 200
+    
+    # Vector Tiles (TILE_CACHE_DIR enables the on-disk tile cache)
+    TILE_CACHE_SIZE: int = 4096
+    TILE_CACHE_DIR: str = ""
+    
+    # Batch Analysis
+    MAX_BATCH_SIZE: int = 5000
+    BATCH_AI_CONCURRENCY: int = 8
+    
+    # Cumulative Scenarios (held in memory; least recently used are dropped)
+    SCENARIO_MAX_COUNT: int = 256
+    SCENARIO_MAX_BUILDINGS: int = 2000
+    SCENARIO_TTL_SECONDS: float = 86400
+    
+    # Site Search (candidates = resolution^2 grid cells or explicit points)
+    SITE_SEARCH_MAX_RESOLUTION: int = 500
+    SITE_SEARCH_MAX_CANDIDATES: int = 250000
+    SITE_SEARCH_MAX_TOP_K: int = 100
+    # Leading candidates re-scored with trips routed over the road network
+    SITE_SEARCH_ROUTED_CANDIDATES: int = 1000
+    
+    # Max-capacity solver (largest unit count searched)
+    CAPACITY_MAX_UNITS: int = 100000
+    
+    # Parameter Sweeps (units x stories grid points per request)
+    SWEEP_MAX_POINTS: int = 10000
+    
+    # Database (jobs and saved analyses)
+    DATABASE_URL: str = "sqlite:///./citytrotter.db"
+    DATABASE_ECHO: bool = False
+    
+    # Saved Analyses (every analysis response is stored by building_id)
+    STORE_ANALYSES: bool = True
+    ANALYSIS_STORE_COMPRESSION: int = 6
+    ANALYSIS_LIST_MAX_LIMIT: int = 500
+    
+    # Background Jobs (JOB_RUNNERS jobs run at once; bulk jobs may hold at
+    # most JOB_BULK_RUNNERS of them so interactive jobs are never starved).
+    # A job interrupted by a restart is resumed up to JOB_MAX_ATTEMPTS times;
+    # finished jobs are purged after JOB_RETENTION_DAYS.
+    JOB_RUNNERS: int = 2
+    JOB_BULK_RUNNERS: int = 1
+    JOB_MAX_QUEUED: int = 1000
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_MAX_BATCH_SIZE: int = 50000
+    JOB_BATCH_CHUNK: int = 100
+    JOB_RETENTION_DAYS: float = 7
+    
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -3,9 +3,19 @@ CityTrotter - FastAPI Backend
 Main application entry point
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import building_analysis, data
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
+from app.config import settings
+from app.database import engine, init_db
+from app.routers import analyses, building_analysis, data, jobs, scenarios
+from app.services import workers
+from app.services.datasets import registry as datasets
+from app.services.metrics import MetricsMiddleware, render_metrics
+from app.services.job_queue import queue as job_queue
+from app.services.workers import WorkerPoolFull, pool as worker_pool
+import asyncio
 import os
 
 app = FastAPI(
@@ -35,10 +45,44 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(building_analysis.router, prefix="/api/v1", tags=["Building Analysis"])
 app.include_router(data.router, prefix="/api/v1", tags=["Data"])
+app.include_router(scenarios.router, prefix="/api/v1", tags=["Scenarios"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["Jobs"])
+app.include_router(analyses.router, prefix="/api/v1", tags=["Saved Analyses"])
+
+
+@app.on_event("startup")
+async def load_reference_data():
+    """Build reference datasets and their spatial indexes once at startup"""
+    workers.load_reference_data()
+    # Start and pre-warm the worker processes (from a fork server, so they
+    # do not inherit this process's threads and connections)
+    await asyncio.to_thread(worker_pool.start)
+    # Create the jobs and saved-analyses tables if needed
+    await asyncio.to_thread(init_db)
+    # Resume background jobs left queued or running by the last shutdown
+    await job_queue.start()
+
+
+@app.on_event("shutdown")
+async def stop_workers():
+    """Stop the background job runners and the analysis worker processes"""
+    await job_queue.stop()
+    worker_pool.shutdown()
+
+
+@app.exception_handler(WorkerPoolFull)
+async def worker_pool_full_handler(request: Request, exc: WorkerPoolFull):
+    """Backpressure: the worker tier is saturated, ask the client to retry"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"Analysis workers are busy ({str(exc)}), retry shortly"},
+        headers={"Retry-After": str(settings.WORKER_RETRY_AFTER_SECONDS)}
+    )
 
 
 @app.get("/")
@@ -54,8 +98,28 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Detailed health check"""
+    try:
+        await asyncio.to_thread(check_database)
+        database = "connected"
+    except Exception as e:
+        print(f"Health check: database unavailable: {str(e)}")
+        database = "unavailable"
+    
     return {
-        "status": "healthy",
-        "database": "connected",  # TODO: Add actual DB check
+        "status": "healthy" if database == "connected" else "degraded",
+        "database": database,
+        "datasets": {name: info["version"] for name, info in datasets.versions().items()},
         "services": "operational"
-    }
\ No newline at end of file
+    }
+
+
+def check_database():
+    """Round-trip a trivial query"""
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics (text exposition format)"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
\ No newline at end of file
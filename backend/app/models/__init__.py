@@ -4,6 +4,14 @@ Models package
 
 from app.models.analysis import (
     BuildingRequest,
+    BatchBuildingRequest,
+    ScenarioRequest,
+    ShadowStudyRequest,
+    HeatmapRequest,
+    SiteSearchRequest,
+    CapacityRequest,
+    SweepRequest,
+    JobRequest,
     BuildingAnalysisResponse,
     Location,
     ZoningResult,
@@ -16,9 +24,19 @@ from app.models.analysis import (
     Bottleneck,
     AIReport
 )
+from app.models.job import Job
+from app.models.saved_analysis import SavedAnalysis
 
 __all__ = [
     "BuildingRequest",
+    "BatchBuildingRequest",
+    "ScenarioRequest",
+    "ShadowStudyRequest",
+    "HeatmapRequest",
+    "SiteSearchRequest",
+    "CapacityRequest",
+    "SweepRequest",
+    "JobRequest",
     "BuildingAnalysisResponse",
     "Location",
     "ZoningResult",
@@ -29,5 +47,7 @@ __all__ = [
     "ShadowAnalysis",
     "EconomicImpact",
     "Bottleneck",
-    "AIReport"
+    "AIReport",
+    "Job",
+    "SavedAnalysis"
 ]
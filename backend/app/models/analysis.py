@@ -2,9 +2,12 @@
 Pydantic models for request/response validation
 """
 
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional, Dict, Any, Literal
+from datetime import date, datetime
+import math
+
+from app.config import settings
 
 
 class Location(BaseModel):
@@ -13,6 +16,29 @@ class Location(BaseModel):
     lng: float = Field(..., ge=-180, le=180, description="Longitude")
 
 
+def validate_footprint(footprint: List[List[float]]) -> List[List[float]]:
+    """
+    A footprint ring: at least 3 distinct [lng, lat] (or [lng, lat, z])
+    vertices, no more than FOOTPRINT_MAX_EXTENT_M across
+    """
+    if any(len(vertex) not in (2, 3) for vertex in footprint):
+        raise ValueError("footprint vertices must be [lng, lat] or [lng, lat, z]")
+    vertices = {(vertex[0], vertex[1]) for vertex in footprint}
+    if len(vertices) < 3:
+        raise ValueError("footprint needs at least 3 distinct vertices")
+
+    lngs = [lng for lng, _ in vertices]
+    lats = [lat for _, lat in vertices]
+    width_m = (max(lngs) - min(lngs)) * 111320.0 * math.cos(math.radians(sum(lats) / len(lats)))
+    height_m = (max(lats) - min(lats)) * 110574.0
+    if max(width_m, height_m) > settings.FOOTPRINT_MAX_EXTENT_M:
+        raise ValueError(
+            f"footprint spans {max(width_m, height_m):,.0f} m; at most "
+            f"{settings.FOOTPRINT_MAX_EXTENT_M:,.0f} m is supported"
+        )
+    return footprint
+
+
 class BuildingRequest(BaseModel):
     """Request model for building analysis"""
     location: Location
@@ -22,6 +48,109 @@ class BuildingRequest(BaseModel):
     stories: int = Field(..., gt=0, le=100, description="Number of stories")
     parking_spaces: int = Field(..., ge=0, description="Number of parking spaces")
 
+    @field_validator("footprint")
+    @classmethod
+    def check_footprint(cls, footprint):
+        return validate_footprint(footprint)
+
+
+class BatchBuildingRequest(BaseModel):
+    """Request model for batch (portfolio) building analysis"""
+    buildings: List[BuildingRequest] = Field(..., min_length=1, description="Candidate sites to analyze")
+    report_mode: Literal["none", "template", "ai"] = Field(
+        "none", description="Per-building report: none (skip), template (instant) or ai (Gemini)"
+    )
+
+
+class ScenarioRequest(BaseModel):
+    """Request model for creating a cumulative multi-building scenario"""
+    name: Optional[str] = Field(None, description="Scenario label")
+    buildings: List[BuildingRequest] = Field(default_factory=list, description="Buildings applied in order")
+
+
+class ShadowStudyRequest(BaseModel):
+    """Request model for a shadow envelope sweep over a date range"""
+    location: Location
+    footprint: List[List[float]] = Field(..., description="Polygon coordinates [[lng, lat], ...]")
+    stories: int = Field(..., gt=0, le=100, description="Number of stories")
+    start_date: date = Field(..., description="First day of the sweep")
+    end_date: date = Field(..., description="Last day of the sweep (inclusive)")
+    step_minutes: int = Field(60, ge=5, le=1440, description="Minutes between samples")
+    start_hour: int = Field(0, ge=0, le=23, description="First local hour sampled each day")
+    end_hour: int = Field(24, ge=1, le=24, description="Local hour sampling stops each day")
+
+    @field_validator("footprint")
+    @classmethod
+    def check_footprint(cls, footprint):
+        return validate_footprint(footprint)
+
+
+class HeatmapRequest(BaseModel):
+    """Request model for an impact heatmap (same parameters as GET /impact-heatmap)"""
+    resolution: int = Field(50, ge=2, description="Cells per side")
+    bbox: Optional[str] = Field(None, description="min_lng,min_lat,max_lng,max_lat (defaults to Atlanta)")
+    units: Optional[int] = Field(None, gt=0, description="Reference program size evaluated at each cell")
+    format: Literal["geojson", "grid"] = Field("geojson", description="geojson polygons or compact grid")
+
+
+class SiteSearchRequest(BaseModel):
+    """Request model for a site-suitability search for one building program"""
+    type: str = Field("residential", description="Building type: residential, commercial, mixed-use")
+    units: int = Field(..., gt=0, description="Number of units")
+    stories: int = Field(..., gt=0, le=100, description="Number of stories")
+    bbox: Optional[str] = Field(None, description="min_lng,min_lat,max_lng,max_lat (defaults to Atlanta)")
+    resolution: int = Field(100, ge=2, description="Candidate grid cells per side of the bbox")
+    candidates: Optional[List[Location]] = Field(
+        None, min_length=1, description="Explicit candidate points (e.g. parcel centroids) instead of a grid"
+    )
+    top_k: int = Field(10, ge=1, description="Sites to return")
+    max_walk_minutes: Optional[float] = Field(None, gt=0, description="Drop sites farther from transit")
+    require_zoning_compliant: bool = Field(True, description="Drop sites over the zoning height limit")
+    min_separation_m: float = Field(500, ge=0, description="Minimum distance between returned sites")
+
+
+class CapacityRequest(BaseModel):
+    """Request model for the largest program a site takes without a bottleneck"""
+    location: Location
+    max_units: Optional[int] = Field(None, gt=0, description="Search ceiling (defaults to CAPACITY_MAX_UNITS)")
+
+
+class SweepRange(BaseModel):
+    """Inclusive range of integer values: start, start + step, ... up to stop"""
+    start: int = Field(..., gt=0, description="First value")
+    stop: int = Field(..., gt=0, description="Last value (inclusive)")
+    step: int = Field(1, gt=0, description="Increment")
+
+    def values(self) -> range:
+        """The values as a lazy range (len() is cheap; nothing is materialized)"""
+        return range(self.start, self.stop + 1, self.step)
+
+
+class SweepRequest(BaseModel):
+    """Request model for a parameter sweep over units and stories at one site"""
+    location: Location
+    footprint: List[List[float]] = Field(..., description="Polygon coordinates [[lng, lat], ...]")
+    type: str = Field("residential", description="Building type: residential, commercial, mixed-use")
+    units: SweepRange = Field(..., description="Unit counts to evaluate")
+    stories: SweepRange = Field(..., description="Story counts to evaluate (up to 100)")
+
+    @field_validator("footprint")
+    @classmethod
+    def check_footprint(cls, footprint):
+        return validate_footprint(footprint)
+
+
+class JobRequest(BaseModel):
+    """Request model for a background job; params follow the kind's request model"""
+    kind: Literal["single", "batch", "heatmap", "shadow_study"] = Field(
+        ..., description="single (BuildingRequest), batch (BatchBuildingRequest), heatmap (HeatmapRequest) "
+                         "or shadow_study (ShadowStudyRequest)"
+    )
+    params: Dict[str, Any] = Field(..., description="Request body of the matching endpoint")
+    priority: Optional[Literal["interactive", "bulk"]] = Field(
+        None, description="Defaults to interactive for single/heatmap, bulk for batch/shadow_study"
+    )
+
 
 class ZoningResult(BaseModel):
     """Zoning compliance check result"""
@@ -30,6 +159,7 @@ class ZoningResult(BaseModel):
     violations: List[str]
     max_height: Optional[int]
     max_far: Optional[float]
+    data_source: Optional[str] = None
 
 
 class SchoolInfo(BaseModel):
@@ -0,0 +1,24 @@
+"""
+Database model for background analysis jobs
+"""
+
+from sqlalchemy import Column, DateTime, Float, Integer, String, Text
+from app.database import Base
+
+
+class Job(Base):
+    """A queued, running or finished background job (params and result are JSON text)"""
+    __tablename__ = "jobs"
+
+    id = Column(String(36), primary_key=True)
+    kind = Column(String(32), nullable=False)
+    priority = Column(String(16), nullable=False)
+    status = Column(String(16), nullable=False, index=True)
+    params = Column(Text, nullable=False)
+    result = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    progress = Column(Float, nullable=False, default=0.0)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True, index=True)
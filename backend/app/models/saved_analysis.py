@@ -0,0 +1,30 @@
+"""
+Database model for saved building analyses
+"""
+
+from sqlalchemy import Boolean, Column, DateTime, Float, Index, Integer, LargeBinary, String
+from app.database import Base
+
+
+class SavedAnalysis(Base):
+    """
+    One analysis response, stored as zlib-compressed JSON, with the columns
+    the listing filters and summarizes on kept alongside
+    """
+    __tablename__ = "analyses"
+
+    building_id = Column(String(36), primary_key=True)
+    created_at = Column(DateTime, nullable=False, index=True)
+    lat = Column(Float, nullable=False)
+    lng = Column(Float, nullable=False)
+    building_type = Column(String(32), nullable=False)
+    units = Column(Integer, nullable=False)
+    stories = Column(Integer, nullable=False)
+    zoning_compliant = Column(Boolean, nullable=True)
+    bottleneck_count = Column(Integer, nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+
+    __table_args__ = (
+        # Bbox listings range-scan latitude, then filter longitude within the band
+        Index("ix_analyses_lat_lng", "lat", "lng"),
+    )
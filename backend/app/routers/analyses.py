@@ -0,0 +1,36 @@
+"""
+Saved analysis endpoints
+Re-open an analysis by building_id, or list saved analyses in an area.
+"""
+
+from fastapi import APIRouter, HTTPException, Query, Response
+from app.config import settings
+from app.routers.building_analysis import parse_bbox
+from app.services import analysis_store
+from typing import Optional
+import asyncio
+
+router = APIRouter()
+
+
+@router.get("/analyses")
+async def list_analyses(
+    bbox: Optional[str] = Query(None, description="min_lng,min_lat,max_lng,max_lat"),
+    limit: int = Query(50, ge=1, le=settings.ANALYSIS_LIST_MAX_LIMIT, description="Page size"),
+    offset: int = Query(0, ge=0, description="Analyses to skip")
+):
+    """Saved analysis summaries, newest first"""
+    try:
+        bounds = parse_bbox(bbox) if bbox else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await asyncio.to_thread(analysis_store.list_analyses, bounds, limit, offset)
+
+
+@router.get("/analyses/{building_id}")
+async def get_analysis(building_id: str):
+    """A saved analysis, exactly as it was returned when it ran"""
+    payload = await asyncio.to_thread(analysis_store.get_analysis_payload, building_id)
+    if payload is None:
+        raise HTTPException(status_code=404, detail=f"Analysis {building_id} not found")
+    return Response(content=payload, media_type="application/json")
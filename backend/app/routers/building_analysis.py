@@ -2,79 +2,311 @@
 Building analysis API endpoints
 """
 
-from fastapi import APIRouter, HTTPException
-from app.models.analysis import BuildingRequest, BuildingAnalysisResponse
-from app.services import (
-    zoning_checker,
-    school_analyzer,
-    traffic_calculator,
-    transit_analyzer,
-    infrastructure_analyzer,
-    shadow_calculator,
-    economic_analyzer,
-    gemini_service
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.models.analysis import (
+    BuildingRequest,
+    BatchBuildingRequest,
+    BuildingAnalysisResponse,
+    CapacityRequest,
+    ShadowStudyRequest,
+    SiteSearchRequest,
+    SweepRequest
 )
+from app.services import analysis_store, capacity_solver, gemini_service, metrics, road_network
+from app.services.workers import WorkerPoolFull, pool as worker_pool
+from app.services.analysis_cache import analysis_cache_stats
+from app.services.single_flight import SingleFlight, canonical_key, single_flight_stats
+from app.services.analysis_pipeline import (
+    iter_analysis_stages,
+    run_analyses_concurrently
+)
+from datetime import datetime
+import asyncio
+import json
+import time
 import uuid
-from app.services.heatmap_generator import generate_impact_heatmap
+from typing import Literal, Optional
+from app.services.heatmap_generator import ATLANTA_BBOX, cached_impact_heatmap, store_impact_heatmap
 
 router = APIRouter()
 
+analysis_flights = SingleFlight("analyze_building")
+heatmap_flights = SingleFlight("impact_heatmap")
+
 
 @router.post("/analyze-building")
-async def analyze_building(building: BuildingRequest):
-    """Comprehensive building impact analysis"""
+async def analyze_building(building: BuildingRequest, profile: bool = False):
+    """
+    Comprehensive building impact analysis
+    Independent analyzers run concurrently with per-stage timeouts; stages
+    that fail are listed in degraded_stages instead of failing the request.
+    Identical requests in flight at the same time share one analysis.
+    ?profile=1 adds a span-by-span timing breakdown under "profile"; a
+    profiled request always runs its own analysis, since a shared one
+    records its spans in the context of the request that started it.
+    """
+    request_profile = metrics.start_profile() if profile else None
     try:
-        building_id = str(uuid.uuid4())
-        
-        # Run all analyses
-        zoning_result = zoning_checker.check_zoning(building.location, building.stories, building.units)
-        school_impact = school_analyzer.calculate_school_impact(building.location, building.units)
-        traffic_impact = traffic_calculator.calculate_traffic(building.location, building.units)
-        transit_access = transit_analyzer.analyze_transit_access(building.location)
-        infrastructure = infrastructure_analyzer.calculate_infrastructure_impact(building.location, building.units)
-        shadow_analysis = shadow_calculator.calculate_shadows(building.location, building.footprint, building.stories)
-        
-        # ✅ FIXED: Call analyze_economic_impact with location parameter
-        economic_impact = economic_analyzer.analyze_economic_impact(building.location, building.units, building.stories)
-        
-        # Aggregate results
-        all_results = {
-            "building_id": building_id,
-            "building": building.dict(),
-            "zoning": zoning_result,
-            "school_impact": school_impact,
-            "traffic_impact": traffic_impact,
-            "transit_access": transit_access,
-            "infrastructure": infrastructure,
-            "shadow_analysis": shadow_analysis,
-            "economic_impact": economic_impact
-        }
+        if request_profile is not None:
+            response = await run_building_analysis(building)
+            response["profile"] = request_profile.report()
+            return response
+        # Identical requests arriving together share one analysis (and one
+        # building_id); each gets its own top-level copy of the response
+        return dict(await analysis_flights.run(
+            canonical_key(building.model_dump(mode="json")), run_building_analysis, building
+        ))
         
-        # Identify bottlenecks
+    except Exception as e:
+        print(f"ERROR in analyze_building: {str(e)}")  # Debug
+        import traceback
+        traceback.print_exc()  # Print full traceback
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+
+async def run_building_analysis(building: BuildingRequest) -> dict:
+    """Analyzers, bottlenecks, AI report and save for one building"""
+    total_start = time.perf_counter()
+    
+    # Run all analyses
+    all_results, timings_ms, degraded = await run_analyses_concurrently(building)
+    
+    # Identify bottlenecks
+    with metrics.span("bottlenecks"):
         bottlenecks = identify_bottlenecks(all_results)
+    
+    # Generate AI report
+    start = time.perf_counter()
+    with metrics.span("ai_report"):
+        ai_report = await generate_report_with_timeout(all_results, degraded)
+    timings_ms["ai_report"] = round((time.perf_counter() - start) * 1000, 2)
+    timings_ms["total"] = round((time.perf_counter() - total_start) * 1000, 2)
+    
+    # Return complete analysis
+    response = build_analysis_response(all_results, bottlenecks, ai_report)
+    response["timings_ms"] = timings_ms
+    response["degraded_stages"] = degraded
+    with metrics.span("store"):
+        await save_analyses([building], [response])
+    return response
+
+
+@router.post("/analyze-building/stream")
+async def analyze_building_stream(building: BuildingRequest):
+    """
+    Streaming building impact analysis over Server-Sent Events
+    Events, in order of availability:
+      stage        - one per analyzer as soon as it finishes
+      bottlenecks  - once every analyzer has reported
+      report_chunk - AI report text as the model generates it
+      done         - building id, per-stage timings and degraded stages
+    """
+    return StreamingResponse(
+        stream_analysis_events(building),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def stream_analysis_events(building: BuildingRequest):
+    """Produce the SSE event stream for analyze_building_stream"""
+    total_start = time.perf_counter()
+    all_results = {
+        "building_id": str(uuid.uuid4()),
+        "building": building.model_dump()
+    }
+    timings_ms = {}
+    degraded = []
+    
+    try:
+        async for key, result, elapsed_ms, error in iter_analysis_stages(building):
+            all_results[key] = result
+            timings_ms[key] = elapsed_ms
+            if error is not None:
+                degraded.append({"stage": key, "reason": error})
+            yield sse_event("stage", {"stage": key, "result": result, "elapsed_ms": elapsed_ms, "error": error})
         
-        # Generate AI report
-        ai_report = await gemini_service.generate_planning_report(all_results)
+        bottlenecks = identify_bottlenecks(all_results)
+        yield sse_event("bottlenecks", bottlenecks)
         
-        # Return complete analysis
+        start = time.perf_counter()
+        if degraded:
+            report = await generate_report_with_timeout(all_results, degraded)
+            yield sse_event("report_chunk", {"text": report["ai_summary"]})
+        else:
+            chunks = []
+            async for text in gemini_service.stream_planning_report(all_results):
+                chunks.append(text)
+                yield sse_event("report_chunk", {"text": text})
+            report = {"ai_summary": "".join(chunks), "timestamp": datetime.now()}
+        timings_ms["ai_report"] = round((time.perf_counter() - start) * 1000, 2)
+        timings_ms["total"] = round((time.perf_counter() - total_start) * 1000, 2)
+        
+        response = build_analysis_response(all_results, bottlenecks, report)
+        response["timings_ms"] = timings_ms
+        response["degraded_stages"] = degraded
+        await save_analyses([building], [response])
+        
+        yield sse_event("done", {
+            "building_id": all_results["building_id"],
+            "timings_ms": timings_ms,
+            "degraded_stages": degraded
+        })
+        
+    except Exception as e:
+        print(f"ERROR in analyze_building_stream: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        yield sse_event("error", {"detail": f"Analysis failed: {str(e)}"})
+
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+async def generate_report_with_timeout(all_results: dict, degraded: list) -> dict:
+    """
+    Generate the AI report, degrading to the template report on timeout
+    Skips the report entirely if an analyzer stage did not complete
+    """
+    if degraded:
+        stages = ", ".join(d["stage"] for d in degraded)
         return {
-            "building_id": building_id,
-            "zoning": zoning_result,
-            "school_impact": school_impact,
-            "traffic_impact": traffic_impact,
-            "transit_access": transit_access,
-            "infrastructure": infrastructure,
-            "shadow_analysis": shadow_analysis,
-            "economic_impact": economic_impact,
-            "bottlenecks": bottlenecks,
-            "ai_report": ai_report
+            "ai_summary": f"Report unavailable: incomplete analysis ({stages}). Please retry.",
+            "timestamp": datetime.now()
+        }
+    
+    try:
+        return await asyncio.wait_for(
+            gemini_service.generate_planning_report(all_results),
+            timeout=settings.AI_REPORT_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        degraded.append({
+            "stage": "ai_report",
+            "reason": f"timed out after {settings.AI_REPORT_TIMEOUT_SECONDS}s, template report used"
+        })
+        return {
+            "ai_summary": gemini_service.generate_template_report(all_results),
+            "timestamp": datetime.now()
+        }
+
+
+@router.post("/analyze-buildings")
+async def analyze_buildings(batch: BatchBuildingRequest, profile: bool = False):
+    """
+    Batch (portfolio) building impact analysis
+    Runs every deterministic analyzer over the whole batch in one request.
+    The AI report is skipped by default; use report_mode to request one.
+    ?profile=1 adds a span-by-span timing breakdown under "profile".
+    """
+    if len(batch.buildings) > settings.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(batch.buildings)} exceeds limit of {settings.MAX_BATCH_SIZE} buildings"
+        )
+    
+    request_profile = metrics.start_profile() if profile else None
+    try:
+        total_start = time.perf_counter()
+        # CPU-bound, runs on the worker tier
+        all_results, timings_ms = await worker_pool.run("batch_analysis", batch.buildings)
+        for stage, elapsed_ms in timings_ms.items():
+            metrics.STAGE_SECONDS.observe(elapsed_ms / 1000, stage=stage, mode="batch")
+        
+        start = time.perf_counter()
+        with metrics.span("bottlenecks"):
+            all_bottlenecks = [identify_bottlenecks(results) for results in all_results]
+        timings_ms["bottlenecks"] = round((time.perf_counter() - start) * 1000, 2)
+        
+        start = time.perf_counter()
+        with metrics.span("ai_report"):
+            ai_reports = await generate_batch_reports(all_results, batch.report_mode)
+        timings_ms["ai_report"] = round((time.perf_counter() - start) * 1000, 2)
+        
+        responses = []
+        for index, (results, bottlenecks, ai_report) in enumerate(zip(all_results, all_bottlenecks, ai_reports)):
+            response = build_analysis_response(results, bottlenecks, ai_report)
+            response["index"] = index
+            responses.append(response)
+        
+        start = time.perf_counter()
+        with metrics.span("store"):
+            await save_analyses(batch.buildings, responses)
+        timings_ms["store"] = round((time.perf_counter() - start) * 1000, 2)
+        
+        timings_ms["total"] = round((time.perf_counter() - total_start) * 1000, 2)
+        
+        response = {
+            "count": len(responses),
+            "results": responses,
+            "timings_ms": timings_ms
         }
+        if request_profile is not None:
+            response["profile"] = request_profile.report()
+        return response
         
+    except WorkerPoolFull:
+        raise
     except Exception as e:
-        print(f"ERROR in analyze_building: {str(e)}")  # Debug
+        print(f"ERROR in analyze_buildings: {str(e)}")
         import traceback
-        traceback.print_exc()  # Print full traceback
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
+
+
+async def generate_batch_reports(all_results: list, report_mode: str) -> list:
+    """Generate per-building reports for a batch according to report_mode"""
+    if report_mode == "none":
+        return [None] * len(all_results)
+    
+    if report_mode == "template":
+        return [
+            {
+                "ai_summary": gemini_service.generate_template_report(results),
+                "timestamp": datetime.now()
+            }
+            for results in all_results
+        ]
+    
+    # Bound concurrent Gemini calls so a large batch does not flood the API
+    semaphore = asyncio.Semaphore(settings.BATCH_AI_CONCURRENCY)
+    
+    async def limited_report(results):
+        async with semaphore:
+            return await gemini_service.generate_planning_report(results)
+    
+    return await asyncio.gather(*(limited_report(results) for results in all_results))
+
+
+async def save_analyses(buildings: list, responses: list):
+    """Store responses for GET /analyses/{building_id}; a failed write never fails the analysis"""
+    if not settings.STORE_ANALYSES:
+        return
+    try:
+        await asyncio.to_thread(analysis_store.save_analyses, buildings, responses)
+    except Exception as e:
+        print(f"WARNING: could not save {len(responses)} analyses: {str(e)}")
+
+
+def build_analysis_response(results: dict, bottlenecks: list, ai_report) -> dict:
+    """Shape aggregated analysis results into the API response"""
+    return {
+        "building_id": results["building_id"],
+        "zoning": results["zoning"],
+        "school_impact": results["school_impact"],
+        "traffic_impact": results["traffic_impact"],
+        "transit_access": results["transit_access"],
+        "infrastructure": results["infrastructure"],
+        "shadow_analysis": results["shadow_analysis"],
+        "economic_impact": results["economic_impact"],
+        "bottlenecks": bottlenecks,
+        "ai_report": ai_report
+    }
 
 
 def identify_bottlenecks(results: dict) -> list:
@@ -82,7 +314,8 @@ def identify_bottlenecks(results: dict) -> list:
     bottlenecks = []
     
     # Check zoning violations (now dict, not object)
-    if not results["zoning"]["compliant"]:
+    # Sections are None when their analyzer stage was degraded
+    if results["zoning"] and not results["zoning"]["compliant"]:
         bottlenecks.append({
             "type": "ZONING",
             "severity": "HIGH",
@@ -90,7 +323,7 @@ def identify_bottlenecks(results: dict) -> list:
         })
     
     # Check school capacity (now dict)
-    if results["school_impact"]["bottlenecks"]:
+    if results["school_impact"] and results["school_impact"]["bottlenecks"]:
         for school in results["school_impact"]["bottlenecks"]:
             bottlenecks.append({
                 "type": "SCHOOL_CAPACITY",
@@ -99,7 +332,7 @@ def identify_bottlenecks(results: dict) -> list:
             })
     
     # Check traffic impact (now dict)
-    if results["traffic_impact"]["los_impacts"]:
+    if results["traffic_impact"] and results["traffic_impact"]["los_impacts"]:
         bottlenecks.append({
             "type": "TRAFFIC",
             "severity": "HIGH",
@@ -107,7 +340,7 @@ def identify_bottlenecks(results: dict) -> list:
         })
     
     # Check infrastructure (now dict)
-    if not results["infrastructure"]["infrastructure_adequate"]:
+    if results["infrastructure"] and not results["infrastructure"]["infrastructure_adequate"]:
         bottlenecks.append({
             "type": "INFRASTRUCTURE",
             "severity": "MEDIUM",
@@ -116,14 +349,242 @@ def identify_bottlenecks(results: dict) -> list:
     
     return bottlenecks
 
+
+@router.post("/shadow-study")
+async def shadow_study(study: ShadowStudyRequest, profile: bool = False):
+    """
+    Shadow envelope over a date range (e.g. an hourly sweep across a year)
+    Returns the union shadow geometry and the parcels it touches.
+    ?profile=1 adds the worker queue/run breakdown under "profile".
+    """
+    check_shadow_study(study)
+    
+    request_profile = metrics.start_profile() if profile else None
+    try:
+        start = time.perf_counter()
+        result = await worker_pool.run(
+            "shadow_study",
+            study.location,
+            study.footprint,
+            study.stories,
+            study.start_date,
+            study.end_date,
+            study.step_minutes,
+            study.start_hour,
+            study.end_hour
+        )
+        result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        if request_profile is not None:
+            result["profile"] = request_profile.report()
+        return result
+        
+    except WorkerPoolFull:
+        raise
+    except Exception as e:
+        print(f"ERROR in shadow_study: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Shadow study failed: {str(e)}")
+
+
+def check_shadow_study(study: ShadowStudyRequest):
+    """Reject inverted or oversized shadow study ranges"""
+    if study.end_date < study.start_date:
+        raise HTTPException(status_code=422, detail="end_date must not be before start_date")
+    if study.end_hour <= study.start_hour:
+        raise HTTPException(status_code=422, detail="end_hour must be after start_hour")
+    if (study.end_date - study.start_date).days >= settings.SHADOW_MAX_STUDY_DAYS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Shadow study is limited to {settings.SHADOW_MAX_STUDY_DAYS} days"
+        )
+
+
+@router.post("/site-search")
+async def site_search(search: SiteSearchRequest):
+    """
+    Find where a building program fits best
+    Evaluates every candidate (a grid over the bbox, or the given points) in
+    vectorized batches, pruning on zoning height and transit walk time first,
+    and returns the top_k sites ranked by bottleneck count, then impact score.
+    """
+    if search.resolution > settings.SITE_SEARCH_MAX_RESOLUTION:
+        raise HTTPException(status_code=413, detail=f"resolution is limited to {settings.SITE_SEARCH_MAX_RESOLUTION}")
+    if search.candidates is not None and len(search.candidates) > settings.SITE_SEARCH_MAX_CANDIDATES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Site search is limited to {settings.SITE_SEARCH_MAX_CANDIDATES} candidates"
+        )
+    if search.top_k > settings.SITE_SEARCH_MAX_TOP_K:
+        raise HTTPException(status_code=413, detail=f"top_k is limited to {settings.SITE_SEARCH_MAX_TOP_K}")
+    try:
+        search_bbox = parse_bbox(search.bbox) if search.bbox else ATLANTA_BBOX
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        start = time.perf_counter()
+        # Vectorized over every candidate, CPU-bound: runs on the worker tier
+        result = await worker_pool.run(
+            "site_search",
+            search.units,
+            search.stories,
+            building_type=search.type,
+            bbox=search_bbox,
+            resolution=search.resolution,
+            candidates=[(c.lat, c.lng) for c in search.candidates] if search.candidates is not None else None,
+            top_k=search.top_k,
+            max_walk_minutes=search.max_walk_minutes,
+            require_zoning_compliant=search.require_zoning_compliant,
+            min_separation_m=search.min_separation_m
+        )
+        result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+        
+    except WorkerPoolFull:
+        raise
+    except Exception as e:
+        print(f"ERROR in site_search: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Site search failed: {str(e)}")
+
+
+@router.post("/max-capacity")
+async def max_capacity(request: CapacityRequest):
+    """
+    Largest unit and story counts a site takes before its first bottleneck
+    Solves every school, intersection, utility and zoning threshold in one
+    call, and reports which constraint binds first.
+    """
+    if request.max_units is not None and request.max_units > settings.CAPACITY_MAX_UNITS:
+        raise HTTPException(status_code=413, detail=f"max_units is limited to {settings.CAPACITY_MAX_UNITS}")
+    try:
+        start = time.perf_counter()
+        result = await asyncio.to_thread(capacity_solver.solve_capacity, request.location, request.max_units)
+        result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+        
+    except Exception as e:
+        print(f"ERROR in max_capacity: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Capacity solve failed: {str(e)}")
+
+
+@router.post("/parameter-sweep")
+async def parameter_sweep(sweep: SweepRequest):
+    """
+    Every analyzer's key outputs over a units x stories grid at one site
+    Location work runs once and is shared by every grid point, so a sweep
+    costs about as much as a single analysis. Returns per-units and
+    per-stories curves plus the bottleneck count of each grid point.
+    """
+    # Ranges, so the size checks below never build the value lists
+    units_values = sweep.units.values()
+    stories_values = sweep.stories.values()
+    if not units_values or not stories_values:
+        raise HTTPException(status_code=422, detail="units and stories ranges need stop >= start")
+    if stories_values[-1] > 100:
+        raise HTTPException(status_code=422, detail="stories are limited to 100")
+    if len(units_values) * len(stories_values) > settings.SWEEP_MAX_POINTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Sweep of {len(units_values) * len(stories_values)} points exceeds limit of "
+                   f"{settings.SWEEP_MAX_POINTS}"
+        )
+    
+    try:
+        start = time.perf_counter()
+        result = await worker_pool.run(
+            "parameter_sweep",
+            sweep.location,
+            sweep.footprint,
+            list(units_values),
+            list(stories_values),
+            building_type=sweep.type
+        )
+        result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+        
+    except WorkerPoolFull:
+        raise
+    except Exception as e:
+        print(f"ERROR in parameter_sweep: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Parameter sweep failed: {str(e)}")
+
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """Hit/miss counters for the analysis caches"""
+    return {
+        "analyzers": analysis_cache_stats(),
+        "traffic_routes": road_network.route_cache_stats(),
+        "ai_reports": gemini_service.report_cache_stats(),
+        "single_flight": single_flight_stats()
+    }
+
+
+@router.get("/worker-stats")
+async def get_worker_stats():
+    """Queue depth, utilization and job counters of the analysis worker tier"""
+    return worker_pool.stats()
+
+
 @router.get("/impact-heatmap")
-async def get_impact_heatmap():
+async def get_impact_heatmap(
+    resolution: int = Query(50, ge=2, le=settings.HEATMAP_MAX_RESOLUTION, description="Cells per side"),
+    bbox: Optional[str] = Query(None, description="min_lng,min_lat,max_lng,max_lat (defaults to Atlanta)"),
+    units: Optional[int] = Query(None, gt=0, description="Reference program size evaluated at each cell"),
+    format: Literal["geojson", "grid"] = Query("geojson", description="geojson polygons or compact grid")
+):
     """Get development impact heatmap data"""
+    heatmap_bbox = check_heatmap_request(resolution, bbox, format)
+    
     try:
-        heatmap_data = generate_impact_heatmap()
-        return heatmap_data
+        body = await impact_heatmap_body(heatmap_bbox, resolution, units, format)
+        return Response(content=body, media_type="application/json")
+    except WorkerPoolFull:
+        raise
     except Exception as e:
         print(f"ERROR in heatmap generation: {str(e)}")
         import traceback
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def check_heatmap_request(resolution: int, bbox: Optional[str], format: str) -> tuple:
+    """Validate heatmap output limits; returns the parsed bbox (defaults to Atlanta)"""
+    if format == "geojson" and resolution > settings.HEATMAP_MAX_GEOJSON_RESOLUTION:
+        raise HTTPException(
+            status_code=400,
+            detail=f"GeoJSON output is limited to resolution {settings.HEATMAP_MAX_GEOJSON_RESOLUTION}; use format=grid"
+        )
+    try:
+        return parse_bbox(bbox) if bbox else ATLANTA_BBOX
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def impact_heatmap_body(heatmap_bbox: tuple, resolution: int, units: Optional[int], format: str) -> bytes:
+    """Serialized heatmap, from the cache or built on the worker tier"""
+    body = cached_impact_heatmap(heatmap_bbox, resolution, units, format)
+    if body is None:
+        # A burst of cold requests for one heatmap builds it once
+        body = await heatmap_flights.run(
+            (heatmap_bbox, resolution, units, format), build_impact_heatmap_body,
+            heatmap_bbox, resolution, units, format
+        )
+    return body
+
+
+async def build_impact_heatmap_body(heatmap_bbox: tuple, resolution: int, units: Optional[int], format: str) -> bytes:
+    """Build and cache a heatmap (raster builds are CPU-bound, they run on the worker tier)"""
+    body = await worker_pool.run("impact_heatmap", heatmap_bbox, resolution, units, format)
+    store_impact_heatmap(heatmap_bbox, resolution, units, format, body)
+    return body
+
+
+def parse_bbox(bbox: str) -> tuple:
+    """Parse a 'min_lng,min_lat,max_lng,max_lat' query string"""
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise ValueError("bbox must be min_lng,min_lat,max_lng,max_lat")
+    if not (min_lng < max_lng and min_lat < max_lat):
+        raise ValueError("bbox min values must be less than max values")
+    return (min_lng, min_lat, max_lng, max_lat)
@@ -2,68 +2,107 @@
 Data endpoints for serving geospatial data layers
 """
 
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Request, Response
+from typing import Optional
+from app.services import vector_tiles
+from app.services.datasets import registry as datasets
+import asyncio
 
 router = APIRouter()
 
+GEOJSON_MEDIA_TYPE = "application/geo+json"
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+
+def layer_geojson_response(layer_name: str) -> Response:
+    """Whole-layer GeoJSON, serialized once per layer version"""
+    layer = vector_tiles.get_layer(layer_name)
+    return Response(
+        content=layer.geojson(),
+        media_type=GEOJSON_MEDIA_TYPE,
+        headers={"ETag": f'"{layer.version}"'}
+    )
+
 
 @router.get("/data/schools")
-async def get_schools() -> Dict[str, Any]:
+async def get_schools():
     """
     Get all Atlanta schools for map layer
     Returns GeoJSON FeatureCollection
     """
-    # TODO: Query from database
-    # For now, return empty GeoJSON
-    return {
-        "type": "FeatureCollection",
-        "features": []
-    }
+    return layer_geojson_response("schools")
 
 
 @router.get("/data/zoning")
-async def get_zoning() -> Dict[str, Any]:
+async def get_zoning():
     """
     Get Atlanta zoning boundaries for map layer
-    Returns GeoJSON FeatureCollection
+    Returns GeoJSON FeatureCollection (prefer /tiles/zoning for map display)
     """
-    # TODO: Query from database
-    return {
-        "type": "FeatureCollection",
-        "features": []
-    }
+    return layer_geojson_response("zoning")
 
 
 @router.get("/data/marta-stations")
-async def get_marta_stations() -> Dict[str, Any]:
+async def get_marta_stations():
     """
     Get MARTA station locations for map layer
     Returns GeoJSON FeatureCollection
     """
-    # TODO: Query from database
-    return {
-        "type": "FeatureCollection",
-        "features": []
-    }
+    return layer_geojson_response("marta-stations")
 
 
 @router.get("/data/summary")
 async def get_data_summary():
     """
-    Get summary of available data layers
+    Get summary of available data layers and reference dataset versions
     """
-    return {
-        "schools": {
-            "count": 0,
-            "last_updated": None
-        },
-        "zoning": {
-            "count": 0,
-            "last_updated": None
-        },
-        "marta_stations": {
-            "count": 0,
-            "last_updated": None
+    versions = datasets.versions()
+
+    def layer_summary(layer_name, dataset_name):
+        loaded = versions.get(dataset_name, {})
+        return {
+            "count": len(vector_tiles.get_layer(layer_name)),
+            "version": loaded.get("version"),
+            "last_updated": loaded.get("loaded_at")
         }
+
+    summary = {
+        "schools": layer_summary("schools", "schools"),
+        "zoning": layer_summary("zoning", "zoning"),
+        "marta_stations": layer_summary("marta-stations", "marta_stations")
     }
+    summary["datasets"] = datasets.versions()
+    return summary
+
+
+@router.post("/data/reload")
+async def reload_reference_data(dataset: Optional[str] = None):
+    """
+    Check reference data files for changes now instead of waiting for the
+    next interval check; changed datasets are rebuilt and swapped in
+    """
+    if dataset is not None and dataset not in datasets.versions():
+        raise HTTPException(status_code=404, detail=f"Unknown dataset '{dataset}'")
+    await asyncio.to_thread(datasets.reload, dataset)
+    return {"datasets": datasets.versions()}
+
+
+@router.get("/tiles/{layer}/{z}/{x}/{y}")
+async def get_vector_tile(layer: str, z: int, x: int, y: int, request: Request):
+    """
+    Get one Mapbox Vector Tile for a data layer
+    Layers: schools, marta-stations, zoning. Supports If-None-Match.
+    """
+    if layer not in vector_tiles.LAYER_SOURCES:
+        raise HTTPException(status_code=404, detail=f"Unknown layer '{layer}'")
+    if not (0 <= z <= vector_tiles.MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=400, detail=f"Invalid tile {z}/{x}/{y}")
+    
+    # Rendering is CPU-bound, keep it off the event loop
+    data, etag = await asyncio.to_thread(vector_tiles.get_tile, layer, z, x, y)
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=3600"}
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=data, media_type=MVT_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,150 @@
+"""
+Background job endpoints
+Submit a long-running analysis, poll it for progress, then fetch the result.
+"""
+
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+from app.config import settings
+from app.models.analysis import BatchBuildingRequest, BuildingRequest, HeatmapRequest, JobRequest, ShadowStudyRequest
+from app.routers.building_analysis import (
+    analyze_building,
+    analyze_buildings,
+    check_heatmap_request,
+    check_shadow_study,
+    impact_heatmap_body,
+    shadow_study
+)
+from app.services.job_queue import JobQueueFull, queue as job_queue
+import json
+
+router = APIRouter()
+
+JOB_MODELS = {
+    "single": BuildingRequest,
+    "batch": BatchBuildingRequest,
+    "heatmap": HeatmapRequest,
+    "shadow_study": ShadowStudyRequest,
+}
+
+
+async def run_single_job(params: dict, progress) -> dict:
+    """One building analysis (same response as POST /analyze-building)"""
+    return jsonable_encoder(await analyze_building(BuildingRequest(**params)))
+
+
+async def run_batch_job(params: dict, progress) -> dict:
+    """
+    Portfolio analysis in JOB_BATCH_CHUNK-building chunks, reporting progress
+    after each chunk (same response as POST /analyze-buildings)
+    """
+    batch = BatchBuildingRequest(**params)
+    total = len(batch.buildings)
+    results = []
+    timings_ms = {}
+    for offset in range(0, total, settings.JOB_BATCH_CHUNK):
+        chunk = BatchBuildingRequest(
+            buildings=batch.buildings[offset:offset + settings.JOB_BATCH_CHUNK],
+            report_mode=batch.report_mode
+        )
+        response = await job_queue.call_when_free(analyze_buildings, chunk)
+        for result in response["results"]:
+            result["index"] += offset
+        results.extend(response["results"])
+        for stage, elapsed in response["timings_ms"].items():
+            timings_ms[stage] = round(timings_ms.get(stage, 0.0) + elapsed, 2)
+        await progress(len(results) / total)
+    return jsonable_encoder({"count": len(results), "results": results, "timings_ms": timings_ms})
+
+
+async def run_heatmap_job(params: dict, progress) -> dict:
+    """Impact heatmap (same body as GET /impact-heatmap)"""
+    request = HeatmapRequest(**params)
+    heatmap_bbox = check_heatmap_request(request.resolution, request.bbox, request.format)
+    return json.loads(await impact_heatmap_body(heatmap_bbox, request.resolution, request.units, request.format))
+
+
+async def run_shadow_study_job(params: dict, progress) -> dict:
+    """Shadow envelope sweep (same response as POST /shadow-study)"""
+    return jsonable_encoder(await shadow_study(ShadowStudyRequest(**params)))
+
+
+job_queue.register("single", run_single_job, priority="interactive")
+job_queue.register("heatmap", run_heatmap_job, priority="interactive")
+job_queue.register("batch", run_batch_job, priority="bulk")
+job_queue.register("shadow_study", run_shadow_study_job, priority="bulk")
+
+
+def check_job_params(kind: str, params: dict) -> dict:
+    """Validate params against the kind's request model and limits; returns them normalized"""
+    try:
+        request = JOB_MODELS[kind](**params)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=jsonable_encoder(e.errors(include_url=False)))
+
+    if kind == "batch" and len(request.buildings) > settings.JOB_MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch job of {len(request.buildings)} exceeds limit of {settings.JOB_MAX_BATCH_SIZE} buildings"
+        )
+    if kind == "heatmap":
+        if request.resolution > settings.HEATMAP_MAX_RESOLUTION:
+            raise HTTPException(status_code=422, detail=f"resolution is limited to {settings.HEATMAP_MAX_RESOLUTION}")
+        check_heatmap_request(request.resolution, request.bbox, request.format)
+    if kind == "shadow_study":
+        check_shadow_study(request)
+    return request.model_dump(mode="json")
+
+
+@router.post("/jobs", status_code=202)
+async def submit_job(job: JobRequest):
+    """
+    Queue a long-running analysis
+    Returns the job id to poll with GET /jobs/{job_id}
+    """
+    params = check_job_params(job.kind, job.params)
+    try:
+        return await job_queue.submit(job.kind, params, job.priority)
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Job queue is full ({str(e)}), retry later",
+            headers={"Retry-After": str(settings.WORKER_RETRY_AFTER_SECONDS)}
+        )
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status and progress (result_ready once GET /jobs/{job_id}/result has it)"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Result of a succeeded job, served as stored"""
+    found = await job_queue.get_result(job_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    status, result = found
+    if status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {status}; no result available")
+    return Response(content=result, media_type="application/json")
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job (finished jobs are returned unchanged)"""
+    job = await job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.get("/job-stats")
+async def get_job_stats():
+    """Queue depth per priority, running jobs and outcome counters"""
+    return job_queue.stats()
@@ -0,0 +1,108 @@
+"""
+Cumulative multi-building scenario endpoints
+Scenario updates are CPU work (up to SCENARIO_MAX_BUILDINGS buildings), so
+they run in threads; each scenario's own lock keeps concurrent updates
+consistent.
+"""
+
+from fastapi import APIRouter, HTTPException
+from app.config import settings
+from app.models.analysis import BuildingRequest, ScenarioRequest
+from app.services import scenario as scenario_service
+import asyncio
+import time
+
+router = APIRouter()
+
+
+def get_scenario_or_404(scenario_id: str):
+    """Registered scenario or a 404"""
+    scenario = scenario_service.get_scenario(scenario_id)
+    if scenario is None:
+        raise HTTPException(status_code=404, detail=f"Scenario {scenario_id} not found")
+    return scenario
+
+
+@router.post("/scenarios")
+async def create_scenario(request: ScenarioRequest):
+    """
+    Create a scenario, optionally seeded with buildings applied in order
+    Returns the scenario summary with cumulative facility loads
+    """
+    if len(request.buildings) > settings.SCENARIO_MAX_BUILDINGS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Scenario is limited to {settings.SCENARIO_MAX_BUILDINGS} buildings"
+        )
+    
+    scenario = await asyncio.to_thread(scenario_service.create_scenario, request.name, request.buildings)
+    return await asyncio.to_thread(scenario.summary)
+
+
+@router.get("/scenarios/{scenario_id}")
+async def get_scenario(scenario_id: str):
+    """Scenario summary: buildings, totals and every loaded facility"""
+    return await asyncio.to_thread(get_scenario_or_404(scenario_id).summary)
+
+
+@router.delete("/scenarios/{scenario_id}")
+async def delete_scenario(scenario_id: str):
+    """Discard a scenario"""
+    if not scenario_service.delete_scenario(scenario_id):
+        raise HTTPException(status_code=404, detail=f"Scenario {scenario_id} not found")
+    return {"scenario_id": scenario_id, "deleted": True}
+
+
+@router.post("/scenarios/{scenario_id}/buildings")
+async def add_scenario_building(scenario_id: str, building: BuildingRequest):
+    """
+    Apply one more building on top of the scenario
+    Only the facilities it reaches are updated; returns its cumulative
+    analysis and the facilities it pushed over their threshold
+    """
+    scenario = get_scenario_or_404(scenario_id)
+    start = time.perf_counter()
+    try:
+        building_id, crossed = await asyncio.to_thread(scenario.add_building, building)
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    analysis = await asyncio.to_thread(scenario.building_analysis, building_id)
+    
+    return {
+        "scenario_id": scenario_id,
+        "building_id": building_id,
+        "building_count": len(scenario),
+        "newly_over_threshold": crossed,
+        "analysis": analysis,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+    }
+
+
+@router.get("/scenarios/{scenario_id}/buildings/{building_id}")
+async def get_scenario_building(scenario_id: str, building_id: str):
+    """One building's analysis with the rest of the scenario as background load"""
+    scenario = get_scenario_or_404(scenario_id)
+    try:
+        return await asyncio.to_thread(scenario.building_analysis, building_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Building {building_id} not in scenario")
+
+
+@router.delete("/scenarios/{scenario_id}/buildings/{building_id}")
+async def remove_scenario_building(scenario_id: str, building_id: str):
+    """
+    Take a building out of the scenario
+    Returns the updated status of every facility it loaded
+    """
+    scenario = get_scenario_or_404(scenario_id)
+    try:
+        updated = await asyncio.to_thread(scenario.remove_building, building_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Building {building_id} not in scenario")
+    
+    return {
+        "scenario_id": scenario_id,
+        "building_id": building_id,
+        "building_count": len(scenario),
+        "updated_facilities": updated
+    }
@@ -0,0 +1,67 @@
+"""
+Memoized analyzer results keyed on the inputs each analyzer depends on
+Locations are snapped to a lat/lng grid (ANALYSIS_CACHE_QUANTUM_DEG) before
+analysis so nearby clicks and slider drags on the same block share entries.
+"""
+
+import copy
+
+from app.config import settings
+from app.models.analysis import Location
+from app.services.cache import LRUCache
+from app.services.datasets import registry as datasets
+
+_STAGE_CACHES = {}
+
+
+def quantize(value: float) -> float:
+    """Snap a coordinate to the cache grid (no-op when the quantum is 0)"""
+    quantum = settings.ANALYSIS_CACHE_QUANTUM_DEG
+    if quantum <= 0:
+        return value
+    return round(round(value / quantum) * quantum, 7)
+
+
+def snap_building(building):
+    """Copy of a BuildingRequest with its location snapped to the cache grid"""
+    location = Location(lat=quantize(building.location.lat), lng=quantize(building.location.lng))
+    return building.model_copy(update={"location": location})
+
+
+def cached_stage(name, stage, key_fn, snap_location=True):
+    """
+    Wrap an analyzer stage (callable taking a BuildingRequest) with an LRU cache
+    key_fn maps the (snapped) building to the inputs the analyzer depends on.
+    Returns deep copies so callers can never mutate a cached result.
+    """
+    cache = LRUCache(settings.ANALYSIS_CACHE_SIZE, name=name)
+    _STAGE_CACHES[name] = cache
+
+    def run(building):
+        if snap_location:
+            building = snap_building(building)
+        # Picks up changed reference files; results computed from an older
+        # dataset generation are never served (and a reload clears them)
+        datasets.check()
+        key = (key_fn(building), datasets.generation)
+        result = cache.get(key)
+        if result is None:
+            result = stage(building)
+            cache.set(key, result)
+        return copy.deepcopy(result)
+
+    return run
+
+
+def analysis_cache_stats():
+    """Per-analyzer size and hit-rate counters"""
+    return {name: cache.stats() for name, cache in _STAGE_CACHES.items()}
+
+
+def clear_analysis_caches(dataset_name=None):
+    """Drop every memoized analyzer result (also run when a dataset reloads)"""
+    for cache in _STAGE_CACHES.values():
+        cache.clear()
+
+
+datasets.on_reload(clear_analysis_caches)
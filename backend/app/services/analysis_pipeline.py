@@ -0,0 +1,179 @@
+"""
+Analysis pipeline shared by the single and batch building endpoints
+"""
+
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import settings
+from app.services.analysis_cache import cached_stage
+from app.services.metrics import STAGE_ERRORS, STAGE_SECONDS, current_profile
+from app.services import (
+    zoning_checker,
+    school_analyzer,
+    traffic_calculator,
+    transit_analyzer,
+    infrastructure_analyzer,
+    shadow_calculator,
+    economic_analyzer
+)
+
+
+# Deterministic analyzers in the order they are reported.
+# Each entry maps the result key to a callable taking a BuildingRequest.
+ANALYSIS_STAGES = [
+    ("zoning", lambda b: zoning_checker.check_zoning(b.location, b.stories, b.units)),
+    ("school_impact", lambda b: school_analyzer.calculate_school_impact(b.location, b.units)),
+    ("traffic_impact", lambda b: traffic_calculator.calculate_traffic(b.location, b.units)),
+    ("transit_access", lambda b: transit_analyzer.analyze_transit_access(b.location)),
+    ("infrastructure", lambda b: infrastructure_analyzer.calculate_infrastructure_impact(b.location, b.units)),
+    ("shadow_analysis", lambda b: shadow_calculator.calculate_shadows(b.location, b.footprint, b.stories)),
+    ("economic_impact", lambda b: economic_analyzer.analyze_economic_impact(b.location, b.units, b.stories)),
+]
+
+# Inputs each analyzer actually depends on, used as its result cache key
+STAGE_CACHE_KEYS = {
+    "zoning": lambda b: (b.location.lat, b.location.lng, b.stories, b.units),
+    "school_impact": lambda b: (b.location.lat, b.location.lng, b.units),
+    "traffic_impact": lambda b: (b.location.lat, b.location.lng, b.units),
+    "transit_access": lambda b: (b.location.lat, b.location.lng),
+    "infrastructure": lambda b: b.units,
+    "shadow_analysis": lambda b: (b.location.lat, b.location.lng, tuple(map(tuple, b.footprint)), b.stories),
+    "economic_impact": lambda b: (b.location.lat, b.location.lng, b.units, b.stories),
+}
+
+# Memoized stages used by the interactive endpoints. Shadows are computed from
+# the exact footprint geometry, so their location is never snapped.
+CACHED_ANALYSIS_STAGES = [
+    (key, cached_stage(key, stage, STAGE_CACHE_KEYS[key], snap_location=key != "shadow_analysis"))
+    for key, stage in ANALYSIS_STAGES
+]
+
+# Vectorized versions taking the whole list of buildings at once.
+# Stages missing here fall back to calling the single-building analyzer per row.
+BATCH_STAGES = {
+    "zoning": lambda bs: zoning_checker.check_zoning_batch(
+        [b.location for b in bs], [b.stories for b in bs]
+    ),
+    "school_impact": lambda bs: school_analyzer.calculate_school_impact_batch(
+        [b.location for b in bs], [b.units for b in bs]
+    ),
+    "traffic_impact": lambda bs: traffic_calculator.calculate_traffic_batch(
+        [b.location for b in bs], [b.units for b in bs]
+    ),
+    "transit_access": lambda bs: transit_analyzer.analyze_transit_access_batch(
+        [b.location for b in bs]
+    ),
+    # Per-building geometry, fanned out over the stage threads (shapely
+    # releases the GIL)
+    "shadow_analysis": lambda bs: list(_STAGE_EXECUTOR.map(
+        lambda b: shadow_calculator.calculate_shadows(b.location, b.footprint, b.stories), bs
+    )),
+}
+
+
+# Shared worker threads so analyzers never block the event loop
+_STAGE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.ANALYSIS_THREADS, thread_name_prefix="analysis-stage"
+)
+
+
+def run_batch_analyses(buildings):
+    """
+    Run every deterministic analyzer over a whole batch of buildings
+    Stages run one at a time across the batch so their cost can be timed,
+    using the vectorized batch analyzer where one exists
+    Returns: (list of results dicts, {stage: elapsed ms})
+    """
+    results = [
+        {"building_id": str(uuid.uuid4()), "building": building.model_dump()}
+        for building in buildings
+    ]
+    timings_ms = {}
+
+    for key, stage in ANALYSIS_STAGES:
+        start = time.perf_counter()
+        batch_stage = BATCH_STAGES.get(key)
+        if batch_stage is not None:
+            stage_results = batch_stage(buildings)
+        else:
+            stage_results = [stage(building) for building in buildings]
+        for result, stage_result in zip(results, stage_results):
+            result[key] = stage_result
+        timings_ms[key] = round((time.perf_counter() - start) * 1000, 2)
+
+    return results, timings_ms
+
+
+async def run_analyses_concurrently(building):
+    """
+    Run every deterministic analyzer for one building in parallel
+    Each stage runs on the shared thread pool with its own timeout. A stage
+    that times out or raises is reported in `degraded` and its result is None,
+    so the rest of the analysis is still returned.
+    Returns: (results dict, {stage: elapsed ms}, list of degraded stages)
+    """
+    results = {
+        "building_id": str(uuid.uuid4()),
+        "building": building.model_dump()
+    }
+    timings_ms = {}
+    degraded = []
+
+    async for key, result, elapsed_ms, error in iter_analysis_stages(building):
+        results[key] = result
+        timings_ms[key] = elapsed_ms
+        if error is not None:
+            degraded.append({"stage": key, "reason": error})
+
+    return results, timings_ms, degraded
+
+
+async def iter_analysis_stages(building):
+    """
+    Run every deterministic analyzer in parallel, yielding each as it finishes
+    Yields: (stage key, result or None, elapsed ms, error message or None)
+    """
+    def timed(stage):
+        # Notes when the stage thread picked the job up, to split queueing from work
+        picked_up = time.perf_counter()
+        return stage(building), picked_up
+
+    async def run_stage(key, stage):
+        start = time.perf_counter()
+        picked_up = None
+        loop = asyncio.get_running_loop()
+        error = None
+        try:
+            result, picked_up = await asyncio.wait_for(
+                loop.run_in_executor(_STAGE_EXECUTOR, timed, stage),
+                timeout=settings.STAGE_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            # The worker thread cannot be interrupted; its result is discarded
+            result = None
+            error = f"timed out after {settings.STAGE_TIMEOUT_SECONDS}s"
+            STAGE_ERRORS.inc(stage=key, reason="timeout")
+        except Exception as e:
+            print(f"ERROR in stage {key}: {str(e)}")
+            result = None
+            error = str(e)
+            STAGE_ERRORS.inc(stage=key, reason="error")
+        end = time.perf_counter()
+        STAGE_SECONDS.observe(end - start, stage=key, mode="single")
+        profile = current_profile()
+        if profile is not None:
+            queued_ms = round((picked_up - start) * 1000, 2) if picked_up is not None else None
+            profile.add(f"stage:{key}", start, end, queued_ms=queued_ms, error=error)
+        return key, result, round((end - start) * 1000, 2), error
+
+    tasks = [asyncio.ensure_future(run_stage(key, stage)) for key, stage in CACHED_ANALYSIS_STAGES]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # A disconnected stream client stops iteration early
+        for task in tasks:
+            task.cancel()
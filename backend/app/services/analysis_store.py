@@ -0,0 +1,115 @@
+"""
+Saved analyses
+Every analysis response is written once, keyed by its building_id, as
+compact zlib-compressed JSON, so re-opening a result is one primary-key read
+and a decompress instead of re-running the analyzers and the AI report.
+Location, program and outcome columns are stored alongside the payload, so
+listings filter and summarize without decompressing anything.
+"""
+
+from datetime import date, datetime
+import json
+import zlib
+
+from sqlalchemy import func, insert, select
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.saved_analysis import SavedAnalysis
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode_payload(response: dict) -> bytes:
+    """Compact, compressed JSON of one analysis response"""
+    text = json.dumps(response, separators=(",", ":"), default=_json_default)
+    return zlib.compress(text.encode("utf-8"), settings.ANALYSIS_STORE_COMPRESSION)
+
+
+def analysis_row(building, response: dict, created_at: datetime) -> dict:
+    """Column values for one analysis (batch responses lose their batch index)"""
+    response = {key: value for key, value in response.items() if key != "index"}
+    zoning = response.get("zoning")
+    return {
+        "building_id": response["building_id"],
+        "created_at": created_at,
+        "lat": building.location.lat,
+        "lng": building.location.lng,
+        "building_type": building.type,
+        "units": building.units,
+        "stories": building.stories,
+        "zoning_compliant": zoning["compliant"] if zoning else None,
+        "bottleneck_count": len(response.get("bottlenecks") or ()),
+        "payload": encode_payload(response)
+    }
+
+
+def save_analyses(buildings, responses):
+    """Write analysis responses (one transaction, however many)"""
+    created_at = datetime.now()
+    rows = [analysis_row(building, response, created_at) for building, response in zip(buildings, responses)]
+    if not rows:
+        return
+    with SessionLocal() as db:
+        db.execute(insert(SavedAnalysis), rows)
+        db.commit()
+
+
+def get_analysis_payload(building_id: str):
+    """Saved response as JSON bytes, or None if the building_id is unknown"""
+    with SessionLocal() as db:
+        payload = db.execute(
+            select(SavedAnalysis.payload).where(SavedAnalysis.building_id == building_id)
+        ).scalar_one_or_none()
+    return zlib.decompress(payload) if payload is not None else None
+
+
+def list_analyses(bbox=None, limit=50, offset=0) -> dict:
+    """
+    Summaries of saved analyses, newest first, optionally within a
+    (min_lng, min_lat, max_lng, max_lat) bbox
+    """
+    conditions = []
+    if bbox is not None:
+        min_lng, min_lat, max_lng, max_lat = bbox
+        conditions = [
+            SavedAnalysis.lat.between(min_lat, max_lat),
+            SavedAnalysis.lng.between(min_lng, max_lng)
+        ]
+
+    with SessionLocal() as db:
+        total = db.execute(select(func.count()).select_from(SavedAnalysis).where(*conditions)).scalar_one()
+        rows = db.execute(
+            select(
+                SavedAnalysis.building_id, SavedAnalysis.created_at, SavedAnalysis.lat, SavedAnalysis.lng,
+                SavedAnalysis.building_type, SavedAnalysis.units, SavedAnalysis.stories,
+                SavedAnalysis.zoning_compliant, SavedAnalysis.bottleneck_count
+            )
+            .where(*conditions)
+            .order_by(SavedAnalysis.created_at.desc(), SavedAnalysis.building_id)
+            .limit(limit)
+            .offset(offset)
+        ).all()
+
+    return {
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "analyses": [
+            {
+                "building_id": row.building_id,
+                "created_at": row.created_at,
+                "location": {"lat": row.lat, "lng": row.lng},
+                "type": row.building_type,
+                "units": row.units,
+                "stories": row.stories,
+                "zoning_compliant": row.zoning_compliant,
+                "bottleneck_count": row.bottleneck_count
+            }
+            for row in rows
+        ]
+    }
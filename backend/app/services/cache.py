@@ -0,0 +1,150 @@
+"""
+In-memory LRU/TTL cache and on-disk JSON store shared by cached services
+"""
+
+from collections import OrderedDict
+import json
+import os
+import threading
+import time
+
+from app.services.metrics import collector
+
+# Every LRUCache, for the /metrics cache collectors
+_CACHES = []
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with optional TTL and hit/miss counters
+    Entries older than ttl_seconds are treated as misses and dropped.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float = None, name: str = "cache"):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        _CACHES.append(self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Return the cached value for key (refreshing its recency) or default"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entries"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key) -> bool:
+        """Drop one entry; returns whether it was present"""
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Size and hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+@collector("citytrotter_cache_hits_total", "Cache hits", "counter", ("cache",))
+def _cache_hits():
+    return [((cache.name,), cache.hits) for cache in _CACHES]
+
+
+@collector("citytrotter_cache_misses_total", "Cache misses", "counter", ("cache",))
+def _cache_misses():
+    return [((cache.name,), cache.misses) for cache in _CACHES]
+
+
+@collector("citytrotter_cache_hit_ratio", "Cache hits per lookup since the cache was last cleared", "gauge", ("cache",))
+def _cache_hit_ratio():
+    return [((cache.name,), cache.stats()["hit_ratio"]) for cache in _CACHES]
+
+
+@collector("citytrotter_cache_entries", "Entries currently cached", "gauge", ("cache",))
+def _cache_entries():
+    return [((cache.name,), len(cache)) for cache in _CACHES]
+
+
+class DiskStore:
+    """
+    JSON-file backing store that survives restarts, one file per key
+    Keys must be filesystem-safe (e.g. hex digests).
+    """
+
+    def __init__(self, directory: str, ttl_seconds: float = None):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str):
+        """Return the stored value for key, or None if missing or expired"""
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if self.ttl_seconds and time.time() - entry["stored_at"] > self.ttl_seconds:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        return entry["value"]
+
+    def set(self, key: str, value):
+        """Persist a JSON-serializable value, replacing the file atomically"""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"stored_at": time.time(), "value": value}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Disk cache write failed for {path}: {str(e)}")
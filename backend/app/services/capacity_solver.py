@@ -0,0 +1,149 @@
+"""
+Max-capacity solver: the largest program a site takes before its first bottleneck
+Every unit-driven check is monotone in units (more units never lowers school
+enrollment, intersection volume or utility demand), so the largest passing
+unit count of each school, intersection and utility is found with one
+bisection over integer unit counts, vectorized across all of them at once.
+Each step applies the same comparison as the analyzer it mirrors, so the
+answer agrees exactly with a full analysis at max_units and max_units + 1.
+Zoning limits height only, so stories are solved directly from it.
+"""
+
+import numpy as np
+
+from app.config import settings
+from app.services import school_analyzer, traffic_calculator, zoning_checker
+from app.services.infrastructure_analyzer import (
+    SEWER_LINE_THRESHOLD,
+    SUBSTATION_THRESHOLD,
+    WATER_MAIN_THRESHOLD,
+    infrastructure_demands
+)
+
+UTILITIES = ["Water main", "Sewer line", "Electrical service"]
+UTILITY_THRESHOLDS = np.array([WATER_MAIN_THRESHOLD, SEWER_LINE_THRESHOLD, SUBSTATION_THRESHOLD])
+
+
+def max_passing_units(passes, count, upper):
+    """
+    Largest unit count in [0, upper] passing each of count monotone checks
+    passes(units): bool array (one per check) for an array of unit counts
+    Returns an int array: -1 where a check fails with no units at all, upper
+    where it still passes at upper
+    """
+    lo = np.full(count, -1, dtype=np.int64)  # largest count known to pass
+    hi = np.full(count, upper + 1, dtype=np.int64)  # smallest count known to fail
+    while count and (hi - lo > 1).any():
+        mid = (lo + hi) // 2
+        ok = passes(mid)
+        lo = np.where(ok, mid, lo)
+        hi = np.where(ok, hi, mid)
+    return lo
+
+
+def school_limits(location, upper):
+    """(school names, largest units keeping each nearby school at or under 100% capacity)"""
+    dataset = school_analyzer.get_schools_dataset()
+    indices, _ = dataset.within_radius(location.lat, location.lng, school_analyzer.SCHOOL_RADIUS_M)
+    enrollment = dataset.records["enrollment"][indices]
+    capacity = dataset.records["capacity"][indices]
+    shares = dataset.grade_shares[indices]
+
+    def passes(units):
+        new_students = units * settings.STUDENTS_PER_UNIT * shares
+        return ((enrollment + new_students) / capacity) * 100 <= 100
+
+    return dataset.records["name"][indices].tolist(), max_passing_units(passes, len(indices), upper)
+
+
+def traffic_limits(location, upper):
+    """
+    (intersection names, largest units leaving each intersection's LOS grade
+    unchanged, assignment method)
+    """
+    dataset = traffic_calculator.get_intersections_dataset()
+    assigned = traffic_calculator.assign_site_trips(dataset, [location.lat], [location.lng])
+    # Each intersection gets a fixed share of the site's peak hour trips
+    if assigned and assigned[0] is not None:
+        indices, factors = assigned[0]
+        method = "road_network"
+    else:
+        indices, distances = dataset.within_radius(location.lat, location.lng, traffic_calculator.TRAFFIC_RADIUS_M)
+        factors = traffic_calculator.decay_factors(distances)
+        method = "distance_decay"
+    current_volume = dataset.current_volume[indices]
+    current_level = dataset.current_los_level[indices]
+
+    def passes(units):
+        volumes = current_volume + traffic_calculator.peak_hour_trips_many(units) * factors
+        return traffic_calculator.los_levels(volumes) <= current_level
+
+    names = [dataset.records[i]["name"] for i in indices]
+    return names, max_passing_units(passes, len(indices), upper), method
+
+
+def infrastructure_limits(upper):
+    """Largest units keeping water, sewer and power demand under their upgrade thresholds"""
+    def passes(units):
+        demands = np.stack(infrastructure_demands(units.astype(np.float64)))
+        return np.diagonal(demands) <= UTILITY_THRESHOLDS
+
+    return max_passing_units(passes, len(UTILITIES), upper)
+
+
+def tightest(constraint_type, names, limits, upper):
+    """Constraint entry for the name with the lowest unit limit, or None if nothing binds"""
+    if len(limits) == 0 or limits.min() >= upper:
+        return None
+    i = int(np.argmin(limits))
+    return {
+        "type": constraint_type,
+        "name": names[i],
+        "max_units": max(int(limits[i]), 0),
+        "exceeded_without_building": bool(limits[i] < 0)
+    }
+
+
+def solve_capacity(location, max_units=None):
+    """
+    Largest unit and story counts a site takes without a bottleneck
+    max_units: search ceiling (default CAPACITY_MAX_UNITS); a program that
+    passes every check at the ceiling has no binding unit constraint
+    Returns dict with max_units, max_stories, the binding constraint and the
+    tightest limit of each constraint type
+    """
+    upper = max_units or settings.CAPACITY_MAX_UNITS
+
+    school_names, school_units = school_limits(location, upper)
+    intersection_names, intersection_units, method = traffic_limits(location, upper)
+    utility_units = infrastructure_limits(upper)
+    constraints = [
+        entry for entry in (
+            tightest("SCHOOL_CAPACITY", school_names, school_units, upper),
+            tightest("TRAFFIC", intersection_names, intersection_units, upper),
+            tightest("INFRASTRUCTURE", UTILITIES, utility_units, upper),
+        )
+        if entry is not None
+    ]
+    constraints.sort(key=lambda entry: entry["max_units"])
+
+    zoning = zoning_checker.get_zoning_index()
+    district = zoning.lookup(location.lat, location.lng)
+    max_height = district["max_height"]
+    max_stories = None if max_height is None else int(max_height // zoning_checker.STORY_HEIGHT_FT)
+
+    return {
+        "location": {"lat": location.lat, "lng": location.lng},
+        "max_units": constraints[0]["max_units"] if constraints else upper,
+        "max_stories": max_stories,
+        "binding_constraint": constraints[0] if constraints else None,
+        "constraints": constraints,
+        "zoning": {
+            "zone": district["zone"],
+            "max_height": max_height,
+            "max_far": district["max_far"],
+            "data_source": zoning.source
+        },
+        "traffic_assignment_method": method,
+        "units_searched_up_to": upper
+    }
@@ -0,0 +1,141 @@
+"""
+Memory-mappable columnar datasets
+A table is a directory with one .npy file per column plus meta.json. Columns
+are typed arrays (fixed-width strings for text, small integer codes for
+categorical fields), opened with mmap so every worker process shares the
+same pages through the OS page cache instead of holding its own copy.
+Tables are written to a version-named directory derived from the source
+file's content, so a stale table is never read and concurrent writers
+cannot clobber each other.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+META_FILE = "meta.json"
+
+
+class ColumnTable:
+    """
+    Read-only table of equal-length column arrays
+    Hot paths use the arrays directly (table["enrollment"]); indexing a row
+    (table[i]) or iterating yields plain dicts with categorical codes decoded.
+    """
+
+    def __init__(self, columns, categories=None, version=None, path=None):
+        self.columns = columns
+        self.categories = categories or {}
+        self.version = version
+        self.path = path
+        self._length = len(next(iter(columns.values()))) if columns else 0
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.columns[key]
+        return {name: self._value(name, column[key]) for name, column in self.columns.items()}
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield self[i]
+
+    def _value(self, name, value):
+        """Plain Python value for one cell"""
+        if name in self.categories:
+            return self.categories[name][int(value)]
+        return value.item()
+
+    def codes(self, name, mapping, default=None):
+        """Map a categorical column's labels through `mapping` as an array indexed by code"""
+        return np.array([mapping.get(label, default) for label in self.categories[name]])
+
+
+def file_version(path):
+    """Short content hash of a source file, used as the table version"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def records_to_columns(records, schema):
+    """
+    Typed column arrays from a list of dicts
+    schema maps column name -> numpy dtype, or "category" for an int8-coded
+    label column. Returns: (columns, categories)
+    """
+    columns, categories = {}, {}
+    for name, dtype in schema.items():
+        values = [record[name] for record in records]
+        if dtype == "category":
+            labels = sorted(set(values))
+            lookup = {label: code for code, label in enumerate(labels)}
+            columns[name] = np.array([lookup[v] for v in values], dtype=np.int8)
+            categories[name] = labels
+        elif dtype == "str":
+            width = max((len(v) for v in values), default=1)
+            columns[name] = np.array(values, dtype=f"<U{max(width, 1)}")
+        else:
+            columns[name] = np.array(values, dtype=dtype)
+    return columns, categories
+
+
+def write_table(base_dir, version, columns, categories, source=None):
+    """
+    Write a table to base_dir/version atomically (a complete temp directory
+    is renamed into place; if another process got there first, theirs wins)
+    Returns the table directory
+    """
+    table_dir = os.path.join(base_dir, version)
+    if os.path.exists(os.path.join(table_dir, META_FILE)):
+        return table_dir
+
+    os.makedirs(base_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=f".{version}.", dir=base_dir)
+    try:
+        for name, array in columns.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(array))
+        with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+            json.dump({
+                "version": version,
+                "source": source,
+                "rows": len(next(iter(columns.values()))) if columns else 0,
+                "columns": list(columns),
+                "categories": categories
+            }, f, indent=2)
+        os.rename(tmp_dir, table_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.exists(os.path.join(table_dir, META_FILE)):
+            raise
+    return table_dir
+
+
+def read_table(table_dir, mmap=True):
+    """Open a table written by write_table, memory-mapping every column"""
+    with open(os.path.join(table_dir, META_FILE), "r") as f:
+        meta = json.load(f)
+    columns = {
+        name: np.load(os.path.join(table_dir, f"{name}.npy"), mmap_mode="r" if mmap else None)
+        for name in meta["columns"]
+    }
+    return ColumnTable(columns, meta["categories"], version=meta["version"], path=table_dir)
+
+
+def prune_tables(base_dir, keep_version):
+    """Remove table versions other than keep_version"""
+    try:
+        entries = os.listdir(base_dir)
+    except OSError:
+        return
+    for entry in entries:
+        if entry != keep_version and not entry.startswith("."):
+            shutil.rmtree(os.path.join(base_dir, entry), ignore_errors=True)
@@ -0,0 +1,224 @@
+"""
+Reference dataset registry
+Stations, intersections, schools and zoning districts are loaded once from
+versioned files under REFERENCE_DATA_DIR (default: app/data), and their
+derived structures (coordinate arrays, spatial indexes) are built at load.
+Each file is versioned by its content hash. When a file changes on disk, the
+first access after DATASET_RELOAD_CHECK_SECONDS rebuilds it and swaps the new
+snapshot in atomically, so workers pick up new data without a restart.
+Callers that already hold the old snapshot finish their request with it.
+"""
+
+from dataclasses import dataclass, replace
+from datetime import datetime
+import os
+import threading
+import time
+
+from app.config import settings
+from app.services.columnar import file_version
+from app.services.metrics import collector
+
+DEFAULT_DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '../data'))
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """One loaded version of a dataset"""
+    name: str
+    value: object
+    version: str
+    path: str
+    mtime_ns: int
+    size: int
+    loaded_at: datetime
+    load_seconds: float = 0.0
+
+
+class DatasetRegistry:
+    """
+    Named datasets, each built from one file by a builder(path, version)
+    callable. Reload listeners (callback(name)) run after a swap so dependent
+    caches can be dropped.
+    """
+
+    def __init__(self):
+        self._builders = {}     # name -> (filename, builder, optional)
+        self._snapshots = {}    # name -> Snapshot (replaced, never mutated)
+        self._checked_at = {}   # name -> monotonic time of the last file check
+        self._failed = {}       # name -> (path, mtime_ns, size) of a file that failed to build
+        self._locks = {}
+        self._listeners = []
+        # Bumped on every swap; caches of derived results include it in their keys
+        self.generation = 0
+
+    def register(self, name, filename, builder, optional=False):
+        """
+        Register a dataset built from filename (relative to the data dir)
+        An optional dataset whose file is missing loads as None (version None),
+        and is picked up once the file appears.
+        """
+        self._builders[name] = (filename, builder, optional)
+        self._locks[name] = threading.Lock()
+
+    def on_reload(self, callback):
+        """Call callback(name) whenever a dataset is swapped for a new version"""
+        self._listeners.append(callback)
+
+    def path(self, name):
+        """Current file path of a dataset"""
+        filename = self._builders[name][0]
+        return os.path.join(settings.REFERENCE_DATA_DIR or DEFAULT_DATA_DIR, filename)
+
+    def get(self, name):
+        """The current value of a dataset, loading or reloading it if needed"""
+        return self.snapshot(name).value
+
+    def snapshot(self, name):
+        """The current Snapshot of a dataset"""
+        snapshot = self._snapshots.get(name)
+        if snapshot is None:
+            return self._load_first(name)
+
+        interval = settings.DATASET_RELOAD_CHECK_SECONDS
+        if interval >= 0 and time.monotonic() - self._checked_at.get(name, 0) >= interval:
+            self._checked_at[name] = time.monotonic()
+            self._reload_if_changed(name, snapshot, blocking=False)
+        return self._snapshots[name]
+
+    def check(self):
+        """Run the interval change check on every loaded dataset (cheap between checks)"""
+        for name in list(self._snapshots):
+            self.snapshot(name)
+
+    def reload(self, name=None):
+        """Check one dataset (or all loaded ones) for changes now"""
+        names = [name] if name else list(self._snapshots)
+        for dataset_name in names:
+            snapshot = self._snapshots.get(dataset_name)
+            if snapshot is None:
+                self._load_first(dataset_name)
+            else:
+                self._reload_if_changed(dataset_name, snapshot, blocking=True)
+
+    def versions(self):
+        """Version and load time of every loaded dataset"""
+        return {
+            name: {
+                "version": snapshot.version,
+                "path": snapshot.path,
+                "loaded_at": snapshot.loaded_at.isoformat(),
+                "load_ms": round(snapshot.load_seconds * 1000, 2),
+                "size_bytes": snapshot.size,
+                "count": len(snapshot.value) if hasattr(snapshot.value, "__len__") else None
+            }
+            for name, snapshot in self._snapshots.items()
+        }
+
+    def _load_first(self, name):
+        with self._locks[name]:
+            snapshot = self._snapshots.get(name)
+            if snapshot is None:
+                snapshot = self._build(name)
+                self._snapshots[name] = snapshot
+                self._checked_at[name] = time.monotonic()
+        return snapshot
+
+    def _reload_if_changed(self, name, current, blocking):
+        path = self.path(name)
+        try:
+            stat = os.stat(path)
+            file_state = (path, stat.st_mtime_ns, stat.st_size)
+        except OSError as e:
+            if not self._builders[name][2]:
+                print(f"Dataset {name}: cannot stat {path}: {str(e)}")
+                return
+            file_state = (path, 0, 0)
+        if file_state == (current.path, current.mtime_ns, current.size) or file_state == self._failed.get(name):
+            return
+
+        # One rebuild at a time; other requests keep serving the current snapshot
+        lock = self._locks[name]
+        if not lock.acquire(blocking=blocking):
+            return
+        try:
+            current = self._snapshots[name]
+            try:
+                version = file_version(path) if file_state[1:] != (0, 0) else None
+                if version == current.version:
+                    # Touched but identical: keep the built structures, note the new stat
+                    self._snapshots[name] = replace(
+                        current, path=path, mtime_ns=file_state[1], size=file_state[2]
+                    )
+                    return
+                snapshot = self._build(name)
+            except Exception as e:
+                # A half-written or invalid file never replaces good data; it is
+                # retried once the file changes again
+                self._failed[name] = file_state
+                print(f"Dataset {name}: reload from {path} failed, keeping {current.version}: {str(e)}")
+                return
+            self._failed.pop(name, None)
+            self._snapshots[name] = snapshot
+            self.generation += 1
+        finally:
+            lock.release()
+
+        print(f"✅ Reloaded {name} dataset {current.version} -> {snapshot.version}")
+        for listener in self._listeners:
+            try:
+                listener(name)
+            except Exception as e:
+                print(f"Dataset reload listener failed for {name}: {str(e)}")
+
+    def _build(self, name):
+        _, builder, optional = self._builders[name]
+        path = self.path(name)
+        if optional and not os.path.exists(path):
+            return Snapshot(
+                name=name, value=None, version=None, path=path,
+                mtime_ns=0, size=0, loaded_at=datetime.now()
+            )
+
+        start = time.perf_counter()
+        stat = os.stat(path)
+        version = file_version(path)
+        value = builder(path, version)
+        return Snapshot(
+            name=name,
+            value=value,
+            version=version,
+            path=path,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            loaded_at=datetime.now(),
+            load_seconds=time.perf_counter() - start
+        )
+
+
+registry = DatasetRegistry()
+
+
+@collector("citytrotter_dataset_info", "Loaded version of each reference dataset", "gauge", ("dataset", "version"))
+def _dataset_info():
+    return [((name, info["version"]), 1) for name, info in registry.versions().items()]
+
+
+@collector("citytrotter_dataset_load_seconds", "Time to build the current version of each dataset", "gauge", ("dataset",))
+def _dataset_load_seconds():
+    return [((name,), info["load_ms"] / 1000) for name, info in registry.versions().items()]
+
+
+@collector("citytrotter_dataset_file_bytes", "Size of each dataset's source file", "gauge", ("dataset",))
+def _dataset_file_bytes():
+    return [((name,), info["size_bytes"]) for name, info in registry.versions().items()]
+
+
+@collector("citytrotter_dataset_records", "Records in each loaded dataset", "gauge", ("dataset",))
+def _dataset_records():
+    return [((name,), info["count"]) for name, info in registry.versions().items()]
+
+
+@collector("citytrotter_dataset_generation", "Dataset swaps since startup", "counter")
+def _dataset_generation():
+    return [((), registry.generation)]
@@ -1,23 +1,4 @@
-import math
-
-
-def calculate_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
-    """
-    Calculate distance between two points using Haversine formula
-    Returns: Distance in meters
-    """
-    R = 6371000  # Earth radius in meters
-    
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lng2 - lng1)
-    
-    a = (math.sin(delta_phi / 2) ** 2 +
-         math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2)
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    
-    return R * c
+from app.services.geo import calculate_distance
 
 
 def analyze_economic_impact(location, units, stories):
@@ -25,19 +6,25 @@ def analyze_economic_impact(location, units, stories):
     Calculate economic impact with location-based property values
     Property values vary by distance from downtown
     """
-    # Downtown Atlanta (Five Points)
+    return build_economic_impact(downtown_distance_km(location), units)
+
+
+def downtown_distance_km(location):
+    """Distance from downtown Atlanta (Five Points) in km"""
     downtown_lat, downtown_lng = 33.7590, -84.3880
     
-    # Calculate distance from downtown
     distance_from_downtown = calculate_distance(
         location.lat, location.lng,
         downtown_lat, downtown_lng
     )
-    
+    return distance_from_downtown / 1000
+
+
+def build_economic_impact(distance_km, units):
+    """Economic impact of a building distance_km from downtown"""
     # Property value decreases with distance from downtown
     # Downtown: $350k/unit, Suburbs: $200k/unit
     # Formula: Base $350k - $15k per km from downtown, min $180k
-    distance_km = distance_from_downtown / 1000
     base_value_per_unit = max(180000, 350000 - (distance_km * 15000))
     
     total_property_value = units * base_value_per_unit
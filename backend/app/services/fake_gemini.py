@@ -0,0 +1,56 @@
+"""
+Local stand-in for the Gemini model
+Enabled with GEMINI_FAKE=True (or gemini_service.set_model) so streaming,
+caching and load tests run without network access or an API key.
+"""
+
+import hashlib
+import time
+
+
+class FakeChunk:
+    """One streamed piece of a fake response"""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """
+    Mimics GenerativeModel.generate_content for both blocking and stream=True
+    calls, sleeping to simulate network latency
+    """
+
+    def __init__(self, latency_seconds: float = 0.5, chunk_count: int = 8):
+        self.latency_seconds = latency_seconds
+        self.chunk_count = chunk_count
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        text = self.render(prompt)
+        if stream:
+            return self._stream(text)
+        time.sleep(self.latency_seconds)
+        return FakeChunk(text)
+
+    def render(self, prompt):
+        """Deterministic report text derived from the prompt"""
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        facts = [line.strip() for line in prompt.splitlines() if line.strip().startswith("- ")][:6]
+        return (
+            "**Executive Summary**\n\n"
+            f"Local fake Gemini report ({digest}).\n\n"
+            "**Critical Issues**\n\n"
+            + "\n".join(facts) + "\n\n"
+            "**Recommendations**\n\n"
+            "1. Replace GEMINI_FAKE with a real API key for production reports.\n"
+        )
+
+    def _stream(self, text):
+        """Yield the text in roughly equal chunks spread over the latency"""
+        size = max(1, -(-len(text) // self.chunk_count))
+        delay = self.latency_seconds / self.chunk_count
+        for start in range(0, len(text), size):
+            time.sleep(delay)
+            yield FakeChunk(text[start:start + size])
@@ -1,37 +1,250 @@
 from app.config import settings
+from app.services.cache import LRUCache, DiskStore
+from app.services.fake_gemini import FakeGenerativeModel
+from app.services.metrics import AI_REPORT_SECONDS, GEMINI_REQUESTS
+from app.services.single_flight import SingleFlight
 from datetime import datetime
+import asyncio
+import hashlib
+import math
+import time
+
+
+GEMINI_MODEL_NAME = 'gemini-2.0-flash-exp'  # ✅ UPDATED to latest model
+
+_MODEL = None
+
+# Successful Gemini reports keyed by report_cache_key()
+_REPORT_CACHE = LRUCache(
+    settings.REPORT_CACHE_SIZE, settings.REPORT_CACHE_TTL_SECONDS, name="ai_reports"
+)
+_REPORT_DISK_STORE = (
+    DiskStore(settings.REPORT_CACHE_DIR, settings.REPORT_CACHE_TTL_SECONDS)
+    if settings.REPORT_CACHE_DIR else None
+)
+# Gemini calls in flight, keyed like the report cache
+_REPORT_FLIGHTS = SingleFlight("ai_reports")
+
+
+def get_model():
+    """Configure the Gemini client once and reuse the model across requests"""
+    global _MODEL
+    
+    if _MODEL is None:
+        if settings.GEMINI_FAKE:
+            _MODEL = FakeGenerativeModel(settings.GEMINI_FAKE_LATENCY_SECONDS)
+        else:
+            import google.generativeai as genai
+            
+            genai.configure(api_key=settings.GEMINI_API_KEY)
+            _MODEL = genai.GenerativeModel(GEMINI_MODEL_NAME)
+    
+    return _MODEL
+
+
+def set_model(model):
+    """Install a model object (e.g. FakeGenerativeModel), or None to reset"""
+    global _MODEL
+    _MODEL = model
+
+
+def gemini_configured():
+    """True when reports should come from a model rather than the template"""
+    return bool(settings.GEMINI_API_KEY) or settings.GEMINI_FAKE or _MODEL is not None
+
+
+def report_cache_key(analysis_data):
+    """
+    Stable hash of the Gemini prompt for an analysis
+    Coordinates are rounded first (and dollar figures, which vary continuously
+    with distance from downtown, to 3 significant digits) so near-identical
+    sites share a report.
+    """
+    building = dict(analysis_data["building"])
+    building["location"] = {
+        "lat": round(building["location"]["lat"], settings.REPORT_CACHE_COORD_DECIMALS),
+        "lng": round(building["location"]["lng"], settings.REPORT_CACHE_COORD_DECIMALS)
+    }
+    economic = dict(analysis_data["economic_impact"])
+    for key in ("annual_tax_revenue", "infrastructure_cost"):
+        economic[key] = round_significant(economic[key], 3)
+    
+    prompt = create_analysis_prompt({**analysis_data, "building": building, "economic_impact": economic})
+    return hashlib.sha256(f"{GEMINI_MODEL_NAME}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+def round_significant(value, digits):
+    """Round a number to the given count of significant digits"""
+    if not value:
+        return value
+    return round(value, digits - 1 - int(math.floor(math.log10(abs(value)))))
+
+
+def get_cached_report(cache_key):
+    """Look up a report in memory, then on disk (promoting disk hits)"""
+    report = _REPORT_CACHE.get(cache_key)
+    if report is None and _REPORT_DISK_STORE is not None:
+        stored = _REPORT_DISK_STORE.get(cache_key)
+        if stored is not None:
+            report = {
+                "ai_summary": stored["ai_summary"],
+                "timestamp": datetime.fromisoformat(stored["timestamp"])
+            }
+            _REPORT_CACHE.set(cache_key, report)
+    return report
+
+
+def store_cached_report(cache_key, report):
+    """Write a report through to memory and, if configured, disk"""
+    _REPORT_CACHE.set(cache_key, report)
+    if _REPORT_DISK_STORE is not None:
+        _REPORT_DISK_STORE.set(cache_key, {
+            "ai_summary": report["ai_summary"],
+            "timestamp": report["timestamp"].isoformat()
+        })
+
+
+def report_cache_stats():
+    """Hit/miss counters for the report cache"""
+    stats = _REPORT_CACHE.stats()
+    stats["disk_store"] = settings.REPORT_CACHE_DIR or None
+    return stats
 
 
 async def generate_planning_report(analysis_data):
     """Generate AI-enhanced planning report using Google Gemini"""
     
+    start = time.perf_counter()
+    
     # Check if Gemini API key is configured
-    if not settings.GEMINI_API_KEY:
-        return {
+    if not gemini_configured():
+        report = {
             "ai_summary": generate_template_report(analysis_data),
             "timestamp": datetime.now()
         }
+        AI_REPORT_SECONDS.observe(time.perf_counter() - start, source="template")
+        return report
     
     try:
-        import google.generativeai as genai
+        cache_key = report_cache_key(analysis_data)
+        cached = get_cached_report(cache_key)
+        if cached is not None:
+            AI_REPORT_SECONDS.observe(time.perf_counter() - start, source="cache")
+            return {**cached, "cached": True}
         
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')  # ✅ UPDATED to latest model
-        
-        prompt = create_analysis_prompt(analysis_data)
-        response = model.generate_content(prompt)
-        
-        return {
-            "ai_summary": response.text,
-            "timestamp": datetime.now()
-        }
+        # Concurrent requests for the same report share one Gemini call
+        report = await _REPORT_FLIGHTS.run(cache_key, request_report, cache_key, analysis_data)
+        AI_REPORT_SECONDS.observe(time.perf_counter() - start, source="gemini")
+        return dict(report)
         
     except Exception as e:
         print(f"Gemini API error: {str(e)}")
-        return {
+        report = {
             "ai_summary": generate_template_report(analysis_data),
             "timestamp": datetime.now()
         }
+        AI_REPORT_SECONDS.observe(time.perf_counter() - start, source="fallback")
+        return report
+
+
+async def request_report(cache_key, analysis_data):
+    """One Gemini call for an analysis, cached on success"""
+    model = get_model()
+    
+    prompt = create_analysis_prompt(analysis_data)
+    try:
+        # generate_content blocks on network I/O, keep it off the event loop
+        response = await asyncio.to_thread(model.generate_content, prompt)
+    except Exception:
+        GEMINI_REQUESTS.inc(outcome="error")
+        raise
+    
+    report = {
+        "ai_summary": response.text,
+        "timestamp": datetime.now()
+    }
+    # Only real Gemini output is cached, never the template fallback
+    store_cached_report(cache_key, report)
+    GEMINI_REQUESTS.inc(outcome="success")
+    return report
+
+
+async def stream_planning_report(analysis_data):
+    """
+    Stream the planning report text as the model generates it
+    Yields text chunks. Falls back to a chunked template report when Gemini
+    is not configured or fails before producing any output.
+    """
+    start = time.perf_counter()
+    if not gemini_configured():
+        for chunk in iter_template_chunks(analysis_data):
+            yield chunk
+        AI_REPORT_SECONDS.observe(time.perf_counter() - start, source="template")
+        return
+    
+    parts = []
+    try:
+        cache_key = report_cache_key(analysis_data)
+        cached = get_cached_report(cache_key)
+        if cached is not None:
+            yield cached["ai_summary"]
+            AI_REPORT_SECONDS.observe(time.perf_counter() - start, source="cache")
+            return
+        
+        async for text in stream_model_output(create_analysis_prompt(analysis_data)):
+            parts.append(text)
+            yield text
+        
+    except Exception as e:
+        print(f"Gemini API error: {str(e)}")
+        GEMINI_REQUESTS.inc(outcome="error")
+        if not parts:
+            for chunk in iter_template_chunks(analysis_data):
+                yield chunk
+        AI_REPORT_SECONDS.observe(time.perf_counter() - start, source="fallback")
+        return
+    
+    store_cached_report(cache_key, {
+        "ai_summary": "".join(parts),
+        "timestamp": datetime.now()
+    })
+    GEMINI_REQUESTS.inc(outcome="success")
+    AI_REPORT_SECONDS.observe(time.perf_counter() - start, source="gemini")
+
+
+async def stream_model_output(prompt):
+    """
+    Bridge the blocking streamed generate_content iterator onto the event loop
+    Raises asyncio.TimeoutError if the model goes quiet for longer than
+    AI_REPORT_TIMEOUT_SECONDS.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    finished = object()
+    
+    def produce():
+        try:
+            for chunk in get_model().generate_content(prompt, stream=True):
+                loop.call_soon_threadsafe(queue.put_nowait, chunk.text)
+            loop.call_soon_threadsafe(queue.put_nowait, finished)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+    
+    loop.run_in_executor(None, produce)
+    while True:
+        item = await asyncio.wait_for(queue.get(), timeout=settings.AI_REPORT_TIMEOUT_SECONDS)
+        if item is finished:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def iter_template_chunks(data):
+    """Split the template report into paragraph-sized chunks for streaming"""
+    paragraphs = generate_template_report(data).split("\n\n")
+    for i, paragraph in enumerate(paragraphs):
+        yield paragraph if i == len(paragraphs) - 1 else paragraph + "\n\n"
 
 
 def create_analysis_prompt(data):
@@ -55,7 +268,7 @@ PROPOSED DEVELOPMENT:
 ANALYSIS RESULTS:
 
 Zoning: {"✓ Compliant" if zoning["compliant"] else "✗ Violations: " + ", ".join(zoning["violations"])}
-Zone: {zoning["zone"]}
+Zone: {zoning["zone"]}{" (synthetic sample district data, not official zoning)" if zoning.get("data_source") == "synthetic_sample" else ""}
 
 School Impact:
 - New students: {school["students_generated"]:.0f}
@@ -0,0 +1,198 @@
+"""
+Vectorized geodesic distance and proximity queries shared by all analyzers
+"""
+
+import math
+import numpy as np
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_M = 6371000  # Earth radius in meters
+
+
+def calculate_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """
+    Calculate distance between two points using Haversine formula
+    Returns: Distance in meters
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    delta_phi = math.radians(lat2 - lat1)
+    delta_lambda = math.radians(lng2 - lng1)
+
+    a = (math.sin(delta_phi / 2) ** 2 +
+         math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2)
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    return EARTH_RADIUS_M * c
+
+
+def unit_vectors(lats, lngs) -> np.ndarray:
+    """
+    Project lat/lng onto the unit sphere as (x, y, z) rows
+    Straight-line (chord) distance between unit vectors is monotone in
+    great-circle distance, so a Euclidean KD-tree answers geodesic queries.
+    """
+    phi = np.radians(np.asarray(lats, dtype=np.float64))
+    lam = np.radians(np.asarray(lngs, dtype=np.float64))
+    cos_phi = np.cos(phi)
+    return np.column_stack((cos_phi * np.cos(lam), cos_phi * np.sin(lam), np.sin(phi)))
+
+
+def chord_length(distance_m: float) -> float:
+    """Unit-sphere chord length spanning a great-circle distance in meters"""
+    return 2 * math.sin(min(distance_m / EARTH_RADIUS_M, math.pi) / 2)
+
+
+def haversine_pairs(lats, lngs, ref_lats, ref_lngs) -> np.ndarray:
+    """Haversine distance between paired points, element-wise, in meters"""
+    phi1 = np.radians(np.asarray(lats, dtype=np.float64))
+    lam1 = np.radians(np.asarray(lngs, dtype=np.float64))
+    phi2 = np.radians(np.asarray(ref_lats, dtype=np.float64))
+    lam2 = np.radians(np.asarray(ref_lngs, dtype=np.float64))
+
+    a = (np.sin((phi2 - phi1) / 2) ** 2 +
+         np.cos(phi1) * np.cos(phi2) * np.sin((lam2 - lam1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def haversine_matrix(lats, lngs, ref_lats, ref_lngs) -> np.ndarray:
+    """
+    Haversine distance from every query point to every reference point
+    Returns: (len(lats), len(ref_lats)) array of distances in meters
+    """
+    phi1 = np.radians(np.asarray(lats, dtype=np.float64))[:, None]
+    lam1 = np.radians(np.asarray(lngs, dtype=np.float64))[:, None]
+    phi2 = np.radians(np.asarray(ref_lats, dtype=np.float64))[None, :]
+    lam2 = np.radians(np.asarray(ref_lngs, dtype=np.float64))[None, :]
+
+    a = (np.sin((phi2 - phi1) / 2) ** 2 +
+         np.cos(phi1) * np.cos(phi2) * np.sin((lam2 - lam1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+class PointDataset:
+    """
+    Reference point features (schools, stations, intersections) held as
+    contiguous coordinate arrays with a KD-tree spatial index built once.
+    Radius and k-nearest queries touch only nearby features; distances are
+    then computed exactly with haversine. Query results are feature indices
+    into `records` plus distances in meters.
+    """
+
+    def __init__(self, records, name: str = "dataset", lats=None, lngs=None):
+        self.name = name
+        if lats is None or lngs is None:
+            self.records = list(records)
+            lats = [r["lat"] for r in self.records]
+            lngs = [r["lng"] for r in self.records]
+        else:
+            # Columnar records (e.g. a ColumnTable) with coordinate arrays
+            self.records = records
+        self.lats = np.ascontiguousarray(lats, dtype=np.float64)
+        self.lngs = np.ascontiguousarray(lngs, dtype=np.float64)
+
+        # Precomputed trigonometric terms reused by full distance matrices
+        self._phi = np.radians(self.lats)
+        self._lam = np.radians(self.lngs)
+        self._cos_phi = np.cos(self._phi)
+
+        self._tree = cKDTree(unit_vectors(self.lats, self.lngs)) if len(self.lats) else None
+
+    def __len__(self):
+        return len(self.lats)
+
+    def distance_matrix(self, lats, lngs) -> np.ndarray:
+        """Distance from each query point to every feature, shape (Q, N)"""
+        phi1 = np.radians(np.asarray(lats, dtype=np.float64))[:, None]
+        lam1 = np.radians(np.asarray(lngs, dtype=np.float64))[:, None]
+
+        a = (np.sin((self._phi - phi1) / 2) ** 2 +
+             np.cos(phi1) * self._cos_phi * np.sin((self._lam - lam1) / 2) ** 2)
+        return 2 * EARTH_RADIUS_M * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    def distances_from(self, lat: float, lng: float) -> np.ndarray:
+        """Distance from one point to every feature, shape (N,)"""
+        return self.distance_matrix([lat], [lng])[0]
+
+    def within_radius(self, lat: float, lng: float, radius_m: float):
+        """
+        Features within radius_m of one point, nearest first
+        Returns: (indices, distances)
+        """
+        return self.within_radius_many([lat], [lng], radius_m)[0]
+
+    def within_radius_many(self, lats, lngs, radius_m: float):
+        """
+        Features within radius_m of each query point, nearest first
+        Returns: list of (indices, distances), one per query point
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        rows, cols, hits = self.within_radius_pairs(lats, lngs, radius_m)
+        bounds = np.searchsorted(rows, np.arange(len(lats) + 1))
+        return [
+            (cols[start:end], hits[start:end])
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+
+    def within_radius_pairs(self, lats, lngs, radius_m: float):
+        """
+        Every (query point, feature) pair within radius_m, as flat arrays
+        sorted by query row and then distance (nearest first)
+        Returns: (rows, feature indices, distances)
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lngs = np.atleast_1d(np.asarray(lngs, dtype=np.float64))
+        empty = (np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp), np.empty(0))
+        if self._tree is None or len(lats) == 0:
+            return empty
+
+        # Slightly widen the chord so boundary features survive float error,
+        # the exact haversine filter below trims anything outside the radius
+        candidates = self._tree.query_ball_point(
+            unit_vectors(lats, lngs), chord_length(radius_m) * (1 + 1e-9)
+        )
+        counts = np.fromiter((len(c) for c in candidates), dtype=np.intp, count=len(candidates))
+        if counts.sum() == 0:
+            return empty
+
+        rows = np.repeat(np.arange(len(lats)), counts)
+        cols = np.fromiter((i for c in candidates for i in c), dtype=np.intp, count=int(counts.sum()))
+        hits = haversine_pairs(lats[rows], lngs[rows], self.lats[cols], self.lngs[cols])
+
+        keep = hits <= radius_m
+        rows, cols, hits = rows[keep], cols[keep], hits[keep]
+
+        # Group hits by query row, nearest first within each row
+        order = np.lexsort((hits, rows))
+        return rows[order], cols[order], hits[order]
+
+    def k_nearest(self, lat: float, lng: float, k: int):
+        """
+        The k nearest features to one point, nearest first
+        Returns: (indices, distances)
+        """
+        indices, distances = self.k_nearest_many([lat], [lng], k)
+        return indices[0], distances[0]
+
+    def k_nearest_many(self, lats, lngs, k: int):
+        """
+        The k nearest features to each query point, nearest first
+        Returns: (indices, distances) arrays of shape (Q, k)
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lngs = np.atleast_1d(np.asarray(lngs, dtype=np.float64))
+        k = min(k, len(self))
+        if k <= 0 or len(lats) == 0:
+            return np.empty((len(lats), max(k, 0)), dtype=np.intp), np.empty((len(lats), max(k, 0)))
+
+        _, indices = self._tree.query(unit_vectors(lats, lngs), k=k)
+        indices = np.asarray(indices, dtype=np.intp).reshape(len(lats), k)
+
+        # Exact haversine for the selected features, re-sorted so ordering
+        # matches the distances reported to callers
+        distances = haversine_pairs(
+            np.repeat(lats, k), np.repeat(lngs, k),
+            self.lats[indices.ravel()], self.lngs[indices.ravel()]
+        ).reshape(len(lats), k)
+        order = np.argsort(distances, axis=1, kind="stable")
+        return np.take_along_axis(indices, order, axis=1), np.take_along_axis(distances, order, axis=1)
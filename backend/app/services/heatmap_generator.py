@@ -1,60 +1,251 @@
 """
 Generate heatmap data for development impact visualization
+Evaluates the school, traffic, transit and infrastructure models over a
+lat/lng grid with vectorized computation and caches the resulting raster.
 """
 
-def generate_impact_heatmap():
+import json
+
+import numpy as np
+
+from app.config import settings
+from app.services.cache import LRUCache
+from app.services.datasets import registry as datasets
+from app.services import school_analyzer, traffic_calculator, transit_analyzer
+from app.services.infrastructure_analyzer import WATER_MAIN_THRESHOLD
+
+# Atlanta city limits: min_lng, min_lat, max_lng, max_lat
+ATLANTA_BBOX = (-84.55, 33.64, -84.29, 33.89)
+
+# Weight of each pressure component in the 0-100 impact score
+COMPONENT_WEIGHTS = {
+    "school_pressure": 0.30,
+    "traffic_pressure": 0.30,
+    "transit_pressure": 0.25,
+    "infrastructure_pressure": 0.15,
+}
+
+# Grid cells evaluated per vectorized chunk (bounds peak memory with large
+# regional datasets, where each cell can have hundreds of features in range)
+_CHUNK_CELLS = 20_000
+
+_RASTER_CACHE = LRUCache(settings.HEATMAP_CACHE_SIZE, name="heatmap_rasters")
+_RESPONSE_CACHE = LRUCache(settings.HEATMAP_CACHE_SIZE * 2, name="heatmap_responses")
+
+HEATMAP_DATASETS = ("schools", "intersections", "marta_stations", "walk_network")
+
+
+def clear_heatmap_caches(dataset_name=None):
+    """Drop cached rasters and responses (reload listener)"""
+    if dataset_name is None or dataset_name in HEATMAP_DATASETS:
+        _RASTER_CACHE.clear()
+        _RESPONSE_CACHE.clear()
+
+
+def generate_impact_heatmap(bbox=ATLANTA_BBOX, resolution=50, units=None, output_format="geojson"):
+    """
+    Generate the impact heatmap for a bbox as serialized JSON
+    resolution is the number of cells along each side of the grid; units is
+    the reference program size evaluated at every cell.
+    output_format: "geojson" (one polygon per cell) or "grid" (compact rows)
+    Returns: JSON string, cached per (bbox, resolution, units, format)
+    """
+    key = heatmap_cache_key(bbox, resolution, units, output_format)
+    body = _RESPONSE_CACHE.get(key)
+    if body is None:
+        raster = get_impact_raster(*key[:4])
+        if output_format == "grid":
+            body = json.dumps(raster_to_grid(raster), separators=(",", ":"))
+        else:
+            body = json.dumps(raster_to_geojson(raster), separators=(",", ":"))
+        _RESPONSE_CACHE.set(key, body)
+    return body
+
+
+def heatmap_cache_key(bbox, resolution, units, output_format):
+    """Response cache key: (bbox, resolution, units, dataset generation, format)"""
+    units = units or settings.HEATMAP_REFERENCE_UNITS
+    # Rasters built from an older reference dataset generation are never served
+    datasets.check()
+    return (tuple(round(v, 6) for v in bbox), resolution, units, datasets.generation, output_format)
+
+
+def cached_impact_heatmap(bbox=ATLANTA_BBOX, resolution=50, units=None, output_format="geojson"):
+    """Cached heatmap body, or None (lets callers skip dispatching to a worker)"""
+    return _RESPONSE_CACHE.get(heatmap_cache_key(bbox, resolution, units, output_format))
+
+
+def store_impact_heatmap(bbox, resolution, units, output_format, body):
+    """Cache a heatmap body generated elsewhere (e.g. in a worker process)"""
+    _RESPONSE_CACHE.set(heatmap_cache_key(bbox, resolution, units, output_format), body)
+
+
+def get_impact_raster(bbox, resolution, units, generation=None):
+    """Cached build_impact_raster (generation: reference dataset generation)"""
+    key = (bbox, resolution, units, generation)
+    raster = _RASTER_CACHE.get(key)
+    if raster is None:
+        raster = build_impact_raster(bbox, resolution, units)
+        _RASTER_CACHE.set(key, raster)
+    return raster
+
+
+def build_impact_raster(bbox, resolution, units):
+    """
+    Evaluate every pressure component at the center of each grid cell
+    Returns dict with bbox, cell sizes and (resolution x resolution) arrays,
+    row 0 at the southern edge.
+    """
+    min_lng, min_lat, max_lng, max_lat = bbox
+    cell_lng = (max_lng - min_lng) / resolution
+    cell_lat = (max_lat - min_lat) / resolution
+
+    lngs = min_lng + (np.arange(resolution) + 0.5) * cell_lng
+    lats = min_lat + (np.arange(resolution) + 0.5) * cell_lat
+    grid_lats, grid_lngs = np.meshgrid(lats, lngs, indexing="ij")
+    flat_lats, flat_lngs = grid_lats.ravel(), grid_lngs.ravel()
+
+    school = np.empty(flat_lats.size)
+    traffic = np.empty(flat_lats.size)
+    for start in range(0, flat_lats.size, _CHUNK_CELLS):
+        chunk = slice(start, start + _CHUNK_CELLS)
+        school[chunk] = school_pressure(flat_lats[chunk], flat_lngs[chunk], units)
+        traffic[chunk] = traffic_pressure(flat_lats[chunk], flat_lngs[chunk], units)
+    transit = transit_pressure(flat_lats, flat_lngs)
+    infrastructure = np.full(flat_lats.size, infrastructure_pressure(units))
+
+    components = {
+        "school_pressure": school,
+        "traffic_pressure": traffic,
+        "transit_pressure": transit,
+        "infrastructure_pressure": infrastructure,
+    }
+    score = sum(COMPONENT_WEIGHTS[name] * values for name, values in components.items()) * 100
+
+    shape = (resolution, resolution)
+    return {
+        "bbox": bbox,
+        "resolution": resolution,
+        "units": units,
+        "cell_size": (cell_lng, cell_lat),
+        "score": score.reshape(shape),
+        **{name: values.reshape(shape) for name, values in components.items()},
+    }
+
+
+def school_pressure(lats, lngs, units):
+    """
+    Highest projected capacity of any school in the catchment radius,
+    mapped from 80% (0.0) to 120% (1.0)
+    """
+    dataset = school_analyzer.get_schools_dataset()
+    students = units * settings.STUDENTS_PER_UNIT
+    enrollment = dataset.records["enrollment"]
+    capacity = dataset.records["capacity"]
+    projected_pct = (enrollment + students * dataset.grade_shares) / capacity * 100
+
+    rows, cols, _ = dataset.within_radius_pairs(lats, lngs, school_analyzer.SCHOOL_RADIUS_M)
+    worst_pct = np.zeros(len(lats))
+    np.maximum.at(worst_pct, rows, projected_pct[cols])
+    return school_pressure_score(worst_pct)
+
+
+def traffic_pressure(lats, lngs, units):
     """
-    Generate impact zones for Atlanta
-    Simplified approach with pre-defined zones
+    Lowest LOS headroom of any intersection in range once PM peak trips are
+    added, mapped from volume 900 (LOS C, 0.0) to 1600 (LOS F, 1.0)
+    Uses distance decay: routing every cell over the road network is too
+    slow for an interactive layer.
     """
-    
+    dataset = traffic_calculator.get_intersections_dataset()
+    rows, cols, distances = dataset.within_radius_pairs(lats, lngs, traffic_calculator.TRAFFIC_RADIUS_M)
+    new_volume = dataset.current_volume[cols] + traffic_calculator.intersection_trips(units, distances)
+    worst_volume = np.zeros(len(lats))
+    np.maximum.at(worst_volume, rows, new_volume)
+    return traffic_pressure_score(worst_volume)
+
+
+def transit_pressure(lats, lngs):
+    """
+    Walk time to the nearest MARTA station, mapped from 0 to 30+ minutes
+    (over the walk network where it can route the cell, else straight-line)
+    """
+    dataset = transit_analyzer.get_stations_dataset()
+    _, distances = dataset.k_nearest_many(lats, lngs, 1)
+    walk_distances = distances[:, 0]
+    walks = transit_analyzer.station_walk_distances(dataset, lats, lngs)
+    if walks is not None:
+        walk_distances = np.where(np.isfinite(walks[0]), walks[0], walk_distances)
+    walk_minutes = walk_distances / settings.WALK_SPEED_MS / 60
+    return transit_pressure_score(walk_minutes)
+
+
+def school_pressure_score(worst_pct):
+    """Highest projected school capacity % mapped from 80% (0.0) to 120% (1.0)"""
+    return np.clip((worst_pct - 80) / 40, 0, 1)
+
+
+def traffic_pressure_score(worst_volume):
+    """Highest projected intersection volume mapped from 900 (LOS C, 0.0) to 1600 (LOS F, 1.0)"""
+    return np.clip((worst_volume - 900) / 700, 0, 1)
+
+
+def transit_pressure_score(walk_minutes):
+    """Walk time to transit mapped from 0 to 30+ minutes"""
+    return np.clip(walk_minutes / 30, 0, 1)
+
+
+def infrastructure_pressure(units):
+    """Water demand against the 70% water main threshold (location-independent)"""
+    water_demand = units * settings.WATER_DEMAND_GPD_PER_UNIT
+    return min(1.0, water_demand / WATER_MAIN_THRESHOLD)
+
+
+def raster_to_geojson(raster):
+    """One square polygon feature per grid cell"""
+    min_lng, min_lat = raster["bbox"][0], raster["bbox"][1]
+    cell_lng, cell_lat = raster["cell_size"]
+    score = raster["score"]
+
     features = []
-    
-    # Define impact zones manually (faster than grid calculation)
-    zones = [
-        # HIGH IMPACT ZONES (Red/Orange) - Dense urban areas
-        {"center": [33.7590, -84.3880], "radius": 0.02, "score": 85, "name": "Downtown"},
-        {"center": [33.7810, -84.3860], "radius": 0.015, "score": 80, "name": "Midtown"},
-        {"center": [33.7650, -84.3480], "radius": 0.012, "score": 75, "name": "Virginia Highland"},
-        {"center": [33.8470, -84.3650], "radius": 0.015, "score": 70, "name": "Buckhead"},
-        
-        # MEDIUM IMPACT ZONES (Yellow) - Developing areas
-        {"center": [33.7480, -84.3350], "radius": 0.015, "score": 55, "name": "East Atlanta"},
-        {"center": [33.7550, -84.4250], "radius": 0.015, "score": 50, "name": "West End"},
-        {"center": [33.8180, -84.3620], "radius": 0.012, "score": 45, "name": "Brookhaven"},
-        
-        # LOW IMPACT ZONES (Green) - Suburban/less dense
-        {"center": [33.8420, -84.3780], "radius": 0.015, "score": 30, "name": "North Buckhead"},
-        {"center": [33.7280, -84.3680], "radius": 0.015, "score": 25, "name": "Grant Park"},
-        {"center": [33.7150, -84.4500], "radius": 0.015, "score": 20, "name": "Southwest Atlanta"},
-    ]
-    
-    for zone in zones:
-        lat, lng = zone["center"]
-        radius = zone["radius"]
-        score = zone["score"]
-        
-        # Create circular zone (simplified as square for performance)
-        feature = {
-            "type": "Feature",
-            "geometry": {
-                "type": "Polygon",
-                "coordinates": [[
-                    [lng - radius, lat - radius],
-                    [lng + radius, lat - radius],
-                    [lng + radius, lat + radius],
-                    [lng - radius, lat + radius],
-                    [lng - radius, lat - radius]
-                ]]
-            },
-            "properties": {
-                "impact_score": score,
-                "zone_name": zone["name"]
-            }
-        }
-        features.append(feature)
-    
+    for row in range(score.shape[0]):
+        south = min_lat + row * cell_lat
+        north = south + cell_lat
+        for col in range(score.shape[1]):
+            west = min_lng + col * cell_lng
+            east = west + cell_lng
+            features.append({
+                "type": "Feature",
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [[
+                        [west, south], [east, south], [east, north], [west, north], [west, south]
+                    ]]
+                },
+                "properties": {
+                    "impact_score": round(float(score[row, col]), 1),
+                    **{
+                        name: round(float(raster[name][row, col]), 3)
+                        for name in COMPONENT_WEIGHTS
+                    }
+                }
+            })
+
     return {
         "type": "FeatureCollection",
         "features": features
-    }
\ No newline at end of file
+    }
+
+
+def raster_to_grid(raster):
+    """Compact raster form: score rows from south to north, west to east"""
+    return {
+        "bbox": list(raster["bbox"]),
+        "width": raster["resolution"],
+        "height": raster["resolution"],
+        "units": raster["units"],
+        "impact_score": np.round(raster["score"], 1).tolist(),
+    }
+
+
+datasets.on_reload(clear_heatmap_caches)
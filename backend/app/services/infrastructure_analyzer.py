@@ -1,43 +1,62 @@
 from app.config import settings
 
+# Mock infrastructure capacity
+WATER_MAIN_CAPACITY = 50000
+SEWER_LINE_CAPACITY = 45000
+SUBSTATION_CAPACITY = 1000
 
-def calculate_infrastructure_impact(location, units):
+# Demand above which an upgrade is required (70% for pipes, 80% for power)
+WATER_MAIN_THRESHOLD = WATER_MAIN_CAPACITY * 0.7
+SEWER_LINE_THRESHOLD = SEWER_LINE_CAPACITY * 0.7
+SUBSTATION_THRESHOLD = SUBSTATION_CAPACITY * 0.8
+
+
+def infrastructure_demands(units):
+    """Water, sewer (gpd) and power (kW) demand of a building (industry standards)"""
+    water_demand = units * settings.WATER_DEMAND_GPD_PER_UNIT
+    return water_demand, water_demand * 0.8, units * 2.5
+
+
+def calculate_infrastructure_impact(location, units, background_demand=None):
     """
     Calculate infrastructure capacity impact
+    background_demand: optional (water, sewer, power) demand already added by
+    other buildings in a scenario; thresholds apply to the combined demand
     Returns dict (not Pydantic object)
     """
     # Calculate demands (industry standards)
-    water_demand = units * settings.WATER_DEMAND_GPD_PER_UNIT
-    sewer_demand = water_demand * 0.8
-    power_demand = units * 2.5
-    
-    # Mock infrastructure capacity
-    water_main_capacity = 50000
-    sewer_line_capacity = 45000
-    substation_capacity = 1000
+    water_demand, sewer_demand, power_demand = infrastructure_demands(units)
+    other_water, other_sewer, other_power = background_demand or (0, 0, 0)
     
     upgrades_needed = []
     cost_estimate = 0
     
     # Check capacity (70% threshold)
-    if water_demand > (water_main_capacity * 0.7):
+    if other_water + water_demand > WATER_MAIN_THRESHOLD:
         upgrades_needed.append("Water main upgrade required")
         cost_estimate += 500000
     
-    if sewer_demand > (sewer_line_capacity * 0.7):
+    if other_sewer + sewer_demand > SEWER_LINE_THRESHOLD:
         upgrades_needed.append("Sewer line expansion needed")
         cost_estimate += 750000
     
-    if power_demand > (substation_capacity * 0.8):
+    if other_power + power_demand > SUBSTATION_THRESHOLD:
         upgrades_needed.append("Electrical service upgrade required")
         cost_estimate += 300000
     
     # Return dict (not object)
-    return {
+    result = {
         "water_demand": water_demand,
         "sewer_demand": sewer_demand,
         "power_demand": power_demand,
         "upgrades_needed": upgrades_needed,
         "estimated_cost": cost_estimate,
         "infrastructure_adequate": len(upgrades_needed) == 0
-    }
\ No newline at end of file
+    }
+    if background_demand is not None:
+        result["scenario_demand"] = {
+            "water": other_water + water_demand,
+            "sewer": other_sewer + sewer_demand,
+            "power": other_power + power_demand
+        }
+    return result
\ No newline at end of file
@@ -0,0 +1,381 @@
+"""
+Background job queue
+Long-running analyses (large batches, heatmaps, shadow studies) are submitted
+as jobs and polled for progress and results instead of holding a request
+open. Jobs live in the database, so queued and interrupted jobs survive a
+restart: on startup, jobs left running are queued again (up to
+JOB_MAX_ATTEMPTS tries) and every queued job is rescheduled in submission
+order.
+
+Jobs are "interactive" or "bulk". JOB_RUNNERS jobs run at once; queued
+interactive jobs are always picked first and bulk jobs may hold at most
+JOB_BULK_RUNNERS of the slots, so a backlog of portfolio batches never keeps
+a single-site analysis waiting for more than a free slot.
+
+Status polls never read the stored result: it is fetched once, as stored,
+from GET /jobs/{job_id}/result.
+"""
+
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta
+import json
+import uuid
+
+from sqlalchemy.orm import defer
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.job import Job
+from app.services.metrics import collector
+from app.services.workers import WorkerPoolFull
+
+PRIORITIES = ("interactive", "bulk")
+FINISHED = ("succeeded", "failed", "cancelled")
+
+
+class JobQueueFull(Exception):
+    """Raised when JOB_MAX_QUEUED jobs are already waiting"""
+
+
+def job_to_dict(job: Job, queue_position=None) -> dict:
+    """API view of a job row (without the result)"""
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "priority": job.priority,
+        "status": job.status,
+        "progress": round(job.progress, 4),
+        "queue_position": queue_position,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "error": job.error,
+        "result_ready": job.status == "succeeded"
+    }
+
+
+class JobQueue:
+    """Database-backed job queue with interactive/bulk priorities"""
+
+    def __init__(self, runners=2, bulk_runners=1, max_queued=1000, max_attempts=3, retention_days=7):
+        self.runners = max(1, runners)
+        self.bulk_runners = min(max(1, bulk_runners), self.runners)
+        self.max_queued = max_queued
+        self.max_attempts = max_attempts
+        self.retention_days = retention_days
+        self._handlers = {}
+        self._queues = {priority: deque() for priority in PRIORITIES}
+        self._running = {}  # job id -> priority
+        self._tasks = {}  # job id -> handler task
+        self._cancel_requested = set()
+        self._condition = None
+        self._runner_tasks = []
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.deferred = 0
+
+    def register(self, kind, handler, priority="bulk"):
+        """
+        Register a job kind: handler(params, progress) is a coroutine that
+        returns a JSON-serializable result and may await progress(fraction)
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}'")
+        self._handlers[kind] = (handler, priority)
+
+    def default_priority(self, kind):
+        return self._handlers[kind][1]
+
+    # ----- lifecycle -----
+
+    async def start(self):
+        """Recover unfinished jobs and start the runners (the tables must exist)"""
+        if self._runner_tasks:
+            return
+        self._condition = asyncio.Condition()
+        queued = await asyncio.to_thread(self._recover)
+        for job_id, priority in queued:
+            self._queues[priority].append(job_id)
+        self._runner_tasks = [asyncio.create_task(self._runner()) for _ in range(self.runners)]
+        if queued:
+            print(f"✅ Resumed {len(queued)} queued background jobs")
+
+    async def stop(self):
+        """
+        Stop the runners. Jobs still running stay marked as running and are
+        queued again on the next start.
+        """
+        tasks, self._runner_tasks = self._runner_tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for queue in self._queues.values():
+            queue.clear()
+        self._running.clear()
+
+    def _recover(self):
+        """Requeue interrupted jobs, fail those out of attempts and purge old finished jobs"""
+        now = datetime.now()
+        with SessionLocal() as db:
+            cutoff = now - timedelta(days=self.retention_days)
+            db.query(Job).filter(Job.status.in_(FINISHED), Job.finished_at < cutoff).delete(
+                synchronize_session=False
+            )
+            for job in db.query(Job).filter(Job.status == "running"):
+                if job.attempts >= self.max_attempts:
+                    job.status = "failed"
+                    job.error = f"Interrupted {job.attempts} times by a restart"
+                    job.finished_at = now
+                else:
+                    job.status = "queued"
+            db.commit()
+            queued = db.query(Job.id, Job.priority, Job.kind).filter(Job.status == "queued").order_by(Job.created_at)
+            return [(job_id, priority) for job_id, priority, kind in queued if kind in self._handlers]
+
+    # ----- API -----
+
+    async def submit(self, kind, params: dict, priority=None) -> dict:
+        """Store and enqueue a job; raises JobQueueFull when the queue is at capacity"""
+        if kind not in self._handlers:
+            raise KeyError(f"Unknown job kind '{kind}'")
+        priority = priority or self.default_priority(kind)
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}'")
+        if self.queued_count() >= self.max_queued:
+            raise JobQueueFull(f"{self.queued_count()} jobs already queued")
+
+        job = Job(
+            id=str(uuid.uuid4()),
+            kind=kind,
+            priority=priority,
+            status="queued",
+            params=json.dumps(params),
+            progress=0.0,
+            attempts=0,
+            created_at=datetime.now()
+        )
+        view = await asyncio.to_thread(self._insert, job)
+        async with self._condition:
+            self._queues[priority].append(job.id)
+            view["queue_position"] = self.queue_position(job.id, priority)
+            self._condition.notify()
+        return view
+
+    async def get(self, job_id) -> dict:
+        """Job status and progress (None if unknown)"""
+        job = await asyncio.to_thread(self._load, job_id)
+        if job is None:
+            return None
+        return job_to_dict(job, self.queue_position(job_id, job.priority) if job.status == "queued" else None)
+
+    async def get_result(self, job_id):
+        """(status, stored result JSON text or None), or None if unknown"""
+        return await asyncio.to_thread(self._load_result, job_id)
+
+    async def cancel(self, job_id) -> dict:
+        """
+        Cancel a queued or running job (a running job stops at its next await).
+        Finished jobs are returned unchanged. Returns None if unknown.
+        """
+        job = await asyncio.to_thread(self._load, job_id)
+        if job is None:
+            return None
+        if job.status == "queued":
+            async with self._condition:
+                queue = self._queues[job.priority]
+                if job_id in queue:
+                    queue.remove(job_id)
+                    self.cancelled += 1
+                    await asyncio.to_thread(self._finish, job_id, "cancelled")
+        elif job.status == "running" and job_id in self._tasks:
+            self._cancel_requested.add(job_id)
+            self._tasks[job_id].cancel()
+            self.cancelled += 1
+            await asyncio.to_thread(self._finish, job_id, "cancelled")
+        return await self.get(job_id)
+
+    def queued_count(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    def queue_position(self, job_id, priority):
+        """Jobs ahead of a queued job (interactive jobs are ahead of every bulk job)"""
+        try:
+            position = self._queues[priority].index(job_id)
+        except ValueError:
+            return None
+        if priority == "bulk":
+            position += len(self._queues["interactive"])
+        return position
+
+    def stats(self):
+        """Queue depth per priority, running jobs and outcome counters"""
+        running = list(self._running.values())
+        return {
+            "runners": self.runners,
+            "bulk_runners": self.bulk_runners,
+            "queued": {priority: len(queue) for priority, queue in self._queues.items()},
+            "running": {priority: running.count(priority) for priority in PRIORITIES},
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            # Times a job waited for the worker tier to accept it
+            "deferred": self.deferred
+        }
+
+    # ----- runners -----
+
+    def _take(self):
+        """Next job a free runner may start, or None (called under the condition)"""
+        if self._queues["interactive"]:
+            job_id = self._queues["interactive"].popleft()
+            self._running[job_id] = "interactive"
+            return job_id
+        bulk_running = sum(1 for priority in self._running.values() if priority == "bulk")
+        if self._queues["bulk"] and bulk_running < self.bulk_runners:
+            job_id = self._queues["bulk"].popleft()
+            self._running[job_id] = "bulk"
+            return job_id
+        return None
+
+    async def _runner(self):
+        while True:
+            async with self._condition:
+                job_id = await self._condition.wait_for(self._take)
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                # e.g. the database was unreachable; fail this job, keep the runner
+                print(f"ERROR running background job {job_id}: {str(e)}")
+                await self._fail(job_id, str(e))
+            finally:
+                async with self._condition:
+                    self._running.pop(job_id, None)
+                    # A finished bulk job may unblock a runner waiting on the bulk limit
+                    self._condition.notify_all()
+
+    async def _run(self, job_id):
+        job = await asyncio.to_thread(self._mark_running, job_id)
+        if job is None:
+            return
+        handler, _ = self._handlers[job.kind]
+        params = json.loads(job.params)
+
+        async def progress(fraction):
+            await asyncio.to_thread(self._set_progress, job_id, fraction)
+
+        task = asyncio.create_task(self.call_when_free(handler, params, progress))
+        self._tasks[job_id] = task
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if job_id not in self._cancel_requested:
+                raise  # shutdown: the job stays running and is resumed on restart
+            return
+        except Exception as e:
+            print(f"ERROR in background job {job_id} ({job.kind}): {str(e)}")
+            await self._fail(job_id, str(getattr(e, "detail", e)))
+            return
+        finally:
+            self._tasks.pop(job_id, None)
+            self._cancel_requested.discard(job_id)
+
+        await asyncio.to_thread(self._finish, job_id, "succeeded", result=json.dumps(result))
+        self.completed += 1
+
+    async def _fail(self, job_id, error):
+        """Count a failed job and record it, if the database allows"""
+        self.failed += 1
+        try:
+            await asyncio.to_thread(self._finish, job_id, "failed", error=error)
+        except Exception as e:
+            print(f"ERROR recording failure of background job {job_id}: {str(e)}")
+
+    async def call_when_free(self, fn, *args):
+        """
+        Await fn(*args), retrying while the worker tier is saturated: a
+        background job waits for capacity instead of failing
+        """
+        while True:
+            try:
+                return await fn(*args)
+            except WorkerPoolFull:
+                self.deferred += 1
+                await asyncio.sleep(settings.WORKER_RETRY_AFTER_SECONDS)
+
+    # ----- database (blocking, run in threads) -----
+
+    def _insert(self, job):
+        with SessionLocal() as db:
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            return job_to_dict(job)
+
+    def _load(self, job_id):
+        with SessionLocal() as db:
+            # The result can be large; status polls never need it
+            job = db.get(Job, job_id, options=[defer(Job.result, raiseload=True)])
+            if job is not None:
+                db.expunge(job)
+            return job
+
+    def _load_result(self, job_id):
+        with SessionLocal() as db:
+            row = db.query(Job.status, Job.result).filter(Job.id == job_id).first()
+            return tuple(row) if row is not None else None
+
+    def _mark_running(self, job_id):
+        with SessionLocal() as db:
+            job = db.get(Job, job_id)
+            if job is None or job.status != "queued":
+                return None
+            job.status = "running"
+            job.started_at = datetime.now()
+            job.attempts += 1
+            db.commit()
+            db.refresh(job)
+            db.expunge(job)
+            return job
+
+    def _set_progress(self, job_id, fraction):
+        with SessionLocal() as db:
+            db.query(Job).filter(Job.id == job_id).update({"progress": min(max(fraction, 0.0), 1.0)})
+            db.commit()
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with SessionLocal() as db:
+            values = {"status": status, "result": result, "error": error, "finished_at": datetime.now()}
+            if status == "succeeded":
+                values["progress"] = 1.0
+            # A job cancelled while its last step was finishing stays cancelled
+            db.query(Job).filter(Job.id == job_id, Job.status.in_(("queued", "running"))).update(values)
+            db.commit()
+
+
+queue = JobQueue(
+    runners=settings.JOB_RUNNERS,
+    bulk_runners=settings.JOB_BULK_RUNNERS,
+    max_queued=settings.JOB_MAX_QUEUED,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    retention_days=settings.JOB_RETENTION_DAYS
+)
+
+
+@collector("citytrotter_jobs_queued", "Background jobs waiting, by priority", "gauge", ("priority",))
+def _jobs_queued():
+    return [((priority,), count) for priority, count in queue.stats()["queued"].items()]
+
+
+@collector("citytrotter_jobs_running", "Background jobs running, by priority", "gauge", ("priority",))
+def _jobs_running():
+    return [((priority,), count) for priority, count in queue.stats()["running"].items()]
+
+
+@collector("citytrotter_jobs_finished_total", "Background jobs by outcome", "counter", ("outcome",))
+def _jobs_finished():
+    stats = queue.stats()
+    return [((outcome,), stats[outcome]) for outcome in ("completed", "failed", "cancelled")]
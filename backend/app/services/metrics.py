@@ -0,0 +1,261 @@
+"""
+Request instrumentation and the Prometheus /metrics exposition
+Counters and histograms are plain in-process structures updated with one
+lock-protected addition per observation. Values that already exist elsewhere
+(cache counters, dataset versions, worker and job queue state) are read only
+when /metrics is scraped, so they cost nothing on the request path.
+
+Per-request profiles (?profile=1) are collected through a context variable:
+when no profile is active, recording a span is a single lookup.
+
+Metrics live in the process that records them; with WORKER_PROCESSES > 0,
+work inside the worker processes is measured from the API process (job wait
+and run time) rather than per analyzer.
+"""
+
+import bisect
+from contextlib import contextmanager
+import contextvars
+import threading
+import time
+
+# Latency buckets (seconds) from sub-millisecond cache hits to slow AI reports
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_METRICS = []
+_COLLECTORS = []
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _METRICS.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        _METRICS.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            entry[index] += 1
+            entry[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(entry)) for key, entry in self._values.items())
+        for key, entry in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), entry[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(entry[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def collector(name, documentation, kind, labelnames=()):
+    """
+    Register a function computing a metric at scrape time: it returns
+    [(label values tuple, value), ...]
+    """
+    def register(fn):
+        _COLLECTORS.append((name, documentation, kind, tuple(labelnames), fn))
+        return fn
+    return register
+
+
+def render_metrics() -> str:
+    """Every metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    for name, documentation, kind, labelnames, fn in _COLLECTORS:
+        try:
+            samples = fn()
+        except Exception as e:
+            print(f"Metrics collector {name} failed: {str(e)}")
+            continue
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} {kind}")
+        for key, value in samples:
+            if value is None:
+                continue
+            lines.append(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ----- request metrics -----
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "citytrotter_http_request_duration_seconds",
+    "HTTP request latency by route template and status",
+    ("method", "route", "status")
+)
+STAGE_SECONDS = Histogram(
+    "citytrotter_analysis_stage_duration_seconds",
+    "Analyzer stage latency (mode=single per building, mode=batch per whole batch)",
+    ("stage", "mode")
+)
+STAGE_ERRORS = Counter(
+    "citytrotter_analysis_stage_errors_total",
+    "Analyzer stages that timed out or raised",
+    ("stage", "reason")
+)
+AI_REPORT_SECONDS = Histogram(
+    "citytrotter_ai_report_duration_seconds",
+    "Planning report latency by source (gemini, cache, template, fallback)",
+    ("source",)
+)
+GEMINI_REQUESTS = Counter(
+    "citytrotter_gemini_requests_total",
+    "Gemini calls by outcome (success, error)",
+    ("outcome",)
+)
+WORKER_JOB_SECONDS = Histogram(
+    "citytrotter_worker_job_duration_seconds",
+    "Worker tier job time by phase (wait in queue, run)",
+    ("job", "phase")
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners cannot blow up cardinality
+            path = route.path if route is not None else "unmatched"
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start, method=scope["method"], route=path, status=str(status[0])
+            )
+
+
+# ----- per-request profiles -----
+
+_PROFILE = contextvars.ContextVar("profile", default=None)
+
+
+class Profile:
+    """Timed spans of one request, relative to its start"""
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self.spans = []
+
+    def add(self, name, start, end, **details):
+        """Record a span from perf_counter start/end values"""
+        self.spans.append({
+            "name": name,
+            "start_ms": round((start - self._start) * 1000, 2),
+            "duration_ms": round((end - start) * 1000, 2),
+            **details
+        })
+
+    def report(self) -> dict:
+        return {
+            "total_ms": round((time.perf_counter() - self._start) * 1000, 2),
+            "spans": sorted(self.spans, key=lambda span: span["start_ms"])
+        }
+
+
+def start_profile() -> Profile:
+    """Start collecting spans for the current request (and tasks it spawns)"""
+    profile = Profile()
+    _PROFILE.set(profile)
+    return profile
+
+
+def current_profile():
+    """The active Profile, or None when the request is not being profiled"""
+    return _PROFILE.get()
+
+
+@contextmanager
+def span(name, **details):
+    """Record a with-block in the active profile (no-op when not profiling)"""
+    profile = _PROFILE.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, start, time.perf_counter(), **details)
@@ -0,0 +1,179 @@
+"""
+Parameter sweep: every analyzer's key outputs over a units x stories grid
+Each analyzer depends on units or on stories, never both, so the sweep is
+two sets of curves joined at the end:
+
+- units: school capacity, traffic, infrastructure and economic impact
+- stories: zoning compliance and shadow area
+
+The location-dependent work (schools and intersections in range, route
+shares, station walk, downtown distance, zoning district, sun positions) runs
+once; each curve is then one array expression over the unit counts (shadows:
+one projection per story count), with the analyzers' own formulas, so every
+point matches a full analysis of that program.
+"""
+
+import numpy as np
+
+from app.config import settings
+from app.services import (
+    economic_analyzer,
+    school_analyzer,
+    shadow_calculator,
+    traffic_calculator,
+    transit_analyzer,
+    zoning_checker
+)
+from app.services.geo import haversine_pairs
+from app.services.infrastructure_analyzer import (
+    SEWER_LINE_THRESHOLD,
+    SUBSTATION_THRESHOLD,
+    WATER_MAIN_THRESHOLD,
+    infrastructure_demands
+)
+
+
+def sweep_parameters(location, footprint, units_values, stories_values, building_type="residential"):
+    """
+    Analyzer outputs for every combination of units_values x stories_values
+    Returns dict with per-units curves (by_units), per-stories curves
+    (by_stories), location-only results, and the bottleneck count of every
+    grid point (bottleneck_count[i][j] for stories_values[i], units_values[j])
+    """
+    units = np.asarray(units_values, dtype=np.int64)
+    stories = np.asarray(stories_values, dtype=np.int64)
+
+    schools, schools_over = school_curves(location, units)
+    traffic, degraded = traffic_curves(location, units)
+    infrastructure, upgrades = infrastructure_curves(units)
+    distance_km = economic_analyzer.downtown_distance_km(location)
+    economic = [economic_analyzer.build_economic_impact(distance_km, int(u)) for u in units]
+
+    zoning = zoning_checker.get_zoning_index()
+    district = zoning.lookup(location.lat, location.lng)
+    heights = stories * zoning_checker.STORY_HEIGHT_FT
+    compliant = heights <= district["max_height"] if district["max_height"] is not None \
+        else np.ones(len(stories), dtype=bool)
+
+    # Same counting as identify_bottlenecks
+    unit_bottlenecks = schools_over + (degraded > 0) + (upgrades > 0)
+    bottleneck_count = (~compliant).astype(np.int64)[:, None] + unit_bottlenecks[None, :]
+
+    return {
+        "units": units.tolist(),
+        "stories": stories.tolist(),
+        "type": building_type,
+        "by_units": {
+            "students_generated": [round(float(u) * settings.STUDENTS_PER_UNIT, 1) for u in units],
+            "schools": schools,
+            "schools_over_capacity": schools_over.tolist(),
+            **traffic,
+            "degraded_intersections": degraded.tolist(),
+            **infrastructure,
+            "economic_impact": {key: [e[key] for e in economic] for key in economic[0]} if economic else {}
+        },
+        "by_stories": {
+            "building_height_ft": heights.tolist(),
+            "zoning_compliant": compliant.tolist(),
+            "daily_shadow_area_sqft": shadow_calculator.daily_shadow_areas(location, footprint, stories.tolist())
+        },
+        "zoning": {
+            "zone": district["zone"],
+            "max_height": district["max_height"],
+            "max_far": district["max_far"],
+            "data_source": zoning.source
+        },
+        "transit_access": transit_analyzer.analyze_transit_access(location),
+        "bottleneck_count": bottleneck_count.tolist()
+    }
+
+
+def school_curves(location, units):
+    """Projected capacity of each nearby school per unit count, and schools over 100%"""
+    dataset = school_analyzer.get_schools_dataset()
+    indices, distances = dataset.within_radius(location.lat, location.lng, school_analyzer.SCHOOL_RADIUS_M)
+    table = dataset.records
+    enrollment = table["enrollment"][indices]
+    capacity = table["capacity"][indices]
+    new_students = units[:, None] * settings.STUDENTS_PER_UNIT * dataset.grade_shares[indices][None, :]
+    capacity_pcts = ((enrollment + new_students) / capacity) * 100
+
+    grade_labels = table.categories["grade_level"]
+    schools = [
+        {
+            "name": name,
+            "distance": round(distance, 1),
+            "grade_level": grade_labels[grade_code],
+            "enrollment": school_enrollment,
+            "capacity": school_capacity,
+            "capacity_pct": [round(pct, 1) for pct in pcts]
+        }
+        for name, distance, grade_code, school_enrollment, school_capacity, pcts in zip(
+            table["name"][indices].tolist(),
+            distances.tolist(),
+            table["grade_level"][indices].tolist(),
+            enrollment.tolist(),
+            capacity.tolist(),
+            capacity_pcts.T.tolist()
+        )
+    ]
+    return schools, (capacity_pcts > 100).sum(axis=1)
+
+
+def traffic_curves(location, units):
+    """Trips and projected LOS of each intersection the site's trips reach, per unit count"""
+    dataset = traffic_calculator.get_intersections_dataset()
+    assigned = traffic_calculator.assign_site_trips(dataset, [location.lat], [location.lng])
+    if assigned and assigned[0] is not None:
+        indices, factors = assigned[0]
+        distances = haversine_pairs(
+            np.full(len(indices), location.lat), np.full(len(indices), location.lng),
+            dataset.lats[indices], dataset.lngs[indices]
+        )
+        method = "road_network"
+    else:
+        indices, distances = dataset.within_radius(location.lat, location.lng, traffic_calculator.TRAFFIC_RADIUS_M)
+        factors = traffic_calculator.decay_factors(distances)
+        method = "distance_decay"
+
+    daily_trips = np.floor(units * settings.TRIPS_PER_UNIT)
+    pm_peak_trips = traffic_calculator.peak_hour_trips_many(units)
+    volumes = dataset.current_volume[indices][None, :] + pm_peak_trips[:, None] * factors[None, :]
+    levels = traffic_calculator.los_levels(volumes)
+    degraded = (levels > dataset.current_los_level[indices][None, :]).sum(axis=1)
+
+    intersections = [
+        {
+            "name": dataset.records[index]["name"],
+            "distance": round(float(distance), 1),
+            "current_los": dataset.records[index]["current_los"],
+            "projected_los": [traffic_calculator.LOS_GRADES[level] for level in column]
+        }
+        for index, distance, column in zip(indices.tolist(), distances.tolist(), levels.T.tolist())
+    ]
+    curves = {
+        "daily_trips": daily_trips.astype(np.int64).tolist(),
+        "peak_trips": {
+            "am": np.floor(daily_trips * settings.AM_PEAK_RATIO).astype(np.int64).tolist(),
+            "pm": pm_peak_trips.astype(np.int64).tolist()
+        },
+        "assignment_method": method,
+        "intersections": intersections
+    }
+    return curves, degraded
+
+
+def infrastructure_curves(units):
+    """Utility demand and upgrade cost per unit count, and upgrades needed"""
+    water, sewer, power = infrastructure_demands(units.astype(np.float64))
+    water_upgrade = water > WATER_MAIN_THRESHOLD
+    sewer_upgrade = sewer > SEWER_LINE_THRESHOLD
+    power_upgrade = power > SUBSTATION_THRESHOLD
+    cost = water_upgrade * 500000 + sewer_upgrade * 750000 + power_upgrade * 300000
+    curves = {
+        "water_demand": water.tolist(),
+        "sewer_demand": sewer.tolist(),
+        "power_demand": power.tolist(),
+        "infrastructure_upgrade_cost": cost.astype(np.int64).tolist()
+    }
+    return curves, water_upgrade.astype(np.int64) + sewer_upgrade + power_upgrade
@@ -0,0 +1,202 @@
+"""
+Road network traffic assignment
+The network is a directed graph of drivable road segments (node coordinates,
+edges and free-flow travel times in seconds) stored as .npz. PM peak trips
+generated by a site are split between destination zones by weight and routed
+along the fastest path from each zone to the site (PM peak trips are mostly
+arrivals home); every intersection on a path carries that zone's share.
+
+One Dijkstra search per zone builds its shortest-path tree over the whole
+network, once per network/zones version. A site's routes are then read off
+those trees by walking predecessors back from the site's node, so no request
+ever searches the graph. Shares depend only on the site's node and the
+zone/intersection datasets, so they are also cached per origin node:
+repeated analyses from the same block, or program-size changes at one site,
+cost a dictionary lookup.
+"""
+
+import threading
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from app.config import settings
+from app.services.cache import LRUCache
+from app.services.geo import PointDataset
+
+# Zero-time edges would be dropped as non-edges by the sparse graph
+MIN_TRAVEL_TIME_S = 0.01
+
+_ROUTE_CACHE = LRUCache(settings.TRAFFIC_ROUTE_CACHE_SIZE, name="traffic_routes")
+_MISSING = object()
+
+
+class ZoneTrees:
+    """Shortest-path trees from every destination zone (rows follow the zones)"""
+
+    def __init__(self, zone_nodes, weights, times, predecessors):
+        self.zone_nodes = zone_nodes
+        self.weights = weights
+        self.times = times
+        self.predecessors = predecessors
+
+
+class RoadNetwork:
+    """Directed road graph with a KD-tree over its nodes for snapping sites and features"""
+
+    def __init__(self, lats, lngs, edges_from, edges_to, travel_times, version=None):
+        self.nodes = PointDataset(None, name="road_nodes", lats=lats, lngs=lngs)
+        self.version = version
+        n = len(self.nodes)
+        edges_from = np.asarray(edges_from, dtype=np.int64)
+        edges_to = np.asarray(edges_to, dtype=np.int64)
+        travel_times = np.maximum(np.asarray(travel_times, dtype=np.float64), MIN_TRAVEL_TIME_S)
+
+        # Parallel edges would be summed by the sparse matrix; keep the fastest
+        order = np.lexsort((travel_times, edges_to, edges_from))
+        pairs = edges_from[order] * n + edges_to[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = pairs[1:] != pairs[:-1]
+        order = order[first]
+
+        self.graph = csr_matrix((travel_times[order], (edges_from[order], edges_to[order])), shape=(n, n))
+        self.edge_count = len(order)
+        self._derived = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def snap(self, lats, lngs):
+        """Nearest graph node of each point, -1 if none within ROAD_SNAP_MAX_M"""
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        if len(self.nodes) == 0:
+            return np.full(len(lats), -1, dtype=np.intp)
+        indices, distances = self.nodes.k_nearest_many(lats, lngs, 1)
+        return np.where(distances[:, 0] <= settings.ROAD_SNAP_MAX_M, indices[:, 0], -1)
+
+    def _cached(self, key, build):
+        """Structures derived from a feature dataset, built once per dataset version"""
+        value = self._derived.get(key)
+        if value is None:
+            with self._lock:
+                value = self._derived.get(key)
+                if value is None:
+                    value = build()
+                    # Only the current version of each dataset is worth keeping
+                    derived = {k: v for k, v in self._derived.items() if k[:2] != key[:2]}
+                    derived[key] = value
+                    self._derived = derived
+        return value
+
+    def zone_trees(self, zones):
+        """Shortest-path trees from each zone's node (one multi-row Dijkstra run)"""
+        def build():
+            zone_nodes = self.snap(zones.lats, zones.lngs)
+            routable = zone_nodes >= 0
+            n = len(self.nodes)
+            if not routable.any():
+                return ZoneTrees(zone_nodes[:0], zones.weights[:0], np.empty((0, n)), np.empty((0, n), dtype=np.int32))
+            times, predecessors = dijkstra(
+                self.graph, directed=True, indices=zone_nodes[routable], return_predecessors=True
+            )
+            return ZoneTrees(
+                zone_nodes[routable], zones.weights[routable],
+                times.astype(np.float32), predecessors.astype(np.int32)
+            )
+
+        return self._cached(("zones", zones.name, zones.version), build)
+
+    def intersection_nodes(self, intersections):
+        """
+        {node: intersection indices} for every graph node within
+        INTERSECTION_MATCH_M of an intersection (a junction is usually several
+        nodes in a detailed network)
+        """
+        def build():
+            matches = {}
+            nearby = self.nodes.within_radius_many(
+                intersections.lats, intersections.lngs, settings.INTERSECTION_MATCH_M
+            )
+            for index, (nodes, _) in enumerate(nearby):
+                for node in nodes.tolist():
+                    matches.setdefault(node, []).append(index)
+            return matches
+
+        return self._cached(("intersections", intersections.name, intersections.version), build)
+
+    def route_shares_many(self, origins, zones, intersections):
+        """
+        Share of a site's PM peak trips passing each intersection, per origin node
+        Returns: one (intersection indices, shares) per origin, or None where
+        the origin reaches no zone (or is -1)
+        """
+        results = {}
+        for origin in dict.fromkeys(int(o) for o in origins):
+            if origin < 0:
+                results[origin] = None
+                continue
+            key = (self.version, zones.version, intersections.version, origin)
+            shares = _ROUTE_CACHE.get(key, _MISSING)
+            if shares is _MISSING:
+                shares = trace_shares(origin, self.zone_trees(zones), self.intersection_nodes(intersections))
+                _ROUTE_CACHE.set(key, shares)
+            results[origin] = shares
+        return [results[int(origin)] for origin in origins]
+
+
+def trace_shares(origin, trees, intersection_nodes):
+    """
+    Walk each reachable zone's tree from the origin back to the zone, adding
+    the zone's weight once to every intersection the path passes
+    Returns: (intersection indices, shares of the site's trips), or None
+    """
+    flows = {}
+    total = 0.0
+    for row, weight in enumerate(trees.weights.tolist()):
+        if not np.isfinite(trees.times[row, origin]):
+            continue
+        total += weight
+        predecessors = trees.predecessors[row]
+        passed = set()
+        node = origin
+        while node >= 0:
+            passed.update(intersection_nodes.get(node, ()))
+            node = int(predecessors[node])
+        for index in passed:
+            flows[index] = flows.get(index, 0.0) + weight
+
+    if total == 0:
+        return None
+    indices = np.fromiter(flows, dtype=np.intp, count=len(flows))
+    shares = np.fromiter(flows.values(), dtype=np.float64, count=len(flows)) / total
+    return indices, shares
+
+
+def load_road_network(path, version=None):
+    """Read a network written by scripts/build_road_network.py"""
+    with np.load(path) as data:
+        network = RoadNetwork(
+            data["lats"], data["lngs"], data["edges_from"], data["edges_to"], data["travel_times"],
+            version=version
+        )
+    print(f"✅ Loaded road network with {len(network)} nodes, {network.edge_count} edges")
+    return network
+
+
+def save_road_network(path, lats, lngs, edges_from, edges_to, travel_times):
+    """Write a network in the .npz layout load_road_network reads"""
+    np.savez_compressed(
+        path,
+        lats=np.asarray(lats, dtype=np.float64),
+        lngs=np.asarray(lngs, dtype=np.float64),
+        edges_from=np.asarray(edges_from, dtype=np.int32),
+        edges_to=np.asarray(edges_to, dtype=np.int32),
+        travel_times=np.asarray(travel_times, dtype=np.float32)
+    )
+
+
+def route_cache_stats():
+    """Size and hit-rate counters of the per-origin route cache"""
+    return _ROUTE_CACHE.stats()
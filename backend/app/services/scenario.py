@@ -0,0 +1,307 @@
+"""
+Cumulative multi-building scenarios
+A scenario applies a set of buildings to the city together: student loads,
+PM peak trips and utility demand accumulate per facility, and each facility
+records which building pushed it over its threshold. Running totals are kept
+per facility, so adding or removing a building only touches the facilities
+near it.
+"""
+
+from datetime import datetime
+import math
+import threading
+import uuid
+
+import numpy as np
+
+from app.config import settings
+from app.services.cache import LRUCache
+from app.services import school_analyzer, traffic_calculator, infrastructure_analyzer
+
+# City-wide utility facilities and the demand component each one carries
+UTILITY_FACILITIES = {
+    "water_main": ("Water main", 0, infrastructure_analyzer.WATER_MAIN_THRESHOLD),
+    "sewer_line": ("Sewer line", 1, infrastructure_analyzer.SEWER_LINE_THRESHOLD),
+    "substation": ("Electrical substation", 2, infrastructure_analyzer.SUBSTATION_THRESHOLD),
+}
+
+_SCENARIOS = LRUCache(settings.SCENARIO_MAX_COUNT, ttl_seconds=settings.SCENARIO_TTL_SECONDS, name="scenarios")
+
+
+class Scenario:
+    """
+    A set of buildings applied together, with per-facility running loads
+    Facility keys: ("school", index), ("intersection", index) or a
+    UTILITY_FACILITIES key. Loads are students, PM peak trips, gpd or kW.
+    Facility indices refer to the school and intersection datasets current
+    when the scenario was created; the scenario keeps using those versions
+    even if the reference files are reloaded.
+    """
+
+    def __init__(self, name=None):
+        self.id = str(uuid.uuid4())
+        self.name = name
+        self.created_at = datetime.now()
+        self.schools = school_analyzer.get_schools_dataset()
+        self.intersections = traffic_calculator.get_intersections_dataset()
+        self.buildings = {}        # building_id -> BuildingRequest, in order added
+        self._contributions = {}   # building_id -> {facility: load}
+        self._contributors = {}    # facility -> {building_id: load}, in order added
+        self._loads = {}           # facility -> total added load
+        self._triggers = {}        # facility -> building_id that crossed the threshold
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.buildings)
+
+    def add_building(self, building, building_id=None):
+        """
+        Apply one building on top of the scenario
+        Returns: (building_id, statuses of facilities it pushed over threshold)
+        """
+        building_id = building_id or str(uuid.uuid4())
+        contribution = self.facility_loads(building)
+
+        with self._lock:
+            if len(self.buildings) >= settings.SCENARIO_MAX_BUILDINGS:
+                raise ValueError(f"Scenario is limited to {settings.SCENARIO_MAX_BUILDINGS} buildings")
+
+            self.buildings[building_id] = building
+            self._contributions[building_id] = contribution
+            crossed = []
+            for facility, load in contribution.items():
+                before = self._loads.get(facility, 0.0)
+                after = before + load
+                self._loads[facility] = after
+                self._contributors.setdefault(facility, {})[building_id] = load
+                if not self.is_over_threshold(facility, before) and self.is_over_threshold(facility, after):
+                    self._triggers[facility] = building_id
+                    crossed.append(facility)
+
+            return building_id, [self.facility_status(facility) for facility in crossed]
+
+    def remove_building(self, building_id):
+        """
+        Take one building out of the scenario
+        Only facilities it loaded are re-evaluated; their trigger is found by
+        replaying the remaining contributions in the order they were added.
+        Returns: statuses of the facilities it loaded
+        """
+        with self._lock:
+            if building_id not in self.buildings:
+                raise KeyError(building_id)
+
+            del self.buildings[building_id]
+            contribution = self._contributions.pop(building_id)
+            touched = []
+            for facility in contribution:
+                contributors = self._contributors[facility]
+                del contributors[building_id]
+                if not contributors:
+                    del self._contributors[facility]
+                    del self._loads[facility]
+                    self._triggers.pop(facility, None)
+                    continue
+
+                # Re-sum rather than subtract so float error never accumulates
+                self._loads[facility] = math.fsum(contributors.values())
+                self._triggers.pop(facility, None)
+                running = 0.0
+                for contributor_id, load in contributors.items():
+                    if not self.is_over_threshold(facility, running) and self.is_over_threshold(facility, running + load):
+                        self._triggers[facility] = contributor_id
+                        break
+                    running += load
+                touched.append(facility)
+
+            return [self.facility_status(facility) for facility in touched]
+
+    def building_analysis(self, building_id):
+        """
+        School, traffic and infrastructure results for one building with every
+        other building in the scenario applied as background load
+        """
+        with self._lock:
+            building = self.buildings[building_id]
+            own = self._contributions[building_id]
+            students = self._load_array("school", len(self.schools), own)
+            trips = self._load_array("intersection", len(self.intersections), own)
+            utilities = tuple(
+                self._loads.get(key, 0.0) - own.get(key, 0.0) for key in UTILITY_FACILITIES
+            )
+            triggered = [
+                self.facility_status(facility)
+                for facility, trigger in self._triggers.items() if trigger == building_id
+            ]
+
+        return {
+            "building_id": building_id,
+            "building": building.model_dump(),
+            "school_impact": school_analyzer.calculate_school_impact(
+                building.location, building.units, students, dataset=self.schools
+            ),
+            "traffic_impact": traffic_calculator.calculate_traffic(
+                building.location, building.units, trips, dataset=self.intersections
+            ),
+            "infrastructure": infrastructure_analyzer.calculate_infrastructure_impact(
+                building.location, building.units, utilities
+            ),
+            "triggered_thresholds": triggered
+        }
+
+    def summary(self):
+        """Scenario buildings, cumulative totals and every loaded facility"""
+        with self._lock:
+            facilities = [self.facility_status(facility) for facility in self._loads]
+            # Utility loads are totals; per-school and per-intersection loads
+            # overlap between facilities, so those totals come from the buildings
+            units = sum(building.units for building in self.buildings.values())
+            totals = {
+                "units": units,
+                "students": round(units * settings.STUDENTS_PER_UNIT, 1),
+                "pm_peak_trips": sum(
+                    traffic_calculator.peak_hour_trips(building.units) for building in self.buildings.values()
+                )
+            }
+            totals["water_demand"] = round(self._loads.get("water_main", 0.0), 1)
+            totals["sewer_demand"] = round(self._loads.get("sewer_line", 0.0), 1)
+            totals["power_demand"] = round(self._loads.get("substation", 0.0), 1)
+            buildings = [
+                {
+                    "building_id": building_id,
+                    "location": building.location.model_dump(),
+                    "units": building.units,
+                    "stories": building.stories
+                }
+                for building_id, building in self.buildings.items()
+            ]
+
+        facilities.sort(key=lambda f: (not f["over_threshold"], -f["utilization_pct"]))
+        return {
+            "scenario_id": self.id,
+            "name": self.name,
+            "created_at": self.created_at.isoformat(),
+            "building_count": len(buildings),
+            "buildings": buildings,
+            "totals": totals,
+            "facilities_over_threshold": sum(f["over_threshold"] for f in facilities),
+            "facilities": facilities
+        }
+
+    def facility_status(self, facility):
+        """Cumulative load, utilization and trigger building of one facility"""
+        load = self._loads.get(facility, 0.0)
+        status = self.facility_description(facility, load)
+        status["added_load"] = round(load, 1)
+        status["contributing_buildings"] = len(self._contributors.get(facility, ()))
+        status["over_threshold"] = self.is_over_threshold(facility, load)
+        # None while under threshold, or if it was already over before any building
+        status["triggered_by"] = self._triggers.get(facility)
+        return status
+
+    def _load_array(self, kind, size, exclude):
+        """Loads of one facility kind as an array indexed like its dataset"""
+        loads = np.zeros(size)
+        for facility, load in self._loads.items():
+            if isinstance(facility, tuple) and facility[0] == kind:
+                loads[facility[1]] = load - exclude.get(facility, 0.0)
+        return loads
+
+    def facility_loads(self, building):
+        """Load a building adds to each facility it reaches: {facility: load}"""
+        loads = {}
+
+        indices, _ = self.schools.within_radius(
+            building.location.lat, building.location.lng, school_analyzer.SCHOOL_RADIUS_M
+        )
+        for index, students in zip(indices, school_analyzer.school_students(self.schools, building.units, indices)):
+            if students > 0:
+                loads[("school", int(index))] = float(students)
+
+        indices, _, all_trips, _ = traffic_calculator.site_trips(
+            self.intersections, building.location, building.units
+        )
+        for index, trips in zip(indices, all_trips):
+            if trips > 0:
+                loads[("intersection", int(index))] = float(trips)
+
+        demands = infrastructure_analyzer.infrastructure_demands(building.units)
+        for key, (_, component, _) in UTILITY_FACILITIES.items():
+            loads[key] = demands[component]
+
+        return loads
+
+    def is_over_threshold(self, facility, load):
+        """
+        Whether a facility is over its threshold with this much added load:
+        schools over 100% capacity, intersections degraded past their current
+        LOS, utilities over their upgrade threshold
+        """
+        if facility in UTILITY_FACILITIES:
+            return load > UTILITY_FACILITIES[facility][2]
+
+        kind, index = facility
+        if kind == "school":
+            school = self.schools.records[index]
+            return school["enrollment"] + load > school["capacity"]
+
+        intersection = self.intersections.records[index]
+        projected_los = traffic_calculator.calculate_los(intersection["current_volume"] + load)
+        return projected_los > intersection["current_los"]
+
+    def facility_description(self, facility, load):
+        """Name, type and utilization of a facility under a given added load"""
+        if facility in UTILITY_FACILITIES:
+            name, _, threshold = UTILITY_FACILITIES[facility]
+            return {
+                "type": "infrastructure",
+                "facility": facility,
+                "name": name,
+                "utilization_pct": round(load / threshold * 100, 1)
+            }
+
+        kind, index = facility
+        if kind == "school":
+            school = self.schools.records[index]
+            return {
+                "type": "school",
+                "facility": f"school:{index}",
+                "name": school["name"],
+                "enrollment": school["enrollment"],
+                "capacity": school["capacity"],
+                "utilization_pct": round((school["enrollment"] + load) / school["capacity"] * 100, 1)
+            }
+
+        intersection = self.intersections.records[index]
+        volume = intersection["current_volume"] + load
+        return {
+            "type": "intersection",
+            "facility": f"intersection:{index}",
+            "name": intersection["name"],
+            "current_los": intersection["current_los"],
+            "projected_los": traffic_calculator.calculate_los(volume),
+            # Against the LOS F breakdown volume
+            "utilization_pct": round(volume / 1600 * 100, 1)
+        }
+
+
+def create_scenario(name=None, buildings=()):
+    """
+    Create a scenario seeded with buildings applied in order, and register
+    it once seeded (blocking; the API runs it off the event loop)
+    """
+    scenario = Scenario(name)
+    for building in buildings:
+        scenario.add_building(building)
+    _SCENARIOS.set(scenario.id, scenario)
+    return scenario
+
+
+def get_scenario(scenario_id):
+    """Registered scenario, or None if unknown or expired"""
+    return _SCENARIOS.get(scenario_id)
+
+
+def delete_scenario(scenario_id):
+    """Forget a scenario; returns whether it existed"""
+    return _SCENARIOS.delete(scenario_id)
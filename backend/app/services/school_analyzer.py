@@ -1,119 +1,176 @@
 from app.config import settings
-import math
+from app.services.columnar import file_version, prune_tables, read_table, records_to_columns, write_table
+from app.services.datasets import registry as datasets
+from app.services.geo import PointDataset
 import json
 import os
 
-# Cache for school data (loaded once at startup)
-_SCHOOLS_CACHE = None
+import numpy as np
 
+# Source: Atlanta Public Schools directory + Open Data Portal
+SCHOOLS_FILE = "atlanta_schools.json"
 
-def load_schools_data():
+# Columnar copy of the school data (see build_school_columns)
+SCHOOL_COLUMNS = {
+    "name": "str",
+    "lat": "float64",
+    "lng": "float64",
+    "grade_level": "category",
+    "enrollment": "int32",
+    "capacity": "int32",
+}
+
+# Only include schools within 2.5 miles (realistic catchment area)
+SCHOOL_RADIUS_M = 4000
+
+# Grade level distribution (industry standard)
+GRADE_SHARES = {"elementary": 0.4, "middle": 0.3, "high": 0.3}
+
+
+def schools_columns_dir():
+    """Directory holding the columnar school tables, one per source version"""
+    return settings.SCHOOLS_COLUMNS_DIR or os.path.join(os.path.dirname(__file__), '../data/columns/schools')
+
+
+def build_school_columns(json_path=None, base_dir=None):
     """
-    Load Atlanta Public Schools data from JSON file
-    Data is cached after first load for performance
-    Source: Atlanta Public Schools directory + Open Data Portal
+    Convert the school JSON into a memory-mappable columnar table
+    The table lives in a directory named after the JSON's content hash, so an
+    edited JSON is converted again on next load. Returns the table directory.
     """
-    global _SCHOOLS_CACHE
-    
-    if _SCHOOLS_CACHE is None:
-        # Get the path to the data file
-        current_dir = os.path.dirname(__file__)
-        data_path = os.path.join(current_dir, '../data/atlanta_schools.json')
-        
-        # Load the JSON file
-        with open(data_path, 'r') as f:
-            data = json.load(f)
-            _SCHOOLS_CACHE = data['schools']
-            print(f"✅ Loaded {len(_SCHOOLS_CACHE)} schools from atlanta_schools.json")
-    
-    return _SCHOOLS_CACHE
+    json_path = json_path or datasets.path("schools")
+    base_dir = os.path.normpath(base_dir or schools_columns_dir())
+    version = file_version(json_path)
+    with open(json_path, 'r') as f:
+        schools = json.load(f)['schools']
+    columns, categories = records_to_columns(schools, SCHOOL_COLUMNS)
+    table_dir = write_table(base_dir, version, columns, categories, source=os.path.basename(json_path))
+    prune_tables(base_dir, version)
+    return table_dir
+
+
+def load_school_columns(json_path, version):
+    """Open the columnar school table for a JSON version, converting it if missing"""
+    base_dir = os.path.normpath(schools_columns_dir())
+    try:
+        table = read_table(os.path.join(base_dir, version))
+    except (OSError, ValueError):
+        table = read_table(build_school_columns(json_path, base_dir))
+    print(f"✅ Mapped {len(table)} schools from columnar table {table.version}")
+    return table
 
 
-def calculate_school_impact(location, units):
+def build_schools_dataset(path, version):
+    """
+    Schools as a PointDataset over the columnar table
+    `records` is the table; per-school fields are typed arrays
+    (dataset.records["enrollment"]) and dataset.grade_shares holds each
+    school's share of generated students.
+    """
+    table = load_school_columns(path, version)
+    dataset = PointDataset(table, name="schools", lats=table["lat"], lngs=table["lng"])
+    shares_by_code = table.codes("grade_level", GRADE_SHARES, GRADE_SHARES["high"])
+    dataset.grade_shares = shares_by_code[table["grade_level"]]
+    return dataset
+
+
+datasets.register("schools", SCHOOLS_FILE, build_schools_dataset)
+
+
+def get_schools_dataset():
+    """Schools as a PointDataset for vectorized distance queries"""
+    return datasets.get("schools")
+
+
+def calculate_school_impact(location, units, background_students=None, dataset=None):
     """
     Calculate school impact using Atlanta Public Schools data
     Data source: JSON file from Atlanta Public Schools directory (48 schools)
+    background_students: optional new students per school (indexed like the
+    dataset) already added by other buildings in a scenario
+    """
+    dataset = dataset or get_schools_dataset()
+    indices, distances = dataset.within_radius(location.lat, location.lng, SCHOOL_RADIUS_M)
+    return build_school_impact(dataset, units, indices, distances, background_students)
+
+
+def calculate_school_impact_batch(locations, units_list):
     """
+    Calculate school impact for many sites with one vectorized radius query
+    Returns a list of results in the same order as locations
+    """
+    dataset = get_schools_dataset()
+    nearby = dataset.within_radius_many(
+        [loc.lat for loc in locations], [loc.lng for loc in locations], SCHOOL_RADIUS_M
+    )
+    return [
+        build_school_impact(dataset, units, indices, distances)
+        for units, (indices, distances) in zip(units_list, nearby)
+    ]
+
+
+def school_students(dataset, units, indices):
+    """New students a building sends to each of the given schools"""
+    students = units * settings.STUDENTS_PER_UNIT
+    return students * dataset.grade_shares[indices]
+
+
+def build_school_impact(dataset, units, indices, distances, background_students=None):
+    """Build the school impact result for the schools found near a site"""
     students = units * settings.STUDENTS_PER_UNIT
+    table = dataset.records
     
-    # ✅ Load schools from JSON file (cached after first load)
-    all_schools = load_schools_data()
+    # Determine which students go to each school based on grade level
+    new_students = school_students(dataset, units, indices)
+    
+    # Students other buildings in the scenario already send there
+    other_students = background_students[indices] if background_students is not None else np.zeros(len(indices))
+    
+    # Calculate new enrollment and capacity percentage
+    enrollment = table["enrollment"][indices]
+    capacity = table["capacity"][indices]
+    capacity_pcts = ((enrollment + other_students + new_students) / capacity) * 100
+    
+    # Gather each column once; the loop below only assembles output rows
+    grade_labels = table.categories["grade_level"]
+    rows = zip(
+        table["name"][indices].tolist(),
+        distances.tolist(),
+        table["grade_level"][indices].tolist(),
+        enrollment.tolist(),
+        capacity.tolist(),
+        capacity_pcts.tolist(),
+        other_students.tolist()
+    )
     
     schools = []
     bottlenecks = []
     
-    # Grade level distribution (industry standard)
-    elementary_students = students * 0.4
-    middle_students = students * 0.3
-    high_students = students * 0.3
-    
-    for school_data in all_schools:
-        # Calculate ACTUAL distance from clicked location
-        distance = calculate_distance(
-            location.lat, location.lng,
-            school_data["lat"], school_data["lng"]
-        )
-        
-        # Only include schools within 2.5 miles (realistic catchment area)
-        if distance > 4000:  # 2.5 miles in meters
-            continue
-        
-        # Determine which students go to this school based on grade level
-        if school_data["grade_level"] == "elementary":
-            new_students = elementary_students
-        elif school_data["grade_level"] == "middle":
-            new_students = middle_students
-        else:  # high
-            new_students = high_students
-        
-        # Calculate new enrollment and capacity percentage
-        new_enrollment = school_data["enrollment"] + new_students
-        capacity_pct = (new_enrollment / school_data["capacity"]) * 100
-        
+    for name, distance, grade_code, school_enrollment, school_capacity, capacity_pct, scenario_students in rows:
         school_info = {
-            "name": school_data["name"],
+            "name": name,
             "distance": round(distance, 1),
-            "grade_level": school_data["grade_level"],
-            "enrollment": school_data["enrollment"],
-            "capacity": school_data["capacity"],
+            "grade_level": grade_labels[grade_code],
+            "enrollment": school_enrollment,
+            "capacity": school_capacity,
             "capacity_pct": round(capacity_pct, 1)
         }
+        if background_students is not None:
+            school_info["scenario_students"] = round(scenario_students, 1)
         schools.append(school_info)
         
         # Identify bottlenecks (schools over capacity)
         if capacity_pct > 100:
             severity = "HIGH" if capacity_pct > 120 else "MEDIUM"
             bottlenecks.append({
-                "school": school_data["name"],
+                "school": name,
                 "capacity_pct": round(capacity_pct, 1),
                 "severity": severity,
-                "message": f"{school_data['name']} will be at {capacity_pct:.0f}% capacity"
+                "message": f"{name} will be at {capacity_pct:.0f}% capacity"
             })
     
-    # Sort by distance (nearest first)
-    schools.sort(key=lambda s: s["distance"])
-    
     return {
         "students_generated": round(students, 1),
         "schools": schools,
         "bottlenecks": bottlenecks
     }
-
-
-def calculate_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
-    """
-    Calculate distance between two points using Haversine formula
-    Returns: Distance in meters
-    """
-    R = 6371000  # Earth radius in meters
-    
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lng2 - lng1)
-    
-    a = (math.sin(delta_phi / 2) ** 2 +
-         math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2)
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    
-    return R * c
\ No newline at end of file
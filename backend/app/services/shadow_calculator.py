@@ -1,57 +1,442 @@
+"""
+Shadow casting from a solar-position model
+Sun azimuth/altitude come from the NOAA solar equations, vectorized over time
+steps. Each shadow is the footprint swept along the shadow vector of the
+extruded building (a Minkowski sum), computed in a city-wide metric
+projection, and affected parcels are found through a spatial index.
+"""
+
+from datetime import date, datetime, time, timedelta
+import json
 import math
+import os
+import threading
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import shapely
+from shapely.geometry import mapping, shape
+
+from app.config import settings
+
+FEET_PER_STORY = 12
+SQFT_PER_SQM = 10.7639
+M_PER_FT = 0.3048
+
+# City-wide equirectangular projection (meters); distortion is negligible
+# across the metro area and keeps every parcel grid globally aligned
+CITY_ORIGIN_LAT, CITY_ORIGIN_LNG = 33.75, -84.39
+M_PER_DEG_LAT = 110574.0
+M_PER_DEG_LNG = 111320.0 * math.cos(math.radians(CITY_ORIGIN_LAT))
+
+# Local times reported in shadows_by_time
+REPORT_TIMES = [(9, 0), (12, 0), (15, 0), (17, 0)]
 
+# Default study day: the winter solstice, when shadows are longest, of a
+# fixed year so cached and saved results never depend on the current year
+DEFAULT_STUDY_DATE = date(2025, 12, 21)
 
-def calculate_shadows(location, footprint, stories):
+_PARCEL_INDEX = None
+_PARCEL_LOCK = threading.Lock()
+
+
+def calculate_shadows(location, footprint, stories, study_date=None):
     """
-    Calculate shadow impact
+    Calculate shadow impact on one day (default: DEFAULT_STUDY_DATE, the
+    winter solstice)
     Returns dict (not Pydantic object)
     """
-    building_height = stories * 12
-    
-    sun_positions = [
-        {"time": "9:00 AM", "azimuth": 120, "altitude": 25},
-        {"time": "12:00 PM", "azimuth": 180, "altitude": 55},
-        {"time": "3:00 PM", "azimuth": 240, "altitude": 35},
-        {"time": "5:00 PM", "azimuth": 270, "altitude": 15}
-    ]
-    
+    study_date = study_date or DEFAULT_STUDY_DATE
+    tz = ZoneInfo(settings.SHADOW_TIMEZONE)
+    height_m = stories * FEET_PER_STORY * M_PER_FT
+    footprint_xy = footprint_to_city_xy(footprint)
+    footprint_geom = shapely.make_valid(shapely.Polygon(footprint_xy))
+    parcels = get_parcel_index()
+    site = parcels.site(footprint_geom)
+
+    # Hourly sweep over the day for the union, plus the reported times
+    local_times = [datetime.combine(study_date, time(hour), tz) for hour in range(24)]
+    local_times += [datetime.combine(study_date, time(h, m), tz) for h, m in REPORT_TIMES]
+    azimuth, altitude = solar_position(to_utc_seconds(local_times), location.lat, location.lng)
+    shadows, lengths = project_shadows(footprint_xy, height_m, azimuth, altitude)
+
     shadows_by_time = []
-    affected_parcels_set = set()
-    
-    for sun in sun_positions:
-        altitude_rad = math.radians(sun["altitude"])
-        shadow_length = building_height / math.tan(altitude_rad)
-        shadow_area_sqft = calculate_footprint_area(footprint) * (1 + shadow_length / 100)
-        affected_count = int(shadow_area_sqft / 5000)
-        
+    for i, (hour, minute) in enumerate(REPORT_TIMES):
+        step = 24 + i
+        shadow = shadow_at(shadows[step])
+        sun_up = shadow is not None
+        affected = parcels.affected(shadow, site) if sun_up else np.empty(0)
         shadows_by_time.append({
-            "time": sun["time"],
-            "shadow_area_sqft": shadow_area_sqft,
-            "affected_parcels": affected_count,
-            "shadow_geometry": footprint
+            "time": f"{hour % 12 or 12}:{minute:02d} {'AM' if hour < 12 else 'PM'}",
+            "azimuth": round(float(azimuth[step]), 1),
+            "altitude": round(float(altitude[step]), 1),
+            "shadow_length_ft": round(float(lengths[step] / M_PER_FT), 1) if sun_up else 0,
+            "shadow_area_sqft": round(shadow_area_sqft(shadow, footprint_geom), 1) if sun_up else 0,
+            "affected_parcels": int(len(affected)),
+            "shadow_geometry": exterior_lnglat(shadow) if sun_up else footprint
         })
-        
-        affected_parcels_set.add(affected_count)
-    
+
+    daily = union_shadows(shadows[:24])
+    daily_affected = parcels.affected(daily, site) if daily is not None else np.empty(0)
+
     # Return dict (not object)
     return {
+        "date": study_date.isoformat(),
         "shadows_by_time": shadows_by_time,
-        "total_affected_parcels": sum(affected_parcels_set)
+        "daily_shadow_area_sqft": round(shadow_area_sqft(daily, footprint_geom), 1) if daily is not None else 0,
+        "daily_shadow_geometry": geometry_lnglat(daily) if daily is not None else None,
+        "total_affected_parcels": int(len(daily_affected)),
+        "parcel_source": parcels.source
+    }
+
+
+def daily_shadow_areas(location, footprint, stories_list, study_date=None):
+    """
+    daily_shadow_area_sqft of calculate_shadows for each story count, with the
+    sun positions and footprint pieces computed once (no parcel lookups)
+    """
+    study_date = study_date or DEFAULT_STUDY_DATE
+    tz = ZoneInfo(settings.SHADOW_TIMEZONE)
+    footprint_xy = footprint_to_city_xy(footprint)
+    footprint_geom = shapely.make_valid(shapely.Polygon(footprint_xy))
+
+    local_times = [datetime.combine(study_date, time(hour), tz) for hour in range(24)]
+    azimuth, altitude = solar_position(to_utc_seconds(local_times), location.lat, location.lng)
+
+    areas = []
+    for stories in stories_list:
+        shadows, _ = project_shadows(footprint_xy, stories * FEET_PER_STORY * M_PER_FT, azimuth, altitude)
+        daily = union_shadows(shadows)
+        areas.append(round(shadow_area_sqft(daily, footprint_geom), 1) if daily is not None else 0)
+    return areas
+
+
+def calculate_shadow_sweep(location, footprint, stories, start_date, end_date,
+                           step_minutes=60, start_hour=0, end_hour=24):
+    """
+    Shadow envelope over a date range, sampled every step_minutes between
+    start_hour and end_hour local time (e.g. an hourly sweep over a year)
+    Returns dict with the union shadow and the parcels it touches
+    """
+    tz = ZoneInfo(settings.SHADOW_TIMEZONE)
+    height_m = stories * FEET_PER_STORY * M_PER_FT
+    footprint_xy = footprint_to_city_xy(footprint)
+    footprint_geom = shapely.make_valid(shapely.Polygon(footprint_xy))
+
+    utc_seconds = sweep_utc_seconds(start_date, end_date, step_minutes, start_hour, end_hour, tz)
+    azimuth, altitude = solar_position(utc_seconds, location.lat, location.lng)
+    shadows, lengths = project_shadows(footprint_xy, height_m, azimuth, altitude)
+
+    daylight = np.not_equal(shadows[:, 0], None)
+    envelope = union_shadows(shadows)
+    parcels = get_parcel_index()
+    affected = parcels.affected(envelope, parcels.site(footprint_geom)) if envelope is not None else np.empty(0)
+
+    return {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "step_minutes": step_minutes,
+        "time_steps": int(len(utc_seconds)),
+        "daylight_steps": int(daylight.sum()),
+        "max_shadow_length_ft": round(float(lengths[daylight].max() / M_PER_FT), 1) if daylight.any() else 0,
+        "shadow_area_sqft": round(shadow_area_sqft(envelope, footprint_geom), 1) if envelope is not None else 0,
+        "shadow_geometry": geometry_lnglat(envelope) if envelope is not None else None,
+        "total_affected_parcels": int(len(affected)),
+        "parcel_source": parcels.source
     }
 
 
-def calculate_footprint_area(footprint):
-    """Calculate area using Shoelace formula"""
-    if len(footprint) < 3:
-        return 0
-    
-    area = 0
-    for i in range(len(footprint)):
-        j = (i + 1) % len(footprint)
-        area += footprint[i][0] * footprint[j][1]
-        area -= footprint[j][0] * footprint[i][1]
-    
-    area = abs(area) / 2.0
-    area_sqft = area * 10000000
-    
-    return area_sqft
\ No newline at end of file
+# --- Solar position ----------------------------------------------------------
+
+def to_utc_seconds(datetimes):
+    """Unix seconds for a list of timezone-aware datetimes"""
+    return np.array([dt.timestamp() for dt in datetimes], dtype=np.float64)
+
+
+def sweep_utc_seconds(start_date, end_date, step_minutes, start_hour, end_hour, tz):
+    """
+    Unix seconds for every sample in a local-time sweep
+    The UTC offset is resolved once per day rather than once per sample.
+    """
+    days = (end_date - start_date).days + 1
+    minutes = np.arange(start_hour * 60, end_hour * 60, step_minutes, dtype=np.float64)
+    day_starts = np.array([
+        datetime.combine(start_date + timedelta(days=d), time(12), tz).timestamp() - 12 * 3600
+        for d in range(days)
+    ])
+    return (day_starts[:, None] + minutes[None, :] * 60).ravel()
+
+
+def solar_position(utc_seconds, lat, lng):
+    """
+    Sun azimuth (degrees clockwise from north) and altitude (degrees above
+    the horizon) from the NOAA solar calculator equations
+    """
+    utc_seconds = np.asarray(utc_seconds, dtype=np.float64)
+    julian_day = utc_seconds / 86400.0 + 2440587.5
+    jc = (julian_day - 2451545.0) / 36525.0
+
+    mean_long = np.mod(280.46646 + jc * (36000.76983 + jc * 0.0003032), 360)
+    mean_anom = 357.52911 + jc * (35999.05029 - 0.0001537 * jc)
+    eccent = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
+    m_rad = np.radians(mean_anom)
+    eq_center = (np.sin(m_rad) * (1.914602 - jc * (0.004817 + 0.000014 * jc))
+                 + np.sin(2 * m_rad) * (0.019993 - 0.000101 * jc)
+                 + np.sin(3 * m_rad) * 0.000289)
+    omega = np.radians(125.04 - 1934.136 * jc)
+    apparent_long = mean_long + eq_center - 0.00569 - 0.00478 * np.sin(omega)
+    mean_obliq = 23 + (26 + (21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))) / 60) / 60
+    obliq = np.radians(mean_obliq + 0.00256 * np.cos(omega))
+    declination = np.arcsin(np.sin(obliq) * np.sin(np.radians(apparent_long)))
+
+    var_y = np.tan(obliq / 2) ** 2
+    l_rad = np.radians(mean_long)
+    eq_time = 4 * np.degrees(
+        var_y * np.sin(2 * l_rad) - 2 * eccent * np.sin(m_rad)
+        + 4 * eccent * var_y * np.sin(m_rad) * np.cos(2 * l_rad)
+        - 0.5 * var_y ** 2 * np.sin(4 * l_rad) - 1.25 * eccent ** 2 * np.sin(2 * m_rad)
+    )
+
+    utc_minutes = np.mod(utc_seconds, 86400.0) / 60.0
+    true_solar_time = np.mod(utc_minutes + eq_time + 4 * lng, 1440)
+    hour_angle = np.radians(true_solar_time / 4 - 180)
+
+    lat_rad = math.radians(lat)
+    cos_zenith = (math.sin(lat_rad) * np.sin(declination)
+                  + math.cos(lat_rad) * np.cos(declination) * np.cos(hour_angle))
+    zenith = np.arccos(np.clip(cos_zenith, -1, 1))
+    altitude = 90 - np.degrees(zenith)
+
+    cos_az = (math.sin(lat_rad) * np.cos(zenith) - np.sin(declination)) / (math.cos(lat_rad) * np.sin(zenith))
+    az = np.degrees(np.arccos(np.clip(cos_az, -1, 1)))
+    azimuth = np.where(hour_angle > 0, np.mod(az + 180, 360), np.mod(540 - az, 360))
+    return azimuth, altitude
+
+
+# --- Shadow geometry ---------------------------------------------------------
+
+def footprint_to_city_xy(footprint):
+    """
+    Footprint [[lng, lat], ...] as city-projection meters (N, 2)
+    GeoJSON [lng, lat, z] vertices are accepted; z is ignored.
+    """
+    coords = np.asarray(footprint, dtype=np.float64)
+    if coords.ndim != 2 or coords.shape[1] < 2:
+        raise ValueError("footprint must be a list of [lng, lat] vertices")
+    coords = coords[:, :2]
+    if len(coords) > 1 and np.allclose(coords[0], coords[-1]):
+        coords = coords[:-1]
+    distinct = len(np.unique(coords, axis=0))
+    if distinct < 3:
+        raise ValueError(f"footprint needs at least 3 distinct vertices, got {distinct}")
+    return lnglat_to_city_xy(coords)
+
+
+def lnglat_to_city_xy(coords):
+    """Project lng/lat pairs to city meters"""
+    coords = np.asarray(coords, dtype=np.float64)
+    return np.column_stack((
+        (coords[:, 0] - CITY_ORIGIN_LNG) * M_PER_DEG_LNG,
+        (coords[:, 1] - CITY_ORIGIN_LAT) * M_PER_DEG_LAT
+    ))
+
+
+def city_xy_to_lnglat(coords):
+    """Inverse of lnglat_to_city_xy"""
+    coords = np.asarray(coords, dtype=np.float64)
+    return np.column_stack((
+        coords[:, 0] / M_PER_DEG_LNG + CITY_ORIGIN_LNG,
+        coords[:, 1] / M_PER_DEG_LAT + CITY_ORIGIN_LAT
+    ))
+
+
+def project_shadows(footprint_xy, height_m, azimuth, altitude):
+    """
+    Shadow of the extruded footprint at each time step, as convex pieces
+    Each convex piece of the footprint casts the hull of itself and its
+    copy moved along the shadow vector; a step's shadow is their union.
+    Returns: (object array (steps, pieces) of polygons, None where the sun is
+    too low; shadow lengths in meters)
+    """
+    sun_up = altitude > settings.SHADOW_MIN_ALTITUDE_DEG
+    lengths = np.where(sun_up, height_m / np.tan(np.radians(np.maximum(altitude, 1e-3))), 0.0)
+
+    # Shadows fall directly away from the sun
+    az_rad = np.radians(azimuth)
+    offsets = np.column_stack((-lengths * np.sin(az_rad), -lengths * np.cos(az_rad)))
+
+    pieces = convex_pieces(footprint_xy)
+    shadows = np.full((len(altitude), len(pieces)), None, dtype=object)
+    steps = np.nonzero(sun_up)[0]
+    for j, piece in enumerate(pieces):
+        moved = piece[None, :, :] + offsets[steps][:, None, :]
+        shadows[steps, j] = shapely.convex_hull(shapely.multipoints(
+            np.concatenate((np.broadcast_to(piece, moved.shape), moved), axis=1)
+        ))
+    return shadows, lengths
+
+
+def convex_pieces(footprint_xy):
+    """
+    Split a footprint into convex pieces: itself when convex (or degenerate),
+    otherwise ear-clipped triangles merged back into larger convex pieces
+    """
+    if len(footprint_xy) < 4:
+        return [footprint_xy]
+    polygon = shapely.Polygon(footprint_xy)
+    if not polygon.is_valid or math.isclose(polygon.area, shapely.convex_hull(polygon).area, rel_tol=1e-9):
+        # Self-intersecting footprints fall back to their hull
+        return [footprint_xy]
+
+    points = footprint_xy if shapely.is_ccw(polygon.exterior) else footprint_xy[::-1]
+    remaining = list(range(len(points)))
+    triangles = []
+    while len(remaining) > 3:
+        for k in range(len(remaining)):
+            a, b, c = (points[remaining[(k + d) % len(remaining)]] for d in (-1, 0, 1))
+            if np.cross(b - a, c - b) <= 0:
+                continue  # reflex or collinear vertex
+            others = [points[i] for i in remaining if i not in (remaining[k - 1], remaining[k],
+                                                                  remaining[(k + 1) % len(remaining)])]
+            if others and shapely.contains(shapely.Polygon([a, b, c]), shapely.points(others)).any():
+                continue
+            triangles.append(np.array([a, b, c]))
+            del remaining[k]
+            break
+        else:
+            # No ear found (degenerate ring): keep what is left as one piece
+            break
+    triangles.append(points[remaining])
+
+    # Merge neighbouring triangles while the result stays convex, since each
+    # piece costs one hull per time step
+    pieces = [shapely.Polygon(t) for t in triangles]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(pieces)):
+            for j in range(i + 1, len(pieces)):
+                union = shapely.union(pieces[i], pieces[j])
+                if union.geom_type == "Polygon" and \
+                        math.isclose(union.area, shapely.convex_hull(union).area, rel_tol=1e-9):
+                    pieces[i] = union
+                    del pieces[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return [np.asarray(piece.exterior.coords)[:-1] for piece in pieces]
+
+
+def shadow_at(pieces):
+    """Shadow polygon for one time step from its convex pieces, or None"""
+    if pieces[0] is None:
+        return None
+    return shapely.union_all(pieces) if len(pieces) > 1 else pieces[0]
+
+
+def union_shadows(shadows):
+    """Union of every daylight shadow piece, or None"""
+    pieces = shadows[np.not_equal(shadows, None)]
+    if len(pieces) == 0:
+        return None
+    return shapely.union_all(pieces)
+
+
+def shadow_area_sqft(shadow, footprint_geom):
+    """Shadow area cast beyond the building's own footprint"""
+    return float(shapely.area(shapely.difference(shadow, footprint_geom))) * SQFT_PER_SQM
+
+
+def exterior_lnglat(geometry):
+    """Exterior ring [[lng, lat], ...] of a polygon in city meters"""
+    polygon = max(getattr(geometry, "geoms", [geometry]), key=lambda g: g.area)
+    # Point/line footprints sweep to a line; report its vertices instead
+    coords = polygon.exterior.coords if polygon.geom_type == "Polygon" else polygon.coords
+    ring = city_xy_to_lnglat(np.asarray(coords))
+    return np.round(ring, 7).tolist()
+
+
+def geometry_lnglat(geometry):
+    """GeoJSON geometry dict in lng/lat for a geometry in city meters"""
+    return mapping(shapely.set_precision(shapely.transform(geometry, city_xy_to_lnglat), 1e-7))
+
+
+# --- Parcels -----------------------------------------------------------------
+
+class ParcelIndex:
+    """
+    Parcels in city meters behind an STRtree. Without a parcel file, a
+    city-wide grid of PARCEL_SIZE_SQFT square lots stands in for parcels.
+    At most PARCEL_MAX_GRID_LOTS grid lots are enumerated for one geometry.
+    A parcel counts as shaded once the shadow reaches SHADOW_MIN_OVERLAP_M
+    into it, tested against parcels inset by that distance (a plain
+    intersects test, no polygon clipping).
+    """
+
+    def __init__(self, polygons=None):
+        self.inset_m = settings.SHADOW_MIN_OVERLAP_M
+        self.polygons = None
+        self.tree = None
+        if polygons is not None:
+            polygons = np.asarray(polygons, dtype=object)
+            insets = shapely.buffer(polygons, -self.inset_m)
+            # Parcels narrower than twice the inset count on any contact
+            self.polygons = np.where(shapely.is_empty(insets), polygons, insets)
+            self.tree = shapely.STRtree(self.polygons)
+        self.source = "file" if polygons is not None else "synthetic_grid"
+        self.lot_size_m = math.sqrt(settings.PARCEL_SIZE_SQFT / SQFT_PER_SQM)
+
+    def __len__(self):
+        return len(self.polygons) if self.polygons is not None else 0
+
+    def affected(self, shadow, site):
+        """
+        Ids of parcels the shadow reaches into, excluding the site parcels
+        the building itself stands on (see site())
+        """
+        return np.setdiff1d(self._overlapping(shadow), site)
+
+    def site(self, footprint_geom):
+        """Ids of the parcels under the building footprint"""
+        return self._overlapping(footprint_geom)
+
+    def _overlapping(self, geometry):
+        shapely.prepare(geometry)
+        if self.tree is not None:
+            return self.tree.query(geometry, predicate="intersects").astype(np.int64)
+
+        # Enumerate grid lots under the geometry's bounding box
+        size = self.lot_size_m
+        min_x, min_y, max_x, max_y = geometry.bounds
+        cols = np.arange(math.floor(min_x / size), math.floor(max_x / size) + 1)
+        rows = np.arange(math.floor(min_y / size), math.floor(max_y / size) + 1)
+        if len(cols) * len(rows) > settings.PARCEL_MAX_GRID_LOTS:
+            raise ValueError(
+                f"Shadow spans {len(cols) * len(rows):,} parcel lots; "
+                f"at most {settings.PARCEL_MAX_GRID_LOTS:,} are enumerated"
+            )
+        grid_cols, grid_rows = (g.ravel() for g in np.meshgrid(cols, rows))
+        inset = min(self.inset_m, size / 4)
+        lots = shapely.box(grid_cols * size + inset, grid_rows * size + inset,
+                           (grid_cols + 1) * size - inset, (grid_rows + 1) * size - inset)
+        hit = shapely.intersects(geometry, lots)
+        return (grid_rows[hit].astype(np.int64) * 10_000_000 + grid_cols[hit]).astype(np.int64)
+
+
+def get_parcel_index():
+    """ParcelIndex built once from PARCELS_DATA_PATH (or the synthetic grid)"""
+    global _PARCEL_INDEX
+
+    if _PARCEL_INDEX is None:
+        with _PARCEL_LOCK:
+            if _PARCEL_INDEX is None:
+                polygons = None
+                if settings.PARCELS_DATA_PATH and os.path.exists(settings.PARCELS_DATA_PATH):
+                    with open(settings.PARCELS_DATA_PATH, 'r') as f:
+                        features = json.load(f)["features"]
+                    polygons = [shapely.transform(shape(f["geometry"]), lnglat_to_city_xy) for f in features]
+                    print(f"✅ Loaded {len(polygons)} parcels from {settings.PARCELS_DATA_PATH}")
+                _PARCEL_INDEX = ParcelIndex(polygons)
+
+    return _PARCEL_INDEX
@@ -0,0 +1,98 @@
+"""
+Single-flight coalescing of identical in-flight work
+When many clients ask for the same thing at once (a shared link opened in a
+planning meeting), the first caller starts the computation and everyone who
+arrives while it runs awaits that same task instead of starting their own.
+Nothing is kept once the task finishes; repeat requests after that are the
+result caches' job.
+
+The shared task is shielded from its callers: a client that disconnects
+stops waiting, but the work carries on for everyone else. An exception
+reaches every waiter.
+
+Flights live on the event loop (no locks needed). Dataset loads are already
+coalesced by the registry's per-dataset lock (see datasets.py), and the
+structures derived from datasets are built under their own locks.
+"""
+
+import asyncio
+import hashlib
+import json
+
+from app.services.metrics import collector
+
+# Every SingleFlight, for the /metrics collectors
+_FLIGHTS = []
+
+
+def canonical_key(payload) -> str:
+    """Stable hash of a JSON-serializable payload (key order does not matter)"""
+    text = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Concurrent run() calls with the same key share one execution"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.executions = 0
+        self.coalesced = 0
+        self._tasks = {}  # key -> in-flight asyncio.Task
+        _FLIGHTS.append(self)
+
+    def __len__(self):
+        return len(self._tasks)
+
+    async def run(self, key, fn, *args, **kwargs):
+        """
+        Await fn(*args, **kwargs), or the identical call already in flight
+        Every waiter receives the same result object; copy it before mutating.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Mark the exception retrieved even if every waiter has gone
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        """In-flight count and how many calls shared another's execution"""
+        calls = self.executions + self.coalesced
+        return {
+            "name": self.name,
+            "in_flight": len(self._tasks),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / calls, 4) if calls else 0.0
+        }
+
+
+def single_flight_stats():
+    """Counters of every single-flight group"""
+    return {flight.name: flight.stats() for flight in _FLIGHTS}
+
+
+@collector("citytrotter_single_flight_calls_total", "Calls by single-flight group and whether they "
+           "executed or joined an identical in-flight call", "counter", ("flight", "outcome"))
+def _single_flight_calls():
+    samples = []
+    for flight in _FLIGHTS:
+        samples.append(((flight.name, "executed"), flight.executions))
+        samples.append(((flight.name, "coalesced"), flight.coalesced))
+    return samples
+
+
+@collector("citytrotter_single_flight_in_flight", "Distinct computations currently in flight", "gauge", ("flight",))
+def _single_flight_in_flight():
+    return [((flight.name,), len(flight)) for flight in _FLIGHTS]
@@ -0,0 +1,239 @@
+"""
+Site-suitability search: where a building program fits with the fewest bottlenecks
+Candidates (a grid over a bbox, or caller-supplied points such as parcel
+centroids) are evaluated with the same models as a full analysis, but as
+whole-array operations over every candidate at once. Cheap checks run first
+and prune candidates before the costlier models see them:
+
+1. zoning height limit (one index query)
+2. straight-line distance to the nearest station, a lower bound on the walk
+   (one KD-tree query); survivors then get the walk-network distance
+3. schools and intersections in range (one radius query each), with
+   distance-decay trips at every intersection
+
+Candidates are ranked by bottleneck count (as identify_bottlenecks counts
+them), then by the heatmap impact score. With a road network installed, the
+best SITE_SEARCH_ROUTED_CANDIDATES are then re-scored with trips routed over
+the network (as calculate_traffic assigns them) and re-ranked; tracing routes
+for every cell of a city-wide grid would take far longer than the rest of
+the search. The top k keep a minimum separation so they are distinct sites
+rather than neighbouring cells of one hot spot.
+"""
+
+import time
+
+import numpy as np
+
+from app.config import settings
+from app.models.analysis import Location
+from app.services import economic_analyzer, school_analyzer, traffic_calculator, transit_analyzer, zoning_checker
+from app.services.geo import haversine_pairs
+from app.services.heatmap_generator import (
+    ATLANTA_BBOX,
+    COMPONENT_WEIGHTS,
+    infrastructure_pressure,
+    school_pressure_score,
+    traffic_pressure_score,
+    transit_pressure_score
+)
+from app.services.infrastructure_analyzer import calculate_infrastructure_impact
+
+
+def candidate_grid(bbox, resolution):
+    """Cell centers of a resolution x resolution grid over a bbox: (lats, lngs)"""
+    min_lng, min_lat, max_lng, max_lat = bbox
+    lngs = min_lng + (np.arange(resolution) + 0.5) * (max_lng - min_lng) / resolution
+    lats = min_lat + (np.arange(resolution) + 0.5) * (max_lat - min_lat) / resolution
+    grid_lats, grid_lngs = np.meshgrid(lats, lngs, indexing="ij")
+    return grid_lats.ravel(), grid_lngs.ravel()
+
+
+def search_sites(units, stories, building_type="residential", bbox=ATLANTA_BBOX, resolution=100,
+                 candidates=None, top_k=10, max_walk_minutes=None, require_zoning_compliant=True,
+                 min_separation_m=500):
+    """
+    Rank candidate sites for a building program
+    candidates: optional [(lat, lng), ...]; otherwise a resolution x resolution grid over bbox
+    Returns dict with the top_k sites and per-phase candidate counts and timings
+    """
+    timings_ms = {}
+    funnel = {}
+    start = time.perf_counter()
+
+    def lap(phase, remaining):
+        nonlocal start
+        now = time.perf_counter()
+        timings_ms[phase] = round((now - start) * 1000, 2)
+        funnel[phase] = int(remaining)
+        start = now
+
+    if candidates is not None:
+        lats = np.array([c[0] for c in candidates], dtype=np.float64)
+        lngs = np.array([c[1] for c in candidates], dtype=np.float64)
+    else:
+        lats, lngs = candidate_grid(bbox, resolution)
+    keep = np.arange(len(lats))
+    lap("candidates", len(keep))
+
+    # 1. Zoning height limit
+    zoning = zoning_checker.get_zoning_index()
+    district_idx = zoning.lookup_indices(lats, lngs)
+    district_heights = np.array(
+        [np.inf if d["max_height"] is None else d["max_height"] for d in zoning.districts] + [
+            np.inf if zoning_checker.DEFAULT_DISTRICT["max_height"] is None
+            else zoning_checker.DEFAULT_DISTRICT["max_height"]
+        ],
+        dtype=np.float64
+    )
+    # -1 (no district) picks the trailing default entry
+    zoning_ok = stories * zoning_checker.STORY_HEIGHT_FT <= district_heights[district_idx]
+    if require_zoning_compliant:
+        keep = keep[zoning_ok]
+    lap("zoning", len(keep))
+
+    # 2. Transit: straight-line lower bound first, then the walk network
+    stations = transit_analyzer.get_stations_dataset()
+    _, straight = stations.k_nearest_many(lats[keep], lngs[keep], 1)
+    walk_m = straight[:, 0]
+    if max_walk_minutes is not None:
+        max_walk_m = max_walk_minutes * 60 * settings.WALK_SPEED_MS
+        within = walk_m <= max_walk_m
+        keep, walk_m = keep[within], walk_m[within]
+    walks = transit_analyzer.station_walk_distances(stations, lats[keep], lngs[keep])
+    if walks is not None:
+        walk_m = np.where(np.isfinite(walks[0]), walks[0], walk_m)
+        if max_walk_minutes is not None:
+            within = walk_m <= max_walk_m
+            keep, walk_m = keep[within], walk_m[within]
+    walk_minutes = walk_m / settings.WALK_SPEED_MS / 60
+    lap("transit", len(keep))
+
+    # 3. Schools in range: worst projected capacity and schools pushed over 100%
+    schools = school_analyzer.get_schools_dataset()
+    projected_pct = (
+        schools.records["enrollment"] + units * settings.STUDENTS_PER_UNIT * schools.grade_shares
+    ) / schools.records["capacity"] * 100
+    rows, cols, _ = schools.within_radius_pairs(lats[keep], lngs[keep], school_analyzer.SCHOOL_RADIUS_M)
+    worst_school_pct = np.zeros(len(keep))
+    np.maximum.at(worst_school_pct, rows, projected_pct[cols])
+    schools_over = np.bincount(rows[projected_pct[cols] > 100], minlength=len(keep))
+    lap("schools", len(keep))
+
+    # Intersections in range, distance-decay trips
+    worst_volume, degraded = decay_intersection_pressure(lats[keep], lngs[keep], units)
+    lap("traffic", len(keep))
+
+    infrastructure = calculate_infrastructure_impact(None, units)
+    fixed_bottlenecks = (~zoning_ok[keep]).astype(np.int64) + schools_over + (
+        0 if infrastructure["infrastructure_adequate"] else 1
+    )
+    fixed_score = 100 * (
+        COMPONENT_WEIGHTS["school_pressure"] * school_pressure_score(worst_school_pct)
+        + COMPONENT_WEIGHTS["transit_pressure"] * transit_pressure_score(walk_minutes)
+        + COMPONENT_WEIGHTS["infrastructure_pressure"] * infrastructure_pressure(units)
+    )
+    bottlenecks = fixed_bottlenecks + (degraded > 0)
+    impact_score = fixed_score + 100 * COMPONENT_WEIGHTS["traffic_pressure"] * traffic_pressure_score(worst_volume)
+    order = np.lexsort((impact_score, bottlenecks))
+
+    # Re-score the leading candidates with routed trips
+    network = traffic_calculator.get_road_network()
+    if network is not None and len(network):
+        order = order[:settings.SITE_SEARCH_ROUTED_CANDIDATES]
+        routed_volume, routed_degraded = routed_intersection_pressure(lats[keep[order]], lngs[keep[order]], units)
+        routed = ~np.isnan(routed_volume)
+        worst_volume[order[routed]] = routed_volume[routed]
+        degraded[order[routed]] = routed_degraded[routed]
+        bottlenecks = fixed_bottlenecks + (degraded > 0)
+        impact_score = fixed_score + 100 * COMPONENT_WEIGHTS["traffic_pressure"] * traffic_pressure_score(worst_volume)
+        order = order[np.lexsort((impact_score[order], bottlenecks[order]))]
+        lap("routing", len(order))
+
+    picked = pick_separated(lats[keep], lngs[keep], order, top_k, min_separation_m)
+    lap("ranking", len(picked))
+
+    sites = []
+    for rank, i in enumerate(picked, start=1):
+        candidate = int(keep[i])
+        location = Location(lat=float(lats[candidate]), lng=float(lngs[candidate]))
+        district = zoning.districts[district_idx[candidate]] if district_idx[candidate] >= 0 \
+            else zoning_checker.DEFAULT_DISTRICT
+        sites.append({
+            "rank": rank,
+            "location": {"lat": round(location.lat, 6), "lng": round(location.lng, 6)},
+            "bottleneck_count": int(bottlenecks[i]),
+            "impact_score": round(float(impact_score[i]), 1),
+            "suitability_score": round(100 - float(impact_score[i]), 1),
+            "zone": district["zone"],
+            "zoning_compliant": bool(zoning_ok[candidate]),
+            "worst_school_capacity_pct": round(float(worst_school_pct[i]), 1),
+            "schools_over_capacity": int(schools_over[i]),
+            "degraded_intersections": int(degraded[i]),
+            "walk_time_minutes": round(float(walk_minutes[i]), 1),
+            "economic_impact": economic_analyzer.analyze_economic_impact(location, units, stories),
+        })
+
+    return {
+        "program": {"units": units, "stories": stories, "type": building_type},
+        "candidates_evaluated": funnel["candidates"],
+        "zoning_data_source": zoning.source,
+        "infrastructure_adequate": infrastructure["infrastructure_adequate"],
+        "sites": sites,
+        "funnel": funnel,
+        "timings_ms": timings_ms
+    }
+
+
+def decay_intersection_pressure(lats, lngs, units):
+    """
+    Highest projected intersection volume and number of intersections whose
+    LOS degrades, per site, with distance-decay trips
+    """
+    dataset = traffic_calculator.get_intersections_dataset()
+    worst_volume = np.zeros(len(lats))
+    degraded = np.zeros(len(lats), dtype=np.int64)
+    rows, cols, distances = dataset.within_radius_pairs(lats, lngs, traffic_calculator.TRAFFIC_RADIUS_M)
+    volumes = dataset.current_volume[cols] + traffic_calculator.intersection_trips(units, distances)
+    np.maximum.at(worst_volume, rows, volumes)
+    worse = traffic_calculator.los_levels(volumes) > dataset.current_los_level[cols]
+    np.add.at(degraded, rows[worse], 1)
+    return worst_volume, degraded
+
+
+def routed_intersection_pressure(lats, lngs, units):
+    """
+    decay_intersection_pressure with trips routed over the road network (NaN
+    volume where the network cannot route the site)
+    """
+    dataset = traffic_calculator.get_intersections_dataset()
+    worst_volume = np.full(len(lats), np.nan)
+    degraded = np.zeros(len(lats), dtype=np.int64)
+    assigned = traffic_calculator.assign_site_trips(dataset, lats, lngs) or [None] * len(lats)
+    peak_trips = traffic_calculator.peak_hour_trips(units)
+    for i, shares in enumerate(assigned):
+        if shares is None:
+            continue
+        indices, fractions = shares
+        if len(indices) == 0:
+            worst_volume[i] = 0.0
+            continue
+        volumes = dataset.current_volume[indices] + peak_trips * fractions
+        worst_volume[i] = volumes.max()
+        degraded[i] = int((traffic_calculator.los_levels(volumes) > dataset.current_los_level[indices]).sum())
+    return worst_volume, degraded
+
+
+def pick_separated(lats, lngs, order, top_k, min_separation_m):
+    """First top_k indices in rank order at least min_separation_m from every earlier pick"""
+    picked = []
+    for i in order:
+        if len(picked) == top_k:
+            break
+        if picked and min_separation_m > 0:
+            distances = haversine_pairs(
+                np.full(len(picked), lats[i]), np.full(len(picked), lngs[i]), lats[picked], lngs[picked]
+            )
+            if distances.min() < min_separation_m:
+                continue
+        picked.append(int(i))
+    return picked
@@ -1,71 +1,211 @@
 from app.config import settings
-from app.services.school_analyzer import calculate_distance
+from app.services.datasets import registry as datasets
+from app.services.geo import PointDataset, haversine_pairs
+from app.services.road_network import load_road_network
+import json
 
-def calculate_traffic(location, units):
+import numpy as np
+
+# Real Atlanta intersections across different neighborhoods
+INTERSECTIONS_FILE = "atlanta_intersections.json"
+
+
+def build_intersections_dataset(path, version):
+    """
+    Intersections file as a PointDataset, with current PM peak volumes as an
+    array (dataset.current_volume) for vectorized scans
+    """
+    with open(path, 'r') as f:
+        intersections = json.load(f)["intersections"]
+    dataset = PointDataset(intersections, name="intersections")
+    dataset.current_volume = np.array([i["current_volume"] for i in intersections], dtype=np.float64)
+    dataset.current_los_level = np.array(
+        [LOS_GRADES.index(i["current_los"]) for i in intersections], dtype=np.int8
+    )
+    dataset.version = version
+    return dataset
+
+
+# Activity centers PM peak trips return from, weighted by relative employment
+ZONES_FILE = "atlanta_destination_zones.json"
+
+
+def build_zones_dataset(path, version):
+    """Destination zones file as a PointDataset with weights (dataset.weights)"""
+    with open(path, 'r') as f:
+        zones = json.load(f)["zones"]
+    dataset = PointDataset(zones, name="destination_zones")
+    dataset.weights = np.array([z["weight"] for z in zones], dtype=np.float64)
+    dataset.version = version
+    return dataset
+
+
+datasets.register("intersections", INTERSECTIONS_FILE, build_intersections_dataset)
+datasets.register("destination_zones", ZONES_FILE, build_zones_dataset)
+datasets.register("road_network", settings.ROAD_NETWORK_FILE, load_road_network, optional=True)
+
+# Only affect intersections within 1.5 miles (2400m)
+TRAFFIC_RADIUS_M = 2400
+
+# Volume at which each LOS grade after A begins (see calculate_los)
+LOS_GRADES = "ABCDEF"
+LOS_THRESHOLDS = np.array([600, 900, 1200, 1400, 1600], dtype=np.float64)
+
+
+def get_intersections_dataset():
+    """Intersections as a PointDataset for vectorized distance queries"""
+    return datasets.get("intersections")
+
+
+def get_destination_zones():
+    """Destination zones as a PointDataset with trip weights"""
+    return datasets.get("destination_zones")
+
+
+def get_road_network():
+    """Drivable road network, or None if no network file is installed"""
+    return datasets.get("road_network")
+
+
+def prepare_road_routes():
+    """Build the zone shortest-path trees ahead of the first request"""
+    network = get_road_network()
+    if network is not None and len(network):
+        network.zone_trees(get_destination_zones())
+        network.intersection_nodes(get_intersections_dataset())
+
+
+def calculate_traffic(location, units, background_volume=None, dataset=None):
     """
-    Calculate traffic impact using distance-based distribution
+    Calculate traffic impact by routing trips over the road network, or with
+    distance-based distribution when there is no network or it cannot route
+    the site
     Intersections across different Atlanta neighborhoods
+    background_volume: optional PM peak trips per intersection (indexed like
+    the dataset) already added by other buildings in a scenario
+    """
+    dataset = dataset or get_intersections_dataset()
+    indices, distances, trips, method = site_trips(dataset, location, units)
+    return build_traffic_impact(dataset, units, indices, distances, background_volume, trips, method)
+
+
+def calculate_traffic_batch(locations, units_list):
+    """
+    Calculate traffic impact for many sites
+    With a road network, sites are snapped together and each distinct node is
+    traced once (shared with the per-origin cache); without one, a single
+    vectorized radius query covers the whole batch
+    Returns a list of results in the same order as locations
+    """
+    dataset = get_intersections_dataset()
+    lats = [loc.lat for loc in locations]
+    lngs = [loc.lng for loc in locations]
+    assigned = assign_site_trips(dataset, lats, lngs)
+    if assigned is None:
+        nearby = dataset.within_radius_many(lats, lngs, TRAFFIC_RADIUS_M)
+        return [
+            build_traffic_impact(dataset, units, indices, distances)
+            for units, (indices, distances) in zip(units_list, nearby)
+        ]
+
+    results = []
+    for location, units, shares in zip(locations, units_list, assigned):
+        indices, distances, trips, method = site_intersection_trips(dataset, location, units, shares)
+        results.append(build_traffic_impact(dataset, units, indices, distances, None, trips, method))
+    return results
+
+
+def assign_site_trips(dataset, lats, lngs):
+    """
+    Route each site's trips over the road network
+    Returns: one (intersection indices, trip shares) per site, None for sites
+    the network cannot route; or None if there is no road network
+    """
+    network = get_road_network()
+    if network is None or len(network) == 0:
+        return None
+    origins = network.snap(lats, lngs)
+    return network.route_shares_many(origins, get_destination_zones(), dataset)
+
+
+def site_trips(dataset, location, units):
+    """PM peak trips one site adds per intersection: (indices, distances, trips, method)"""
+    assigned = assign_site_trips(dataset, [location.lat], [location.lng])
+    return site_intersection_trips(dataset, location, units, assigned[0] if assigned else None)
+
+
+def site_intersection_trips(dataset, location, units, shares=None):
+    """
+    Intersections a site's PM peak trips reach: (indices, straight-line
+    distances, trips, method)
+    shares: (intersection indices, shares) routed over the road network;
+    without them, trips decay with distance within TRAFFIC_RADIUS_M
+    """
+    if shares is None:
+        indices, distances = dataset.within_radius(location.lat, location.lng, TRAFFIC_RADIUS_M)
+        return indices, distances, intersection_trips(units, distances), "distance_decay"
+
+    indices, fractions = shares
+    distances = haversine_pairs(
+        np.full(len(indices), location.lat), np.full(len(indices), location.lng),
+        dataset.lats[indices], dataset.lngs[indices]
+    )
+    return indices, distances, peak_hour_trips(units) * fractions, "road_network"
+
+
+def peak_hour_trips(units):
+    """PM peak hour trips generated by a building"""
+    return int(int(units * settings.TRIPS_PER_UNIT) * settings.PM_PEAK_RATIO)
+
+
+def peak_hour_trips_many(units):
+    """Vectorized peak_hour_trips over an array of unit counts"""
+    return np.floor(np.floor(units * settings.TRIPS_PER_UNIT) * settings.PM_PEAK_RATIO)
+
+
+def decay_factors(distances):
+    """Share of a building's PM peak trips reaching intersections the given distances away"""
+    # Impact decreases with distance (inverse square law)
+    # Closer intersections get more traffic
+    return 1 / (1 + (distances / 400) ** 2)
+
+
+def intersection_trips(units, distances):
+    """PM peak trips a building adds at intersections the given distances away"""
+    pm_peak_trips = peak_hour_trips(units)
+    return pm_peak_trips * decay_factors(distances)
+
+
+def build_traffic_impact(dataset, units, indices, distances, background_volume=None, trips=None,
+                         method="distance_decay"):
+    """
+    Build the traffic impact result for the intersections a site's trips reach
+    trips: PM peak trips per intersection (default: distance decay)
     """
     daily_trips = int(units * settings.TRIPS_PER_UNIT)
     am_peak_trips = int(daily_trips * settings.AM_PEAK_RATIO)
     pm_peak_trips = int(daily_trips * settings.PM_PEAK_RATIO)
     
-    # Real Atlanta intersections across different neighborhoods
-    mock_intersections = [
-        # MIDTOWN/DOWNTOWN
-        {"name": "Peachtree & 10th", "lat": 33.7800, "lng": -84.3850, "current_volume": 1400, "current_los": "D"},
-        {"name": "Juniper & 10th", "lat": 33.7790, "lng": -84.3820, "current_volume": 900, "current_los": "C"},
-        {"name": "Piedmont & 10th", "lat": 33.7785, "lng": -84.3730, "current_volume": 1100, "current_los": "D"},
-        {"name": "Peachtree & 14th", "lat": 33.7880, "lng": -84.3860, "current_volume": 1200, "current_los": "D"},
-        {"name": "Spring & 5th", "lat": 33.7650, "lng": -84.3880, "current_volume": 1300, "current_los": "D"},
-        
-        # BUCKHEAD
-        {"name": "Peachtree & Lenox", "lat": 33.8470, "lng": -84.3650, "current_volume": 1500, "current_los": "E"},
-        {"name": "Roswell & Piedmont", "lat": 33.8420, "lng": -84.3710, "current_volume": 1200, "current_los": "D"},
-        {"name": "Peachtree & Pharr", "lat": 33.8350, "lng": -84.3680, "current_volume": 1100, "current_los": "D"},
-        
-        # EAST ATLANTA
-        {"name": "Moreland & Memorial", "lat": 33.7350, "lng": -84.3480, "current_volume": 1000, "current_los": "C"},
-        {"name": "Boulevard & North", "lat": 33.7720, "lng": -84.3650, "current_volume": 900, "current_los": "C"},
-        {"name": "DeKalb & Candler", "lat": 33.7520, "lng": -84.3380, "current_volume": 800, "current_los": "B"},
-        
-        # WEST ATLANTA
-        {"name": "MLK & Northside", "lat": 33.7550, "lng": -84.4250, "current_volume": 1100, "current_los": "D"},
-        {"name": "Simpson & Joseph Lowery", "lat": 33.7580, "lng": -84.4350, "current_volume": 950, "current_los": "C"},
-        
-        # SOUTH ATLANTA
-        {"name": "Metropolitan & Pryor", "lat": 33.7150, "lng": -84.4050, "current_volume": 1000, "current_los": "C"},
-        {"name": "University & McDaniel", "lat": 33.7250, "lng": -84.4150, "current_volume": 900, "current_los": "C"},
-    ]
+    trips_to_intersections = intersection_trips(units, distances) if trips is None else trips
     
     los_impacts = []
     
-    for intersection in mock_intersections:
-        # Calculate distance from building
-        distance = calculate_distance(
-            location.lat, location.lng,
-            intersection["lat"], intersection["lng"]
-        )
-        
-        # Only affect intersections within 1.5 miles (2400m)
-        if distance > 2400:
-            continue
+    for index, distance, trips_to_intersection in zip(indices, distances, trips_to_intersections):
+        intersection = dataset.records[index]
         
-        # Impact decreases with distance (inverse square law)
-        # Closer intersections get more traffic
-        impact_factor = 1 / (1 + (distance / 400) ** 2)
-        trips_to_intersection = pm_peak_trips * impact_factor
-        
-        new_volume = intersection["current_volume"] + trips_to_intersection
+        # Trips other buildings in the scenario already add here
+        other_trips = float(background_volume[index]) if background_volume is not None else 0
+        new_volume = intersection["current_volume"] + other_trips + trips_to_intersection
         projected_los = calculate_los(new_volume)
         
         # Only report if LOS degrades
         if projected_los > intersection["current_los"]:
             los_impacts.append({
                 "name": intersection["name"],
-                "distance": round(distance, 1),
+                "distance": round(float(distance), 1),
                 "current_los": intersection["current_los"],
                 "projected_los": projected_los,
+                "added_trips": round(float(trips_to_intersection), 1),
                 "severity": "HIGH" if projected_los == "F" else "MEDIUM"
             })
     
@@ -75,10 +215,16 @@ def calculate_traffic(location, units):
     return {
         "daily_trips": daily_trips,
         "peak_trips": {"am": am_peak_trips, "pm": pm_peak_trips},
+        "assignment_method": method,
         "los_impacts": los_impacts
     }
 
 
+def los_levels(volumes):
+    """Vectorized calculate_los: LOS grade index (0 = A ... 5 = F) of each volume"""
+    return np.searchsorted(LOS_THRESHOLDS, volumes, side="right")
+
+
 def calculate_los(volume):
     """
     Calculate Level of Service based on vehicle volume
@@ -1,80 +1,130 @@
+from app.config import settings
+from app.services.datasets import registry as datasets
+from app.services.geo import PointDataset, haversine_pairs
+from app.services.walk_network import load_walk_network
+import json
+
+import numpy as np
+
+# Data source: Official MARTA rail station coordinates (all 38 rail stations)
+STATIONS_FILE = "marta_stations.json"
+
+
+def build_stations_dataset(path, version):
+    """MARTA stations file as a PointDataset"""
+    with open(path, 'r') as f:
+        stations = json.load(f)["stations"]
+    dataset = PointDataset(stations, name="marta_stations")
+    dataset.version = version
+    return dataset
+
+
+datasets.register("marta_stations", STATIONS_FILE, build_stations_dataset)
+datasets.register("walk_network", settings.WALK_NETWORK_FILE, load_walk_network, optional=True)
+
+NEARBY_STATION_COUNT = 3
+
+
+def get_stations_dataset():
+    """MARTA stations as a PointDataset for vectorized distance queries"""
+    return datasets.get("marta_stations")
+
+
+def get_walk_network():
+    """Pedestrian street network, or None if no network file is installed"""
+    return datasets.get("walk_network")
+
+
+def station_walk_distances(dataset, lats, lngs):
+    """
+    Network walking distance from each point to its nearest station by foot
+    Returns: (walk distances, station indices, straight-line distances to
+    those stations), with inf / -1 / nan where the network cannot route the
+    point; None if there is no walk network
+    """
+    network = get_walk_network()
+    if network is None or len(network) == 0:
+        return None
+    field = network.distance_field(dataset, key=dataset.version)
+    walk_distances, stations = network.walk_distances(field, lats, lngs)
+    routed = stations >= 0
+    straight = np.full(len(stations), np.nan)
+    straight[routed] = haversine_pairs(
+        np.asarray(lats)[routed], np.asarray(lngs)[routed],
+        dataset.lats[stations[routed]], dataset.lngs[stations[routed]]
+    )
+    return walk_distances, stations, straight
+
+
+def prepare_walk_field():
+    """Run the station distance-field search ahead of the first request"""
+    station_walk_distances(get_stations_dataset(), [], [])
+
+
 def analyze_transit_access(location):
     """
     Analyze MARTA transit access using REAL station locations
     Data source: Official MARTA rail station coordinates
+    Walk time follows the pedestrian network when one is installed.
     """
-    from app.services.school_analyzer import calculate_distance
-    
-    # ✅ REAL MARTA STATIONS - All 38 rail stations
-    all_stations = [
-        # RED LINE (North-South)
-        {"name": "North Springs", "line": "Red", "lat": 33.9929, "lng": -84.3576},
-        {"name": "Sandy Springs", "line": "Red", "lat": 33.9316, "lng": -84.3513},
-        {"name": "Dunwoody", "line": "Red", "lat": 33.9486, "lng": -84.3455},
-        {"name": "Medical Center", "line": "Red", "lat": 33.9106, "lng": -84.3513},
-        {"name": "Buckhead", "line": "Red", "lat": 33.8476, "lng": -84.3671},
-        {"name": "Lindbergh Center", "line": "Red/Gold", "lat": 33.8230, "lng": -84.3690},
-        {"name": "Arts Center", "line": "Red/Gold", "lat": 33.7890, "lng": -84.3870},
-        {"name": "Midtown", "line": "Red/Gold", "lat": 33.7810, "lng": -84.3860},
-        {"name": "North Avenue", "line": "Red/Gold", "lat": 33.7720, "lng": -84.3870},
-        {"name": "Civic Center", "line": "Red/Gold", "lat": 33.7660, "lng": -84.3870},
-        {"name": "Peachtree Center", "line": "Red/Gold", "lat": 33.7590, "lng": -84.3880},
-        {"name": "Five Points", "line": "All Lines", "lat": 33.7540, "lng": -84.3920},
-        {"name": "Garnett", "line": "Red/Gold", "lat": 33.7480, "lng": -84.3960},
-        {"name": "West End", "line": "Red/Gold", "lat": 33.7358, "lng": -84.4129},
-        {"name": "Oakland City", "line": "Red/Gold", "lat": 33.7171, "lng": -84.4260},
-        {"name": "Lakewood/Fort McPherson", "line": "Red/Gold", "lat": 33.7002, "lng": -84.4260},
-        {"name": "East Point", "line": "Red/Gold", "lat": 33.6768, "lng": -84.4397},
-        {"name": "College Park", "line": "Red/Gold", "lat": 33.6513, "lng": -84.4493},
-        {"name": "Airport", "line": "Red/Gold", "lat": 33.6397, "lng": -84.4443},
-        
-        # GOLD LINE (Northeast)
-        {"name": "Doraville", "line": "Gold", "lat": 33.9026, "lng": -84.2797},
-        {"name": "Chamblee", "line": "Gold", "lat": 33.8879, "lng": -84.3046},
-        {"name": "Brookhaven", "line": "Gold", "lat": 33.8590, "lng": -84.3390},
-        {"name": "Lenox", "line": "Gold", "lat": 33.8450, "lng": -84.3570},
-        
-        # GREEN LINE (East-West)
-        {"name": "Bankhead", "line": "Green", "lat": 33.7723, "lng": -84.4285},
-        {"name": "Ashby", "line": "Green", "lat": 33.7565, "lng": -84.4177},
-        {"name": "Vine City", "line": "Green", "lat": 33.7563, "lng": -84.4040},
-        {"name": "Dome/GWCC", "line": "Green/Blue", "lat": 33.7598, "lng": -84.3964},
-        {"name": "Georgia State", "line": "Green/Blue", "lat": 33.7489, "lng": -84.3851},
-        {"name": "King Memorial", "line": "Green/Blue", "lat": 33.7490, "lng": -84.3727},
-        {"name": "Inman Park", "line": "Green/Blue", "lat": 33.7578, "lng": -84.3528},
-        {"name": "Edgewood", "line": "Green/Blue", "lat": 33.7613, "lng": -84.3403},
-        {"name": "East Lake", "line": "Green/Blue", "lat": 33.7650, "lng": -84.3140},
-        {"name": "Decatur", "line": "Green/Blue", "lat": 33.7748, "lng": -84.2968},
-        {"name": "Avondale", "line": "Green", "lat": 33.7715, "lng": -84.2806},
-        {"name": "Kensington", "line": "Green", "lat": 33.7726, "lng": -84.2520},
-        {"name": "Indian Creek", "line": "Green", "lat": 33.7693, "lng": -84.2291},
-        
-        # BLUE LINE (West)
-        {"name": "Hamilton E. Holmes", "line": "Blue", "lat": 33.7548, "lng": -84.4699},
-        {"name": "West Lake", "line": "Blue", "lat": 33.7530, "lng": -84.4461},
+    dataset = get_stations_dataset()
+    indices, distances = dataset.k_nearest(location.lat, location.lng, NEARBY_STATION_COUNT)
+    walks = station_walk_distances(dataset, [location.lat], [location.lng])
+    walk = tuple(values[0] for values in walks) if walks is not None else None
+    return build_transit_access(dataset, indices, distances, walk)
+
+
+def analyze_transit_access_batch(locations):
+    """
+    Analyze transit access for many sites with one vectorized k-nearest query
+    Returns a list of results in the same order as locations
+    """
+    dataset = get_stations_dataset()
+    lats = [loc.lat for loc in locations]
+    lngs = [loc.lng for loc in locations]
+    all_indices, all_distances = dataset.k_nearest_many(lats, lngs, NEARBY_STATION_COUNT)
+    walks = station_walk_distances(dataset, lats, lngs)
+    all_walks = zip(*walks) if walks is not None else [None] * len(locations)
+    return [
+        build_transit_access(dataset, indices, distances, walk)
+        for indices, distances, walk in zip(all_indices, all_distances, all_walks)
+    ]
+
+
+def build_transit_access(dataset, indices, distances, walk=None):
+    """
+    Build the transit access result from the nearest stations (nearest first)
+    walk is one (walk distance, station index, straight-line distance) row of
+    station_walk_distances; without a routable one, walk time uses the
+    straight-line distance to the nearest station.
+    """
+    stations = [
+        {
+            "name": dataset.records[index]["name"],
+            "line": dataset.records[index]["line"],
+            "distance": round(float(distance), 1)
+        }
+        for index, distance in zip(indices, distances)
     ]
     
-    stations = []
-    for station_data in all_stations:
-        # Calculate ACTUAL distance from clicked location
-        distance = calculate_distance(
-            location.lat, location.lng,
-            station_data["lat"], station_data["lng"]
-        )
-        
-        stations.append({
-            "name": station_data["name"],
-            "line": station_data["line"],
-            "distance": round(distance, 1)
-        })
-    
-    # Sort by distance (nearest first)
-    stations.sort(key=lambda s: s["distance"])
-    
-    nearest = stations[0]
+    if walk is not None and np.isfinite(walk[0]):
+        # The closest station on foot can differ from the closest as the crow flies
+        walk_distance, index, distance = float(walk[0]), int(walk[1]), float(walk[2])
+        station = dataset.records[index]
+        nearest = {
+            "name": station["name"],
+            "line": station["line"],
+            "distance": round(distance, 1),
+            "walk_distance": round(walk_distance, 1)
+        }
+        walk_method = "network"
+    else:
+        nearest = stations[0]
+        walk_distance = nearest["distance"]
+        walk_method = "straight_line"
     
-    # Calculate walk time (1.4 m/s = average walking speed)
-    walk_time = (nearest["distance"] / 1.4) / 60  # Convert to minutes
+    # Walk time at average walking speed
+    walk_time = (walk_distance / settings.WALK_SPEED_MS) / 60  # Convert to minutes
     
     # Score based on walk time (industry standard)
     if walk_time < 5:
@@ -89,6 +139,7 @@ def analyze_transit_access(location):
     return {
         "nearest_station": nearest,
         "walk_time_minutes": round(walk_time, 1),
+        "walk_time_method": walk_method,
         "transit_score": score,
-        "nearby_stations": stations[:3]  # Top 3 nearest
+        "nearby_stations": stations  # Top 3 nearest
     }
\ No newline at end of file
@@ -0,0 +1,373 @@
+"""
+Mapbox Vector Tile (MVT) rendering for the map data layers
+Features are clipped and simplified per tile in tile coordinates, encoded as
+MVT protobuf and cached in memory (and optionally on disk) with an ETag.
+"""
+
+import hashlib
+import json
+import math
+import os
+import struct
+import threading
+
+import numpy as np
+import shapely
+from shapely.geometry import Point, mapping
+from shapely.geometry.polygon import orient
+
+from app.config import settings
+from app.services.cache import LRUCache
+from app.services.datasets import registry as datasets
+
+TILE_EXTENT = 4096
+TILE_BUFFER = 64  # tile units kept outside the tile edge to avoid seams
+MAX_ZOOM = 22
+
+# MVT geometry types and commands
+GEOM_POINT, GEOM_LINESTRING, GEOM_POLYGON = 1, 2, 3
+CMD_MOVE_TO, CMD_LINE_TO, CMD_CLOSE_PATH = 1, 2, 7
+
+_TILE_CACHE = LRUCache(settings.TILE_CACHE_SIZE, name="vector_tiles")
+_LAYERS = {}
+_LAYERS_LOCK = threading.Lock()
+
+
+class TileLayer:
+    """
+    One map layer: shapely geometries with properties, an STRtree over them,
+    a content version used in cache keys, and lazily serialized GeoJSON
+    """
+
+    def __init__(self, name, features, source_version=None):
+        self.name = name
+        self.source_version = source_version
+        self.geometries = [geometry for geometry, _ in features]
+        self.properties = [properties for _, properties in features]
+        self.tree = shapely.STRtree(self.geometries)
+        self._geojson = None
+
+        digest = hashlib.sha1()
+        for geometry, properties in features:
+            digest.update(shapely.to_wkb(geometry))
+            digest.update(json.dumps(properties, sort_keys=True, default=str).encode("utf-8"))
+        self.version = digest.hexdigest()[:12]
+
+    def __len__(self):
+        return len(self.geometries)
+
+    def geojson(self):
+        """Whole-layer GeoJSON FeatureCollection, serialized once"""
+        if self._geojson is None:
+            self._geojson = json.dumps({
+                "type": "FeatureCollection",
+                "features": [
+                    {"type": "Feature", "geometry": mapping(geometry), "properties": properties}
+                    for geometry, properties in zip(self.geometries, self.properties)
+                ]
+            }, separators=(",", ":"))
+        return self._geojson
+
+
+def school_features():
+    """Schools as point features"""
+    from app.services.school_analyzer import get_schools_dataset
+    return [
+        (Point(s["lng"], s["lat"]), {
+            "name": s["name"],
+            "grade_level": s["grade_level"],
+            "enrollment": s["enrollment"],
+            "capacity": s["capacity"]
+        })
+        for s in get_schools_dataset().records
+    ]
+
+
+def station_features():
+    """MARTA rail stations as point features"""
+    from app.services.transit_analyzer import get_stations_dataset
+    return [
+        (Point(s["lng"], s["lat"]), {"name": s["name"], "line": s["line"]})
+        for s in get_stations_dataset().records
+    ]
+
+
+def zoning_features():
+    """Zoning district polygons with their limits"""
+    from app.services.zoning_checker import get_zoning_index
+    index = get_zoning_index()
+    return list(zip(index.polygons, index.districts))
+
+
+LAYER_SOURCES = {
+    "schools": school_features,
+    "marta-stations": station_features,
+    "zoning": zoning_features,
+}
+
+# Reference dataset each layer is built from
+LAYER_DATASETS = {
+    "schools": "schools",
+    "marta-stations": "marta_stations",
+    "zoning": "zoning",
+}
+
+
+def get_layer(name):
+    """Build (once per dataset version) and return the TileLayer for a layer name"""
+    layer = _LAYERS.get(name)
+    if layer is not None and layer.source_version != datasets.snapshot(LAYER_DATASETS[name]).version:
+        layer = None
+    if layer is None:
+        with _LAYERS_LOCK:
+            layer = _LAYERS.get(name)
+            version = datasets.snapshot(LAYER_DATASETS[name]).version
+            if layer is None or layer.source_version != version:
+                layer = TileLayer(name, LAYER_SOURCES[name](), source_version=version)
+                _LAYERS[name] = layer
+    return layer
+
+
+def drop_layers(dataset_name):
+    """Reload listener: forget layers built from a replaced dataset"""
+    with _LAYERS_LOCK:
+        for name, source in LAYER_DATASETS.items():
+            if source == dataset_name:
+                _LAYERS.pop(name, None)
+
+
+datasets.on_reload(drop_layers)
+
+
+def get_tile(layer_name, z, x, y):
+    """
+    Encoded MVT bytes and ETag for one tile, from memory, disk or a fresh render
+    Returns: (bytes, etag)
+    """
+    layer = get_layer(layer_name)
+    key = (layer_name, layer.version, z, x, y)
+    cached = _TILE_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    disk_path = None
+    data = None
+    if settings.TILE_CACHE_DIR:
+        disk_path = os.path.join(settings.TILE_CACHE_DIR, layer_name, layer.version, str(z), str(x), f"{y}.mvt")
+        try:
+            with open(disk_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            data = None
+
+    if data is None:
+        data = render_tile(layer, z, x, y)
+        if disk_path is not None:
+            write_tile_file(disk_path, data)
+
+    entry = (data, f'"{hashlib.sha1(data).hexdigest()[:20]}"')
+    _TILE_CACHE.set(key, entry)
+    return entry
+
+
+def write_tile_file(path, data):
+    """Write a tile to the disk cache atomically"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Tile cache write failed for {path}: {str(e)}")
+
+
+def tile_bounds(z, x, y):
+    """Lng/lat bounds (west, south, east, north) of a web mercator tile"""
+    n = 2 ** z
+
+    def tile_lat(ty):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return (x / n * 360 - 180, tile_lat(y + 1), (x + 1) / n * 360 - 180, tile_lat(y))
+
+
+def render_tile(layer, z, x, y):
+    """Clip, simplify and encode the layer features intersecting one tile"""
+    west, south, east, north = tile_bounds(z, x, y)
+    pad_lng = (east - west) * TILE_BUFFER / TILE_EXTENT
+    pad_lat = (north - south) * TILE_BUFFER / TILE_EXTENT
+    query_box = shapely.box(west - pad_lng, south - pad_lat, east + pad_lng, north + pad_lat)
+
+    candidates = layer.tree.query(query_box, predicate="intersects")
+    if len(candidates) == 0:
+        return b""
+
+    n = 2 ** z
+
+    def to_tile_coords(coords):
+        lng, lat = coords[:, 0], np.clip(coords[:, 1], -85.0511, 85.0511)
+        tx = ((lng + 180) / 360 * n - x) * TILE_EXTENT
+        lat_rad = np.radians(lat)
+        ty = ((1 - np.log(np.tan(lat_rad) + 1 / np.cos(lat_rad)) / math.pi) / 2 * n - y) * TILE_EXTENT
+        return np.column_stack((tx, ty))
+
+    features = []
+    for index in sorted(candidates):
+        geometry = shapely.transform(layer.geometries[index], to_tile_coords)
+        if geometry.geom_type != "Point":
+            geometry = shapely.clip_by_rect(
+                geometry, -TILE_BUFFER, -TILE_BUFFER, TILE_EXTENT + TILE_BUFFER, TILE_EXTENT + TILE_BUFFER
+            )
+            # Detail finer than one tile unit is invisible at this zoom
+            geometry = shapely.simplify(geometry, 1.0, preserve_topology=True)
+        if geometry.is_empty:
+            continue
+        encoded = encode_geometry(geometry)
+        if encoded is not None:
+            features.append((int(index), encoded, layer.properties[index]))
+
+    if not features:
+        return b""
+    return encode_message_field(3, encode_layer(layer.name, features))
+
+
+# --- MVT protobuf encoding -------------------------------------------------
+
+def encode_varint(value):
+    """Protobuf base-128 varint"""
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def zigzag(value):
+    """Protobuf zigzag encoding for signed integers"""
+    return (value << 1) ^ (value >> 31)
+
+
+def encode_message_field(field, payload):
+    """Length-delimited field (wire type 2)"""
+    return encode_varint((field << 3) | 2) + encode_varint(len(payload)) + payload
+
+
+def encode_varint_field(field, value):
+    """Varint field (wire type 0)"""
+    return encode_varint(field << 3) + encode_varint(value)
+
+
+def encode_packed_field(field, values):
+    """Packed repeated uint32 field"""
+    return encode_message_field(field, b"".join(encode_varint(v) for v in values))
+
+
+def encode_value(value):
+    """MVT Value message for a property value"""
+    if isinstance(value, bool):
+        return encode_varint_field(7, int(value))
+    if isinstance(value, int) and value >= 0:
+        return encode_varint_field(5, value)
+    if isinstance(value, int):
+        return encode_varint_field(6, zigzag(value))
+    if isinstance(value, float):
+        return encode_varint((3 << 3) | 1) + struct.pack("<d", value)
+    return encode_message_field(1, str(value).encode("utf-8"))
+
+
+def encode_layer(name, features):
+    """MVT Layer message with deduplicated property keys and values"""
+    keys, values = {}, {}
+    encoded_features = []
+    for feature_id, (geom_type, commands), properties in features:
+        tags = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault((type(value).__name__, value), len(values)))
+        encoded_features.append(encode_message_field(2, (
+            encode_varint_field(1, feature_id)
+            + encode_packed_field(2, tags)
+            + encode_varint_field(3, geom_type)
+            + encode_packed_field(4, commands)
+        )))
+
+    return (
+        encode_varint_field(15, 2)
+        + encode_message_field(1, name.encode("utf-8"))
+        + b"".join(encoded_features)
+        + b"".join(encode_message_field(3, key.encode("utf-8")) for key in keys)
+        + b"".join(encode_message_field(4, encode_value(value)) for _, value in values)
+        + encode_varint_field(5, TILE_EXTENT)
+    )
+
+
+def encode_geometry(geometry):
+    """
+    MVT geometry command stream for a shapely geometry in tile coordinates
+    Returns: (geometry type, commands) or None if nothing remains after rounding
+    """
+    cursor = [0, 0]
+
+    def command(cmd_id, count):
+        return (cmd_id & 0x7) | (count << 3)
+
+    def path(coords, closed):
+        points = np.rint(np.asarray(coords)[:, :2]).astype(np.int64)
+        if closed:
+            points = points[:-1]
+        # Drop consecutive duplicates introduced by integer rounding
+        keep = np.ones(len(points), dtype=bool)
+        keep[1:] = np.any(points[1:] != points[:-1], axis=1)
+        points = points[keep]
+        if len(points) < (3 if closed else 2):
+            return []
+
+        out = []
+        for i, (px, py) in enumerate(points.tolist()):
+            if i == 0:
+                out.append(command(CMD_MOVE_TO, 1))
+            elif i == 1:
+                out.append(command(CMD_LINE_TO, len(points) - 1))
+            out.extend((zigzag(px - cursor[0]), zigzag(py - cursor[1])))
+            cursor[0], cursor[1] = px, py
+        if closed:
+            out.append(command(CMD_CLOSE_PATH, 1))
+        return out
+
+    geom_type = geometry.geom_type
+    if geom_type in ("Point", "MultiPoint"):
+        points = [geometry] if geom_type == "Point" else list(geometry.geoms)
+        commands = [command(CMD_MOVE_TO, len(points))]
+        for point in points:
+            px, py = int(round(point.x)), int(round(point.y))
+            commands.extend((zigzag(px - cursor[0]), zigzag(py - cursor[1])))
+            cursor[0], cursor[1] = px, py
+        return GEOM_POINT, commands
+
+    if geom_type in ("LineString", "MultiLineString"):
+        lines = [geometry] if geom_type == "LineString" else list(geometry.geoms)
+        commands = [c for line in lines for c in path(line.coords, closed=False)]
+        return (GEOM_LINESTRING, commands) if commands else None
+
+    if geom_type in ("Polygon", "MultiPolygon", "GeometryCollection"):
+        polygons = [g for g in getattr(geometry, "geoms", [geometry]) if g.geom_type == "Polygon"]
+        commands = []
+        for polygon in polygons:
+            # Exterior rings need positive surveyor's area in tile coordinates
+            polygon = orient(polygon, sign=1.0)
+            exterior = path(polygon.exterior.coords, closed=True)
+            if not exterior:
+                continue
+            commands.extend(exterior)
+            for interior in polygon.interiors:
+                commands.extend(path(interior.coords, closed=True))
+        return (GEOM_POLYGON, commands) if commands else None
+
+    return None
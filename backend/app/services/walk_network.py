@@ -0,0 +1,131 @@
+"""
+Pedestrian street network walk distances
+The network is an undirected graph of street and footpath segments (node
+coordinates plus edge lengths in meters) stored as .npz. For a set of target
+points (transit stations) one multi-source Dijkstra run produces a distance
+field: the walking distance from every graph node to its nearest target, and
+which target that is. A query then only snaps the point to nearby graph nodes
+and reads the field, so per-request cost is a KD-tree lookup, not a search.
+"""
+
+import threading
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from app.config import settings
+from app.services.geo import PointDataset
+
+# Zero-length edges would be dropped as non-edges by the sparse graph
+MIN_EDGE_LENGTH_M = 0.01
+
+
+class WalkField:
+    """Walking distance (m) from every graph node to its nearest target, and that target's index"""
+
+    def __init__(self, distances, nearest):
+        self.distances = distances
+        self.nearest = nearest
+
+
+class WalkNetwork:
+    """
+    Pedestrian graph with a KD-tree over its nodes for snapping
+    Distance fields are computed once per target set and kept per key (the
+    target dataset version), so a station reload computes a new field.
+    """
+
+    def __init__(self, lats, lngs, edges_from, edges_to, lengths, version=None):
+        self.nodes = PointDataset(None, name="walk_nodes", lats=lats, lngs=lngs)
+        self.edges_from = np.asarray(edges_from, dtype=np.int32)
+        self.edges_to = np.asarray(edges_to, dtype=np.int32)
+        self.lengths = np.maximum(np.asarray(lengths, dtype=np.float64), MIN_EDGE_LENGTH_M)
+        self.version = version
+        self._fields = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def distance_field(self, targets, key):
+        """Cached WalkField to the points of a PointDataset"""
+        field = self._fields.get(key)
+        if field is None:
+            with self._lock:
+                field = self._fields.get(key)
+                if field is None:
+                    field = self.build_field(targets)
+                    # Only the current target version is worth keeping
+                    self._fields = {key: field}
+        return field
+
+    def build_field(self, targets):
+        """
+        Multi-source Dijkstra from every target at once
+        Each target becomes a virtual node joined to its nearest graph nodes
+        (straight-line access legs), so the search starts from the targets'
+        true positions and records which target each node is closest to.
+        """
+        n = len(self.nodes)
+        k = min(settings.WALK_SNAP_CANDIDATES, n)
+        node_indices, access = self.nodes.k_nearest_many(targets.lats, targets.lngs, k)
+        reachable = access <= settings.WALK_SNAP_MAX_M
+
+        target_rows = np.repeat(np.arange(len(targets)), k).reshape(-1, k)
+        rows = np.concatenate([self.edges_from, n + target_rows[reachable]])
+        cols = np.concatenate([self.edges_to, node_indices[reachable]])
+        weights = np.concatenate([self.lengths, np.maximum(access[reachable], MIN_EDGE_LENGTH_M)])
+        size = n + len(targets)
+        graph = coo_matrix((weights, (rows, cols)), shape=(size, size)).tocsr()
+
+        sources = n + np.flatnonzero(reachable.any(axis=1))
+        if len(sources) == 0:
+            return WalkField(np.full(n, np.inf), np.full(n, -1, dtype=np.intp))
+
+        distances, _, nearest = dijkstra(
+            graph, directed=False, indices=sources, min_only=True, return_predecessors=True
+        )
+        nearest = np.where(nearest[:n] >= 0, nearest[:n] - n, -1)
+        return WalkField(distances[:n], nearest)
+
+    def walk_distances(self, field, lats, lngs):
+        """
+        Network walking distance from each query point to its nearest target
+        The point is snapped to its closest graph nodes; the best
+        access leg + field distance wins. Points with no node within
+        WALK_SNAP_MAX_M, or only unreachable ones, get inf and target -1.
+        Returns: (distances, target indices) arrays of shape (Q,)
+        """
+        k = min(settings.WALK_SNAP_CANDIDATES, len(self.nodes))
+        node_indices, access = self.nodes.k_nearest_many(lats, lngs, k)
+        totals = np.where(access <= settings.WALK_SNAP_MAX_M, access + field.distances[node_indices], np.inf)
+        best = np.argmin(totals, axis=1)[:, None]
+        distances = np.take_along_axis(totals, best, axis=1)[:, 0]
+        targets = np.where(
+            np.isfinite(distances), field.nearest[np.take_along_axis(node_indices, best, axis=1)[:, 0]], -1
+        )
+        return distances, targets
+
+
+def load_walk_network(path, version=None):
+    """Read a network written by scripts/build_walk_network.py"""
+    with np.load(path) as data:
+        network = WalkNetwork(
+            data["lats"], data["lngs"], data["edges_from"], data["edges_to"], data["lengths"],
+            version=version
+        )
+    print(f"✅ Loaded walk network with {len(network)} nodes, {len(network.lengths)} edges")
+    return network
+
+
+def save_walk_network(path, lats, lngs, edges_from, edges_to, lengths):
+    """Write a network in the .npz layout load_walk_network reads"""
+    np.savez_compressed(
+        path,
+        lats=np.asarray(lats, dtype=np.float64),
+        lngs=np.asarray(lngs, dtype=np.float64),
+        edges_from=np.asarray(edges_from, dtype=np.int32),
+        edges_to=np.asarray(edges_to, dtype=np.int32),
+        lengths=np.asarray(lengths, dtype=np.float32)
+    )
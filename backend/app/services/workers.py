@@ -0,0 +1,260 @@
+"""
+Worker tier for CPU-heavy analyzer calls
+Jobs are named analyzer functions (see JOBS) run off the event loop, either
+on threads (WORKER_PROCESSES = 0, the default) or on a pool of worker
+processes so one box can use every core. Worker processes are started from a
+fork server (WORKER_START_METHOD), not forked from the API process: by
+startup the API already runs the stage thread pool, database connections and
+dataset reload threads, none of which survive a fork safely. Each worker
+builds the reference datasets and spatial indexes in its initializer (the
+school table is memory-mapped, so its pages are still shared) and the pool
+is pre-warmed so the first request never pays for process start-up. Each
+worker keeps checking its reference files for changes like the API process
+does.
+
+At most WORKER_MAX_PENDING jobs are queued or running at once; beyond that,
+submissions fail fast with WorkerPoolFull (the API answers 503) instead of
+piling up behind a saturated pool. A job whose caller is cancelled gives its
+slot back at once; a worker already running it finishes it in the background.
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+
+from app.config import settings
+from app.services.metrics import WORKER_JOB_SECONDS, collector, current_profile
+
+# Job name -> "module:function" (resolved inside the worker, so only the
+# name and the arguments are pickled)
+JOBS = {
+    "batch_analysis": "app.services.analysis_pipeline:run_batch_analyses",
+    "impact_heatmap": "app.services.heatmap_generator:generate_impact_heatmap",
+    "parameter_sweep": "app.services.parameter_sweep:sweep_parameters",
+    "shadow_study": "app.services.shadow_calculator:calculate_shadow_sweep",
+    "site_search": "app.services.site_search:search_sites",
+    "traffic_batch": "app.services.traffic_calculator:calculate_traffic_batch",
+}
+
+
+class WorkerPoolFull(Exception):
+    """Raised when WORKER_MAX_PENDING jobs are already queued or running"""
+
+
+def resolve_job(name):
+    """Callable for a job name"""
+    module_name, function_name = JOBS[name].split(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def execute_job(name, args, kwargs):
+    """
+    Run one job (in a worker process or thread)
+    Returns: (result, wall-clock start time, run seconds)
+    """
+    started_at = time.time()
+    start = time.perf_counter()
+    result = resolve_job(name)(*args, **kwargs)
+    return result, started_at, time.perf_counter() - start
+
+
+def load_reference_data():
+    """
+    Build every reference dataset and its derived indexes (API startup, and
+    the initializer of every worker process)
+    """
+    from app.services import school_analyzer, traffic_calculator, transit_analyzer, zoning_checker
+    school_analyzer.get_schools_dataset()
+    zoning_checker.get_zoning_index()
+    transit_analyzer.get_stations_dataset()
+    transit_analyzer.prepare_walk_field()
+    traffic_calculator.get_intersections_dataset()
+    traffic_calculator.prepare_road_routes()
+
+
+def worker_ready():
+    """Pre-warm job: returns the worker's pid once its initializer has run"""
+    return os.getpid()
+
+
+def default_thread_count():
+    """Size of asyncio's default thread pool (used in thread mode)"""
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+class WorkerPool:
+    """Bounded job runner over worker processes (or threads) with utilization metrics"""
+
+    def __init__(self, processes=0, max_pending=64, start_method="forkserver"):
+        self.processes = processes
+        self.max_pending = max_pending
+        self.start_method = start_method
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._started_at = time.monotonic()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.restarts = 0
+        self._busy_seconds = 0.0
+        self._wait_seconds = 0.0
+
+    @property
+    def mode(self):
+        return "processes" if self.processes > 0 else "threads"
+
+    def start(self):
+        """Start and pre-warm the worker processes (no-op in thread mode)"""
+        if self.processes <= 0 or self._executor is not None:
+            return
+        context = multiprocessing.get_context(self.start_method)
+        if self.start_method == "forkserver":
+            # Import the analyzers once in the fork server, not in every worker
+            context.set_forkserver_preload(
+                [__name__] + sorted({path.split(":")[0] for path in JOBS.values()})
+            )
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=context,
+            initializer=load_reference_data
+        )
+        # Block until the workers are up and initialized, not on the first request
+        for future in [self._executor.submit(worker_ready) for _ in range(self.processes)]:
+            future.result()
+        print(f"✅ Started {self.processes} analysis worker processes ({self.start_method})")
+
+    def shutdown(self):
+        """Stop the worker processes, dropping queued jobs"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, name, *args, **kwargs):
+        """
+        Run a job off the event loop and return its result
+        Raises WorkerPoolFull when WORKER_MAX_PENDING jobs are already in flight
+        """
+        if name not in JOBS:
+            raise KeyError(f"Unknown job '{name}'")
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise WorkerPoolFull(f"{self._pending} analysis jobs already pending")
+            self._pending += 1
+            self.submitted += 1
+
+        submitted_at = time.time()
+        submitted = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        # Whatever happens below, including cancellation (a BaseException),
+        # the slot is given back exactly once
+        outcome, run_seconds, wait_seconds = "cancelled", 0.0, 0.0
+        try:
+            if executor is not None:
+                future = loop.run_in_executor(executor, execute_job, name, args, kwargs)
+            else:
+                future = asyncio.to_thread(execute_job, name, args, kwargs)
+            result, started_at, run_seconds = await future
+            wait_seconds = max(0.0, started_at - submitted_at)
+            outcome = "completed"
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); replace the pool for later jobs
+            outcome = "failed"
+            await asyncio.to_thread(self._restart, executor)
+            raise
+        except Exception:
+            outcome = "failed"
+            raise
+        finally:
+            self._record(outcome, run_seconds, wait_seconds)
+
+        WORKER_JOB_SECONDS.observe(wait_seconds, job=name, phase="wait")
+        WORKER_JOB_SECONDS.observe(run_seconds, job=name, phase="run")
+        profile = current_profile()
+        if profile is not None:
+            profile.add(
+                f"worker:{name}", submitted, time.perf_counter(), mode=self.mode,
+                queued_ms=round(wait_seconds * 1000, 2), run_ms=round(run_seconds * 1000, 2)
+            )
+        return result
+
+    def _record(self, outcome, run_seconds=0.0, wait_seconds=0.0):
+        """Give back a job's slot and count its outcome: completed, failed or cancelled"""
+        with self._lock:
+            self._pending -= 1
+            if outcome == "completed":
+                self.completed += 1
+                self._busy_seconds += run_seconds
+                self._wait_seconds += wait_seconds
+            elif outcome == "failed":
+                self.failed += 1
+            else:
+                self.cancelled += 1
+
+    def _restart(self, broken):
+        with self._lock:
+            # Several failed jobs can report the same broken pool; replace it once
+            if broken is None or self._executor is not broken:
+                return
+            self._executor = None
+            self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    def stats(self):
+        """Queue depth, worker utilization and job counters"""
+        workers = self.processes if self.processes > 0 else default_thread_count()
+        with self._lock:
+            pending = self._pending
+            uptime = time.monotonic() - self._started_at
+            return {
+                "mode": self.mode,
+                "workers": workers,
+                "pending": pending,
+                "running": min(pending, workers),
+                "queue_depth": max(0, pending - workers),
+                "max_pending": self.max_pending,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "rejected": self.rejected,
+                "restarts": self.restarts,
+                "busy_seconds": round(self._busy_seconds, 3),
+                # Share of total worker time spent running jobs since start
+                "utilization": round(self._busy_seconds / (workers * uptime), 4) if uptime > 0 else 0.0,
+                "avg_wait_ms": round(self._wait_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+                "avg_run_ms": round(self._busy_seconds / self.completed * 1000, 2) if self.completed else 0.0
+            }
+
+
+pool = WorkerPool(
+    processes=settings.WORKER_PROCESSES,
+    max_pending=settings.WORKER_MAX_PENDING,
+    start_method=settings.WORKER_START_METHOD
+)
+
+
+@collector("citytrotter_worker_jobs_pending", "Worker tier jobs queued or running", "gauge")
+def _worker_pending():
+    return [((), pool.stats()["pending"])]
+
+
+@collector("citytrotter_worker_utilization", "Share of worker time spent running jobs since start", "gauge")
+def _worker_utilization():
+    return [((), pool.stats()["utilization"])]
+
+
+@collector("citytrotter_worker_jobs_total", "Worker tier jobs by outcome", "counter", ("outcome",))
+def _worker_jobs():
+    stats = pool.stats()
+    return [((outcome,), stats[outcome]) for outcome in ("completed", "failed", "cancelled", "rejected")]
@@ -1,21 +1,156 @@
+"""
+Zoning district lookup and compliance checks
+District polygons are loaded once from data/atlanta_zoning.geojson into an
+STRtree (R-tree) index; lookups are point-in-polygon tests against the few
+districts whose bounding boxes contain the point.
+
+The bundled file holds synthetic sample districts, not official zoning. A
+file marked "synthetic": true is reported as data_source "synthetic_sample"
+in every result; any other file reports its "source" field.
+"""
+
+import json
+import os
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+from app.services.datasets import registry as datasets
+
+# Used when a point falls outside every loaded district
+DEFAULT_DISTRICT = {"zone": "MR-3", "name": "Multifamily Residential", "max_height": 150, "max_far": 4.0}
+
+ZONING_FILE = "atlanta_zoning.geojson"
+
+# data_source of results from a zoning file marked "synthetic": true
+SAMPLE_SOURCE = "synthetic_sample"
+
+# Feet of building height per story
+STORY_HEIGHT_FT = 12
+
+
+class ZoningIndex:
+    """
+    Zoning district polygons with an STRtree for point-in-polygon lookups
+    Where districts overlap (e.g. overlay districts), the smallest wins.
+    """
+
+    def __init__(self, features, source="file"):
+        self.source = source
+        self.polygons = [shape(f["geometry"]) for f in features]
+        self.districts = [
+            {
+                "zone": f["properties"]["zone"],
+                "name": f["properties"].get("name"),
+                "max_height": f["properties"].get("max_height"),
+                "max_far": f["properties"].get("max_far")
+            }
+            for f in features
+        ]
+        self.areas = shapely.area(np.array(self.polygons, dtype=object)) if self.polygons else np.empty(0)
+        self.tree = shapely.STRtree(self.polygons)
+        shapely.prepare(self.polygons)
+
+    def __len__(self):
+        return len(self.polygons)
+
+    def lookup(self, lat: float, lng: float) -> dict:
+        """District containing one point (DEFAULT_DISTRICT if none)"""
+        return self.lookup_many([lat], [lng])[0]
+
+    def lookup_many(self, lats, lngs) -> list:
+        """Districts containing each point, in one vectorized index query"""
+        indices = self.lookup_indices(lats, lngs)
+        return [self.districts[i] if i >= 0 else DEFAULT_DISTRICT for i in indices]
+
+    def lookup_indices(self, lats, lngs) -> np.ndarray:
+        """Index of the district containing each point, -1 where none does"""
+        points = shapely.points(np.asarray(lngs, dtype=np.float64), np.asarray(lats, dtype=np.float64))
+        result = np.full(len(points), -1, dtype=np.intp)
+        if len(self.polygons) == 0 or len(points) == 0:
+            return result
+
+        point_idx, polygon_idx = self.tree.query(points, predicate="intersects")
+
+        # Smallest containing district wins: visit larger districts first so
+        # smaller ones overwrite them
+        order = np.argsort(-self.areas[polygon_idx], kind="stable")
+        result[point_idx[order]] = polygon_idx[order]
+        return result
+
+    def max_heights(self, lats, lngs) -> np.ndarray:
+        """Height limit in feet for each point (inf where unlimited)"""
+        return np.array([
+            np.inf if d["max_height"] is None else d["max_height"]
+            for d in self.lookup_many(lats, lngs)
+        ], dtype=np.float64)
+
+
+def load_zoning_features(path):
+    """
+    Read district features from a GeoJSON FeatureCollection
+    Returns (features, data source label)
+    """
+    with open(path, 'r') as f:
+        data = json.load(f)
+    source = SAMPLE_SOURCE if data.get("synthetic") else data.get("source", "file")
+    return data["features"], source
+
+
+def build_zoning_index(path, version):
+    """ZoningIndex over the districts in a zoning file"""
+    index = ZoningIndex(*load_zoning_features(path))
+    sample = " (synthetic sample data, not official zoning)" if index.source == SAMPLE_SOURCE else ""
+    print(f"✅ Loaded {len(index)} zoning districts from {os.path.basename(path)}{sample}")
+    return index
+
+
+datasets.register("zoning", ZONING_FILE, build_zoning_index)
+
+
+def get_zoning_index():
+    """ZoningIndex for the current zoning data file"""
+    return datasets.get("zoning")
+
+
 def check_zoning(location, stories, units):
     """
     Check zoning compliance
     Returns dict (not Pydantic object)
     """
-    zone_code = "MR-3"
-    max_height = 150
-    building_height = stories * 12
-    
+    index = get_zoning_index()
+    return build_zoning_result(index.lookup(location.lat, location.lng), stories, index.source)
+
+
+def check_zoning_batch(locations, stories_list):
+    """
+    Check zoning compliance for many sites with one vectorized index query
+    Returns a list of results in the same order as locations
+    """
+    index = get_zoning_index()
+    districts = index.lookup_many([loc.lat for loc in locations], [loc.lng for loc in locations])
+    return [
+        build_zoning_result(district, stories, index.source)
+        for district, stories in zip(districts, stories_list)
+    ]
+
+
+def build_zoning_result(district, stories, source):
+    """Build the zoning result for a building in a district"""
+    max_height = district["max_height"]
+    building_height = stories * STORY_HEIGHT_FT
+
     violations = []
-    if building_height > max_height:
+    if max_height is not None and building_height > max_height:
         violations.append(f"Height {building_height}ft exceeds {max_height}ft")
-    
+
     # Return dict (not object)
     return {
-        "zone": zone_code,
+        "zone": district["zone"],
         "compliant": len(violations) == 0,
         "violations": violations,
         "max_height": max_height,
-        "max_far": 4.0
-    }
\ No newline at end of file
+        "max_far": district["max_far"],
+        "data_source": source
+    }
@@ -0,0 +1,125 @@
+"""
+School dataset benchmark: JSON records versus the memory-mapped columnar table
+
+Times startup (parse JSON into dicts versus open the mmap'd columns) and the
+per-request school impact scan for a synthetic metro-wide school list.
+
+Usage (from backend/):
+    python -m benchmarks.bench_school_columns
+    python -m benchmarks.bench_school_columns --schools 5000 --queries 500
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.config import settings
+from app.services import school_analyzer
+from app.services.columnar import read_table
+from app.services.geo import PointDataset
+
+METRO_BBOX = (33.40, -84.85, 34.20, -83.95)  # min_lat, min_lng, max_lat, max_lng
+
+
+def synthetic_schools(count, rng):
+    """School records spread uniformly over METRO_BBOX"""
+    min_lat, min_lng, max_lat, max_lng = METRO_BBOX
+    grades = ["elementary", "middle", "high"]
+    return [
+        {
+            "name": f"School {i}",
+            "lat": float(rng.uniform(min_lat, max_lat)),
+            "lng": float(rng.uniform(min_lng, max_lng)),
+            "grade_level": grades[i % 3],
+            "enrollment": int(rng.integers(200, 2000)),
+            "capacity": int(rng.integers(300, 2000)),
+        }
+        for i in range(count)
+    ]
+
+
+def dict_school_impact(records, units, indices, distances):
+    """The school impact scan over per-row dicts, as before the columnar table"""
+    students = units * settings.STUDENTS_PER_UNIT
+    schools, bottlenecks = [], []
+    for index, distance in zip(indices, distances):
+        school = records[index]
+        new_students = students * school_analyzer.GRADE_SHARES.get(school["grade_level"], 0.3)
+        capacity_pct = (school["enrollment"] + new_students) / school["capacity"] * 100
+        schools.append({
+            "name": school["name"],
+            "distance": round(float(distance), 1),
+            "grade_level": school["grade_level"],
+            "enrollment": school["enrollment"],
+            "capacity": school["capacity"],
+            "capacity_pct": round(capacity_pct, 1)
+        })
+        if capacity_pct > 100:
+            bottlenecks.append({
+                "school": school["name"],
+                "capacity_pct": round(capacity_pct, 1),
+                "severity": "HIGH" if capacity_pct > 120 else "MEDIUM",
+                "message": f"{school['name']} will be at {capacity_pct:.0f}% capacity"
+            })
+    return {"students_generated": round(students, 1), "schools": schools, "bottlenecks": bottlenecks}
+
+
+def run(school_count, query_count, seed=42):
+    rng = np.random.default_rng(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "schools.json")
+        with open(json_path, "w") as f:
+            json.dump({"schools": synthetic_schools(school_count, rng)}, f)
+
+        start = time.perf_counter()
+        with open(json_path) as f:
+            records = json.load(f)["schools"]
+        dict_dataset = PointDataset(records, name="schools_json")
+        json_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        table_dir = school_analyzer.build_school_columns(json_path, os.path.join(tmp, "columns"))
+        convert_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        table = read_table(table_dir)
+        column_dataset = PointDataset(table, name="schools_columns", lats=table["lat"], lngs=table["lng"])
+        column_dataset.grade_shares = table.codes("grade_level", school_analyzer.GRADE_SHARES, 0.3)[table["grade_level"]]
+        mmap_ms = (time.perf_counter() - start) * 1000
+
+        min_lat, min_lng, max_lat, max_lng = METRO_BBOX
+        queries = list(zip(rng.uniform(min_lat, max_lat, query_count), rng.uniform(min_lng, max_lng, query_count)))
+        nearby = [column_dataset.within_radius(lat, lng, school_analyzer.SCHOOL_RADIUS_M) for lat, lng in queries]
+
+        start = time.perf_counter()
+        for indices, distances in nearby:
+            dict_school_impact(records, 300, indices, distances)
+        dict_us = (time.perf_counter() - start) / query_count * 1e6
+
+        start = time.perf_counter()
+        for indices, distances in nearby:
+            school_analyzer.build_school_impact(column_dataset, 300, indices, distances)
+        column_us = (time.perf_counter() - start) / query_count * 1e6
+
+    hits = np.mean([len(indices) for indices, _ in nearby])
+    print(f"{school_count} schools, {query_count} queries, {hits:.1f} schools in radius on average")
+    print(f"  startup  json parse + dicts   {json_ms:9.2f} ms")
+    print(f"  startup  mmap columns         {mmap_ms:9.2f} ms   (one-off conversion {convert_ms:.2f} ms)")
+    print(f"  request  dict rows            {dict_us:9.2f} us")
+    print(f"  request  columnar             {column_us:9.2f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schools", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    run(args.schools, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Service benchmark: latency of each analyzer at several reference dataset sizes
+
+Writes synthetic schools, intersections, MARTA stations and zoning districts
+(SIZE of each, spread over metro Atlanta) to a temporary data directory,
+points REFERENCE_DATA_DIR at it, and times every service function over
+random sites. Functions that do not depend on the reference datasets
+(infrastructure, economic impact, shadows) run once, at the first size.
+No walk or road network is installed, so walk times and traffic use their
+straight-line and distance-decay models.
+
+Usage (from backend/):
+    python -m benchmarks.bench_services
+    python -m benchmarks.bench_services --sizes 50 5000 50000 --queries 200 --output services.json
+    python -m benchmarks.bench_services --baseline services.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from app.config import settings
+from app.models.analysis import Location
+from app.services import (
+    capacity_solver,
+    economic_analyzer,
+    heatmap_generator,
+    infrastructure_analyzer,
+    parameter_sweep,
+    school_analyzer,
+    shadow_calculator,
+    site_search,
+    traffic_calculator,
+    transit_analyzer,
+    zoning_checker
+)
+from app.services.datasets import DEFAULT_DATA_DIR, registry as datasets
+from benchmarks.results import add_output_args, build_results, finish, latency_metrics, metric
+
+METRO_BBOX = (33.40, -84.85, 34.20, -83.95)  # min_lat, min_lng, max_lat, max_lng
+
+DEFAULT_SIZES = [50, 500, 5_000]
+
+ZONES = [("MR-3", 150, 4.0), ("R-4", 35, 0.5), ("C-2", 80, 3.0), ("SPI-16", None, 8.0)]
+GRADES = ["elementary", "middle", "high"]
+LOS = "ABCDEF"
+
+
+def random_points(count, rng):
+    """Uniform random lat/lng arrays inside METRO_BBOX"""
+    min_lat, min_lng, max_lat, max_lng = METRO_BBOX
+    return rng.uniform(min_lat, max_lat, count), rng.uniform(min_lng, max_lng, count)
+
+
+def write_synthetic_data(data_dir, size, rng):
+    """Reference data files with size schools, intersections, stations and zoning districts"""
+    def dump(filename, payload):
+        with open(os.path.join(data_dir, filename), "w") as f:
+            json.dump(payload, f)
+
+    lats, lngs = random_points(size, rng)
+    dump(school_analyzer.SCHOOLS_FILE, {"schools": [
+        {
+            "name": f"School {i}", "lat": lat, "lng": lng, "grade_level": GRADES[i % 3],
+            "enrollment": int(rng.integers(200, 2000)), "capacity": int(rng.integers(300, 2000))
+        }
+        for i, (lat, lng) in enumerate(zip(lats.tolist(), lngs.tolist()))
+    ]})
+
+    lats, lngs = random_points(size, rng)
+    volumes = rng.integers(200, 1800, size)
+    dump(traffic_calculator.INTERSECTIONS_FILE, {"intersections": [
+        {
+            "name": f"Intersection {i}", "lat": lat, "lng": lng, "current_volume": int(volume),
+            "current_los": LOS[traffic_calculator.los_levels(volume)]
+        }
+        for i, (lat, lng, volume) in enumerate(zip(lats.tolist(), lngs.tolist(), volumes))
+    ]})
+
+    lats, lngs = random_points(size, rng)
+    dump(transit_analyzer.STATIONS_FILE, {"stations": [
+        {"name": f"Station {i}", "line": "Red", "lat": lat, "lng": lng}
+        for i, (lat, lng) in enumerate(zip(lats.tolist(), lngs.tolist()))
+    ]})
+
+    # Zoning: a side x side grid of districts covering the metro area
+    side = max(1, int(round(size ** 0.5)))
+    min_lat, min_lng, max_lat, max_lng = METRO_BBOX
+    lat_edges = np.linspace(min_lat, max_lat, side + 1)
+    lng_edges = np.linspace(min_lng, max_lng, side + 1)
+    features = []
+    for row in range(side):
+        for col in range(side):
+            zone, max_height, max_far = ZONES[(row * side + col) % len(ZONES)]
+            south, north = float(lat_edges[row]), float(lat_edges[row + 1])
+            west, east = float(lng_edges[col]), float(lng_edges[col + 1])
+            features.append({
+                "type": "Feature",
+                "properties": {"zone": zone, "name": zone, "max_height": max_height, "max_far": max_far},
+                "geometry": {"type": "Polygon", "coordinates": [
+                    [[west, south], [east, south], [east, north], [west, north], [west, south]]
+                ]}
+            })
+    dump(zoning_checker.ZONING_FILE, {"type": "FeatureCollection", "features": features})
+
+    # Trip destinations are a handful of activity centers at any scale
+    shutil.copy(os.path.join(DEFAULT_DATA_DIR, traffic_calculator.ZONES_FILE), data_dir)
+
+
+def use_data_dir(data_dir):
+    """Point the dataset registry at data_dir and load every dataset from it"""
+    settings.REFERENCE_DATA_DIR = data_dir
+    settings.SCHOOLS_COLUMNS_DIR = os.path.join(data_dir, "columns")
+    start = time.perf_counter()
+    datasets.reload()
+    school_analyzer.get_schools_dataset()
+    traffic_calculator.get_intersections_dataset()
+    traffic_calculator.get_destination_zones()
+    transit_analyzer.get_stations_dataset()
+    zoning_checker.get_zoning_index()
+    return time.perf_counter() - start
+
+
+def time_calls(fn, args_list):
+    """Durations in seconds of fn(*args) for each args tuple"""
+    durations = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def uncached_heatmap(resolution):
+    """Impact heatmap computed from scratch"""
+    heatmap_generator.clear_heatmap_caches()
+    heatmap_generator.generate_impact_heatmap(heatmap_generator.ATLANTA_BBOX, resolution, 300)
+
+
+def site_footprint(location):
+    """A small rectangular footprint at a site"""
+    lng, lat = location.lng, location.lat
+    return [[lng, lat], [lng + 0.0004, lat], [lng + 0.0004, lat + 0.0003], [lng, lat + 0.0003]]
+
+
+def sized_benchmarks(sites, grid_runs):
+    """(name, fn, args list) of the functions whose cost depends on dataset size"""
+    few = sites[:max(1, len(sites) // 4)]
+    return [
+        ("calculate_school_impact", school_analyzer.calculate_school_impact, [(s, 300) for s in sites]),
+        ("calculate_traffic", traffic_calculator.calculate_traffic, [(s, 300) for s in sites]),
+        ("analyze_transit_access", transit_analyzer.analyze_transit_access, [(s,) for s in sites]),
+        ("check_zoning", zoning_checker.check_zoning, [(s, 8, 300) for s in sites]),
+        ("calculate_school_impact_batch", school_analyzer.calculate_school_impact_batch,
+         [(sites, [300] * len(sites))]),
+        ("solve_capacity", capacity_solver.solve_capacity, [(s,) for s in few]),
+        ("sweep_parameters", parameter_sweep.sweep_parameters,
+         [(s, site_footprint(s), list(range(10, 1001, 10)), list(range(1, 31))) for s in few]),
+        ("generate_impact_heatmap", uncached_heatmap, [(50,)] * grid_runs),
+        ("search_sites", site_search.search_sites, [(300, 8)] * grid_runs),
+    ]
+
+
+def fixed_benchmarks(sites):
+    """(name, fn, args list) of the functions that do not read reference datasets"""
+    few = sites[:max(1, len(sites) // 4)]
+    return [
+        ("calculate_infrastructure_impact", infrastructure_analyzer.calculate_infrastructure_impact,
+         [(s, 300) for s in sites]),
+        ("analyze_economic_impact", economic_analyzer.analyze_economic_impact, [(s, 300, 8) for s in sites]),
+        ("calculate_shadows", shadow_calculator.calculate_shadows, [(s, site_footprint(s), 8) for s in few]),
+    ]
+
+
+def report(name, durations, metrics):
+    """Add latency metrics for one function and print its row"""
+    entries = latency_metrics(name, durations)
+    metrics.update(entries)
+    print(f"  {name:<48} {entries[name + '.p50_ms']['value']:>10.3f} "
+          f"{entries[name + '.p95_ms']['value']:>10.3f} {entries[name + '.p99_ms']['value']:>10.3f}")
+
+
+def run(sizes, query_count, grid_runs, seed=42):
+    rng = np.random.default_rng(seed)
+    # Sites fall inside the city, where the heatmap and site search run
+    min_lng, min_lat, max_lng, max_lat = heatmap_generator.ATLANTA_BBOX
+    sites = [
+        Location(lat=float(lat), lng=float(lng))
+        for lat, lng in zip(rng.uniform(min_lat, max_lat, query_count), rng.uniform(min_lng, max_lng, query_count))
+    ]
+
+    metrics = {}
+    saved = (settings.REFERENCE_DATA_DIR, settings.SCHOOLS_COLUMNS_DIR)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for position, size in enumerate(sizes):
+                data_dir = os.path.join(tmp, str(size))
+                os.makedirs(data_dir)
+                write_synthetic_data(data_dir, size, rng)
+                load_seconds = use_data_dir(data_dir)
+                metrics[f"load_datasets[{size}].ms"] = metric(load_seconds * 1000, "ms")
+
+                print(f"\n{size:,} schools / intersections / stations / zoning districts "
+                      f"(loaded in {load_seconds * 1000:.1f} ms), {query_count} sites")
+                print(f"  {'function':<48} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+                benchmarks = [(f"{name}[{size}]", fn, args) for name, fn, args in sized_benchmarks(sites, grid_runs)]
+                if position == 0:
+                    benchmarks += fixed_benchmarks(sites)
+                for label, fn, args_list in benchmarks:
+                    fn(*args_list[0])  # warm up
+                    report(label, time_calls(fn, args_list), metrics)
+    finally:
+        settings.REFERENCE_DATA_DIR, settings.SCHOOLS_COLUMNS_DIR = saved
+        datasets.reload()
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--queries", type=int, default=200, help="Sites per point-query function")
+    parser.add_argument("--grid-runs", type=int, default=3, help="Runs of the whole-city heatmap and site search")
+    add_output_args(parser)
+    args = parser.parse_args()
+
+    params = {"sizes": args.sizes, "queries": args.queries, "grid_runs": args.grid_runs}
+    metrics = run(args.sizes, args.queries, args.grid_runs)
+    sys.exit(finish(args, build_results("services", params, metrics)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Spatial index benchmark: lookup latency versus dataset size
+
+Compares KD-tree backed PointDataset queries with a brute-force haversine
+scan over every feature, for synthetic features spread over metro Atlanta.
+
+Usage (from backend/):
+    python -m benchmarks.bench_spatial_index
+    python -m benchmarks.bench_spatial_index --sizes 50 1000 1000000 --queries 200
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.services.geo import PointDataset
+
+# Metro Atlanta bounding box (roughly the 10-county ARC region)
+METRO_BBOX = (33.40, -84.85, 34.20, -83.95)  # min_lat, min_lng, max_lat, max_lng
+
+DEFAULT_SIZES = [50, 500, 5_000, 50_000, 500_000, 1_000_000]
+
+
+def random_points(count, rng):
+    """Uniform random lat/lng arrays inside METRO_BBOX"""
+    min_lat, min_lng, max_lat, max_lng = METRO_BBOX
+    return rng.uniform(min_lat, max_lat, count), rng.uniform(min_lng, max_lng, count)
+
+
+def time_per_query(fn, queries):
+    """Mean wall-clock microseconds per call of fn(lat, lng)"""
+    start = time.perf_counter()
+    for lat, lng in queries:
+        fn(lat, lng)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def run(sizes, query_count, radius_m, k, seed=42):
+    rng = np.random.default_rng(seed)
+    query_lats, query_lngs = random_points(query_count, rng)
+    queries = list(zip(query_lats, query_lngs))
+
+    print(f"{query_count} queries, radius {radius_m:.0f} m, k={k}")
+    print(f"{'features':>10} {'build ms':>10} {'knn us':>10} {'radius us':>10} "
+          f"{'brute us':>10} {'avg hits':>10}")
+
+    for size in sizes:
+        lats, lngs = random_points(size, rng)
+        records = [{"lat": lat, "lng": lng} for lat, lng in zip(lats, lngs)]
+
+        start = time.perf_counter()
+        dataset = PointDataset(records, name=f"synthetic_{size}")
+        build_ms = (time.perf_counter() - start) * 1000
+
+        knn_us = time_per_query(lambda lat, lng: dataset.k_nearest(lat, lng, k), queries)
+        radius_us = time_per_query(lambda lat, lng: dataset.within_radius(lat, lng, radius_m), queries)
+
+        # Brute force: full haversine scan plus partial sort, as before the index
+        def brute(lat, lng):
+            distances = dataset.distances_from(lat, lng)
+            np.argpartition(distances, min(k, size) - 1)
+            return np.nonzero(distances <= radius_m)[0]
+
+        brute_queries = queries[:max(1, min(len(queries), 20_000_000 // size))]
+        brute_us = time_per_query(brute, brute_queries)
+
+        hits = np.mean([len(dataset.within_radius(lat, lng, radius_m)[0]) for lat, lng in queries[:50]])
+
+        print(f"{size:>10,} {build_ms:>10.1f} {knn_us:>10.1f} {radius_us:>10.1f} "
+              f"{brute_us:>10.1f} {hits:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--radius", type=float, default=4000)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+    run(args.sizes, args.queries, args.radius, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Compare two saved benchmark runs and flag regressions
+
+Exits with status 1 when any metric is worse than the baseline by more than
+the threshold, so it can gate CI.
+
+Usage (from backend/):
+    python -m benchmarks.compare current.json baseline.json
+    python -m benchmarks.compare current.json baseline.json --threshold 0.1
+"""
+
+import argparse
+import sys
+
+from benchmarks.results import DEFAULT_THRESHOLD, compare_results, load_results, print_comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("current", help="Results JSON of the run to check")
+    parser.add_argument("baseline", help="Results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative change counted as a regression (default 0.2)")
+    args = parser.parse_args()
+
+    current, baseline = load_results(args.current), load_results(args.baseline)
+    if current.get("suite") != baseline.get("suite"):
+        sys.exit(f"Cannot compare a {current.get('suite')} run with a {baseline.get('suite')} run")
+    for label, results in (("baseline", baseline), ("current", current)):
+        environment = results.get("environment", {})
+        print(f"{label:<9} {results.get('created_at')}  commit {environment.get('git_commit')}  "
+              f"{environment.get('cpu_count')} cpus  python {environment.get('python')}")
+    if current.get("params") != baseline.get("params"):
+        print("Warning: runs used different parameters")
+
+    regressions = print_comparison(compare_results(current, baseline, args.threshold), args.threshold)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
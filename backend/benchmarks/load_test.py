@@ -0,0 +1,153 @@
+"""
+Load test: drive POST /api/v1/analyze-building at a fixed concurrency
+
+Runs the app in-process (startup and shutdown included) behind an ASGI
+transport, with the local fake Gemini model standing in for the API, and
+reports throughput, latency percentiles and memory. Requests go to random
+sites in the city; --distinct limits how many different sites are cycled
+through, to measure a warm analysis cache.
+
+Analyses are saved to a temporary SQLite database unless DATABASE_URL is set,
+so runs never touch the development database.
+
+Usage (from backend/):
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --requests 2000 --concurrency 32 --gemini-latency 0.2 --output load.json
+    python -m benchmarks.load_test --baseline load.json
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.results import add_output_args, build_results, finish, latency_metrics, metric
+
+# Same bounds as heatmap_generator.ATLANTA_BBOX (min_lng, min_lat, max_lng, max_lat)
+CITY_BBOX = (-84.55, 33.64, -84.29, 33.89)
+
+
+def rss_mb():
+    """Current resident set size in MB"""
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def peak_rss_mb():
+    """Peak resident set size of the process so far, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def building_bodies(count, distinct, rng):
+    """count request bodies cycling through distinct random sites and programs"""
+    min_lng, min_lat, max_lng, max_lat = CITY_BBOX
+    sites = []
+    for _ in range(distinct):
+        lat, lng = float(rng.uniform(min_lat, max_lat)), float(rng.uniform(min_lng, max_lng))
+        sites.append({
+            "location": {"lat": lat, "lng": lng},
+            "footprint": [[lng, lat], [lng + 0.0004, lat], [lng + 0.0004, lat + 0.0003], [lng, lat + 0.0003]],
+            "type": "residential",
+            "units": int(rng.integers(20, 600)),
+            "stories": int(rng.integers(2, 30)),
+            "parking_spaces": int(rng.integers(0, 400))
+        })
+    return [sites[i % distinct] for i in range(count)]
+
+
+async def drive(app, bodies, concurrency, warmup):
+    """
+    Send every body with concurrency requests in flight
+    Returns (per-request seconds, status counts, wall seconds)
+    """
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+        for body in bodies[:warmup]:
+            await client.post("/api/v1/analyze-building", json=body)
+
+        pending = iter(bodies[warmup:])
+        durations = []
+        statuses = {}
+
+        async def worker():
+            for body in pending:
+                start = time.perf_counter()
+                response = await client.post("/api/v1/analyze-building", json=body)
+                durations.append(time.perf_counter() - start)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return durations, statuses, time.perf_counter() - start
+
+
+async def run(request_count, concurrency, distinct, gemini_latency, warmup, seed=42):
+    # Imported here so the DATABASE_URL chosen in main() is the one the app sees
+    from app.main import app
+    from app.services import gemini_service
+    from app.services.fake_gemini import FakeGenerativeModel
+
+    gemini_service.set_model(FakeGenerativeModel(gemini_latency))
+    rng = np.random.default_rng(seed)
+    bodies = building_bodies(request_count + warmup, distinct or request_count + warmup, rng)
+
+    async with app.router.lifespan_context(app):
+        rss_before = rss_mb()
+        durations, statuses, wall = await drive(app, bodies, concurrency, warmup)
+        rss_after = rss_mb()
+
+    completed = len(durations)
+    errors = sum(count for status, count in statuses.items() if status >= 400)
+    print(f"\n{completed} requests, concurrency {concurrency}, fake Gemini latency {gemini_latency * 1000:.0f} ms")
+    print(f"  statuses   {dict(sorted(statuses.items()))}")
+    print(f"  throughput {completed / wall:10.1f} req/s over {wall:.2f} s")
+    ms = np.asarray(durations) * 1000
+    print(f"  latency    p50 {np.percentile(ms, 50):.1f} ms   p95 {np.percentile(ms, 95):.1f} ms   "
+          f"p99 {np.percentile(ms, 99):.1f} ms   max {ms.max():.1f} ms")
+    print(f"  memory     rss {rss_before:.1f} -> {rss_after:.1f} MB, peak {peak_rss_mb():.1f} MB")
+
+    return {
+        "throughput_rps": metric(completed / wall, "req/s", better="higher"),
+        "error_rate": metric(errors / completed if completed else 0, "ratio"),
+        **latency_metrics("analyze_building", durations),
+        "rss_growth_mb": metric(rss_after - rss_before, "MB"),
+        "peak_rss_mb": metric(peak_rss_mb(), "MB"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--distinct", type=int, default=0, help="Distinct sites cycled through (0 = every request)")
+    parser.add_argument("--gemini-latency", type=float, default=0.05, help="Fake Gemini response time (s)")
+    parser.add_argument("--warmup", type=int, default=10, help="Requests sent before measuring")
+    add_output_args(parser)
+    args = parser.parse_args()
+
+    params = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "distinct": args.distinct,
+        "gemini_latency": args.gemini_latency,
+        "warmup": args.warmup,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmp, 'load_test.db')}")
+        metrics = asyncio.run(run(
+            args.requests, args.concurrency, args.distinct, args.gemini_latency, args.warmup
+        ))
+    sys.exit(finish(args, build_results("load", params, metrics)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark results as JSON, and regression checks against a baseline run
+
+A results file holds one suite's metrics, each with its unit and whether
+lower or higher is better, plus the parameters and environment of the run:
+
+    {"suite": "services", "created_at": ..., "params": {...},
+     "environment": {"git_commit": ..., "python": ..., ...},
+     "metrics": {"calculate_school_impact[5000].p50_ms":
+                     {"value": 0.21, "unit": "ms", "better": "lower"}, ...}}
+
+A metric regresses when it is worse than the baseline by more than the
+threshold (a fraction: 0.2 = 20%). Only compare runs from the same machine
+and parameters; the environment block is there to check that.
+"""
+
+from datetime import datetime
+import json
+import math
+import os
+import platform
+import subprocess
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.2
+
+
+def metric(value, unit, better="lower"):
+    """One metric entry"""
+    return {"value": round(float(value), 4), "unit": unit, "better": better}
+
+
+def latency_metrics(prefix, seconds):
+    """Mean and p50/p95/p99 latency entries (ms) for a list of durations in seconds"""
+    ms = np.asarray(seconds, dtype=np.float64) * 1000
+    return {
+        f"{prefix}.mean_ms": metric(ms.mean(), "ms"),
+        f"{prefix}.p50_ms": metric(np.percentile(ms, 50), "ms"),
+        f"{prefix}.p95_ms": metric(np.percentile(ms, 95), "ms"),
+        f"{prefix}.p99_ms": metric(np.percentile(ms, 99), "ms"),
+    }
+
+
+def environment():
+    """Where the run happened: commit, interpreter and library versions, cores"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def build_results(suite, params, metrics):
+    """A results document for one run"""
+    return {
+        "suite": suite,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "params": params,
+        "environment": environment(),
+        "metrics": metrics,
+    }
+
+
+def save_results(path, results):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Metrics present in both runs with their relative change in value, worst
+    first: [(name, baseline value, current value, change, regressed), ...]
+    """
+    rows = []
+    for name, entry in current["metrics"].items():
+        base = baseline["metrics"].get(name)
+        if base is None:
+            continue
+        if base["value"] == 0:
+            change = 0.0 if entry["value"] == 0 else math.copysign(math.inf, entry["value"])
+        else:
+            change = (entry["value"] - base["value"]) / abs(base["value"])
+        worse_by = -change if entry["better"] == "higher" else change
+        rows.append((worse_by, (name, base["value"], entry["value"], change, worse_by > threshold)))
+    rows.sort(key=lambda row: row[0], reverse=True)
+    return [row for _, row in rows]
+
+
+def print_comparison(rows, threshold=DEFAULT_THRESHOLD):
+    """Print a comparison table; returns the number of regressions"""
+    regressions = sum(1 for row in rows if row[4])
+    print(f"\nAgainst baseline (regression threshold {threshold:.0%}):")
+    print(f"{'metric':<52} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, base, value, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<52} {base:>12.4g} {value:>12.4g} {change:>+9.1%}{flag}")
+    print(f"{regressions} regression(s) in {len(rows)} compared metrics")
+    return regressions
+
+
+def add_output_args(parser):
+    """--output / --baseline / --threshold options shared by every suite"""
+    parser.add_argument("--output", help="Write results JSON to this path")
+    parser.add_argument("--baseline", help="Compare against a previous results JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative change counted as a regression (default 0.2)")
+
+
+def finish(args, results):
+    """
+    Save and/or compare a run as the options ask
+    Returns the process exit code: 1 if any metric regressed, else 0
+    """
+    if args.output:
+        save_results(args.output, results)
+        print(f"\nSaved results to {args.output}")
+    if args.baseline:
+        baseline = load_results(args.baseline)
+        if baseline.get("suite") != results["suite"]:
+            print(f"Baseline is a {baseline.get('suite')} run, not {results['suite']}; not compared")
+            return 0
+        if baseline.get("params") != results["params"]:
+            print("Warning: baseline was run with different parameters")
+        if print_comparison(compare_results(results, baseline, args.threshold), args.threshold):
+            return 1
+    return 0
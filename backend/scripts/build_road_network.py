@@ -0,0 +1,108 @@
+"""
+Convert a GeoJSON road extract into the road network file used for traffic assignment
+
+Input is a FeatureCollection of LineString / MultiLineString features with
+OpenStreetMap tags as properties (e.g. exported with `osmium export` or from
+Overpass). Only drivable `highway` classes are kept. Edge travel times come
+from `maxspeed` (mph or km/h) when present, else a default speed per class.
+`oneway=yes` / `oneway=-1` (and motorways) produce one-directional edges.
+Segments sharing an endpoint coordinate (to 1e-7 degrees) are joined at one
+graph node.
+
+Usage (from backend/):
+    python -m scripts.build_road_network --geojson atlanta_roads.geojson
+    python -m scripts.build_road_network --geojson roads.geojson --out /data/atlanta_road_network.npz
+"""
+
+import argparse
+import json
+import re
+
+import numpy as np
+
+from app.services import traffic_calculator  # registers the road_network dataset
+from app.services.datasets import registry as datasets
+from app.services.geo import haversine_pairs
+from app.services.road_network import save_road_network
+
+# Free-flow speeds (km/h) for drivable OSM highway classes
+DEFAULT_SPEEDS_KPH = {
+    "motorway": 100, "motorway_link": 60,
+    "trunk": 80, "trunk_link": 50,
+    "primary": 60, "primary_link": 40,
+    "secondary": 50, "secondary_link": 35,
+    "tertiary": 45, "tertiary_link": 30,
+    "unclassified": 40, "residential": 35, "living_street": 15,
+}
+MPH_TO_KPH = 1.609344
+
+
+def parse_speed(value, highway):
+    """maxspeed tag in km/h, falling back to the class default"""
+    match = re.match(r"\s*(\d+(?:\.\d+)?)\s*(mph)?", str(value or ""))
+    if match:
+        speed = float(match.group(1))
+        return speed * MPH_TO_KPH if match.group(2) else speed
+    return DEFAULT_SPEEDS_KPH[highway]
+
+
+def build_network(features):
+    """Node coordinates and directed edges with travel times from road features"""
+    node_ids = {}
+    edges_from, edges_to, times = [], [], []
+
+    def node(coord):
+        key = (round(coord[0], 7), round(coord[1], 7))
+        return node_ids.setdefault(key, len(node_ids))
+
+    for feature in features:
+        properties = feature.get("properties") or {}
+        highway = properties.get("highway")
+        geometry = feature.get("geometry") or {}
+        if highway not in DEFAULT_SPEEDS_KPH or geometry.get("type") not in ("LineString", "MultiLineString"):
+            continue
+
+        lines = [geometry["coordinates"]] if geometry["type"] == "LineString" else geometry["coordinates"]
+        speed_ms = parse_speed(properties.get("maxspeed"), highway) / 3.6
+        oneway = str(properties.get("oneway", "yes" if highway == "motorway" else "no"))
+        forward = oneway != "-1"
+        backward = oneway not in ("yes", "true", "1")
+        for line in lines:
+            coords = np.asarray(line, dtype=np.float64)[:, :2]
+            if len(coords) < 2:
+                continue
+            ids = [node(coord) for coord in coords.tolist()]
+            lengths = haversine_pairs(coords[:-1, 1], coords[:-1, 0], coords[1:, 1], coords[1:, 0])
+            for a, b, length in zip(ids, ids[1:], lengths.tolist()):
+                if a == b:
+                    continue
+                if forward:
+                    edges_from.append(a)
+                    edges_to.append(b)
+                    times.append(length / speed_ms)
+                if backward:
+                    edges_from.append(b)
+                    edges_to.append(a)
+                    times.append(length / speed_ms)
+
+    coords = np.array(list(node_ids), dtype=np.float64).reshape(-1, 2)
+    return coords[:, 1], coords[:, 0], edges_from, edges_to, times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--geojson", required=True, help="road LineString FeatureCollection with OSM tags")
+    parser.add_argument("--out", default=None, help="output .npz (default: the road_network dataset path)")
+    args = parser.parse_args()
+
+    with open(args.geojson, "r") as f:
+        features = json.load(f)["features"]
+    lats, lngs, edges_from, edges_to, times = build_network(features)
+
+    out = args.out or datasets.path("road_network")
+    save_road_network(out, lats, lngs, edges_from, edges_to, times)
+    print(f"Wrote {len(lats)} nodes, {len(times)} directed edges to {out}")
+
+
+if __name__ == "__main__":
+    main()
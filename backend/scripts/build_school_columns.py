@@ -0,0 +1,35 @@
+"""
+Convert the school JSON into the memory-mappable columnar table
+
+The API converts the JSON on first load if no table matches its content, so
+this is only needed to prebuild the table (e.g. in a Docker image layer, or
+before starting several workers).
+
+Usage (from backend/):
+    python -m scripts.build_school_columns
+    python -m scripts.build_school_columns --json path/to/schools.json --out /var/lib/citytrotter/schools
+"""
+
+import argparse
+
+from app.services.columnar import read_table
+from app.services.datasets import registry as datasets
+from app.services.school_analyzer import build_school_columns, schools_columns_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", default=None, help="School JSON with a top-level 'schools' list "
+                                                     "(default: the registered schools file)")
+    parser.add_argument("--out", default=None, help="Table base directory (default: SCHOOLS_COLUMNS_DIR)")
+    args = parser.parse_args()
+
+    table_dir = build_school_columns(args.json or datasets.path("schools"), args.out or schools_columns_dir())
+    table = read_table(table_dir)
+    print(f"Wrote {len(table)} schools to {table_dir}")
+    for name, column in table.columns.items():
+        print(f"  {name:<12} {str(column.dtype):<8} {column.nbytes:>10,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Convert a GeoJSON street/footpath extract into the walk network file
+
+Input is a FeatureCollection of LineString / MultiLineString features, e.g.
+an OpenStreetMap extract exported with `osmium export` or from Overpass.
+Features whose `highway` property is not walkable (motorways, trunk roads and
+their ramps by default) are skipped. Segments sharing an endpoint coordinate
+(to 1e-7 degrees) are joined at one graph node.
+
+Usage (from backend/):
+    python -m scripts.build_walk_network --geojson atlanta_streets.geojson
+    python -m scripts.build_walk_network --geojson streets.geojson --out /data/atlanta_walk_network.npz
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+from app.services.datasets import registry as datasets
+from app.services.geo import haversine_pairs
+from app.services.transit_analyzer import get_stations_dataset, station_walk_distances
+from app.services.walk_network import save_walk_network
+
+NOT_WALKABLE = {"motorway", "motorway_link", "trunk", "trunk_link", "construction", "proposed"}
+
+
+def feature_lines(feature, skip_highways):
+    """Coordinate lists of one feature's walkable lines"""
+    properties = feature.get("properties") or {}
+    if properties.get("highway") in skip_highways or properties.get("foot") == "no":
+        return []
+    geometry = feature.get("geometry") or {}
+    if geometry.get("type") == "LineString":
+        return [geometry["coordinates"]]
+    if geometry.get("type") == "MultiLineString":
+        return geometry["coordinates"]
+    return []
+
+
+def build_network(features, skip_highways=NOT_WALKABLE):
+    """Node coordinates and deduplicated undirected edges from line features"""
+    node_ids = {}
+    edges = set()
+
+    def node(coord):
+        key = (round(coord[0], 7), round(coord[1], 7))
+        return node_ids.setdefault(key, len(node_ids))
+
+    for feature in features:
+        for line in feature_lines(feature, skip_highways):
+            ids = [node(coord) for coord in line]
+            for a, b in zip(ids, ids[1:]):
+                if a != b:
+                    edges.add((min(a, b), max(a, b)))
+
+    coords = np.array(list(node_ids), dtype=np.float64).reshape(-1, 2)
+    edges = np.array(sorted(edges), dtype=np.int64).reshape(-1, 2)
+    lngs, lats = coords[:, 0], coords[:, 1]
+    lengths = haversine_pairs(lats[edges[:, 0]], lngs[edges[:, 0]], lats[edges[:, 1]], lngs[edges[:, 1]])
+    return lats, lngs, edges[:, 0], edges[:, 1], lengths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--geojson", required=True, help="street/footpath LineString FeatureCollection")
+    parser.add_argument("--out", default=None, help="output .npz (default: the walk_network dataset path)")
+    parser.add_argument(
+        "--skip-highway", action="append", default=None,
+        help="highway value to exclude (repeatable; default: motorways and trunk roads)"
+    )
+    args = parser.parse_args()
+
+    with open(args.geojson, "r") as f:
+        features = json.load(f)["features"]
+    skip = set(args.skip_highway) if args.skip_highway else NOT_WALKABLE
+    lats, lngs, edges_from, edges_to, lengths = build_network(features, skip)
+
+    out = args.out or datasets.path("walk_network")
+    save_walk_network(out, lats, lngs, edges_from, edges_to, lengths)
+    print(f"Wrote {len(lats)} nodes, {len(lengths)} edges ({lengths.sum() / 1000:.0f} km) to {out}")
+
+    if args.out is None:
+        # Sanity check: how many stations the network reaches
+        stations = get_stations_dataset()
+        walks = station_walk_distances(stations, stations.lats, stations.lngs)
+        routed = int(np.isfinite(walks[0]).sum()) if walks is not None else 0
+        print(f"{routed}/{len(stations)} stations are routable on the new network")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Shared fixtures: the app runs in-process against a throwaway SQLite
+database, so tests never touch the development database.
+"""
+
+import os
+import tempfile
+
+_DB_DIR = tempfile.mkdtemp(prefix="citytrotter-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import gemini_service
+from app.services.fake_gemini import FakeGenerativeModel
+
+
+@pytest.fixture(scope="session")
+def client():
+    """
+    Test client with startup (datasets, tables, job runners) and shutdown
+    run, and the local fake model answering every Gemini call
+    """
+    gemini_service.set_model(FakeGenerativeModel(0))
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def site_body(lat=33.78, lng=-84.385, units=300, stories=8):
+    """A BuildingRequest body for a small rectangular footprint at a site"""
+    return {
+        "location": {"lat": lat, "lng": lng},
+        "footprint": [[lng, lat], [lng + 0.0005, lat], [lng + 0.0005, lat + 0.0005], [lng, lat + 0.0005]],
+        "type": "residential",
+        "units": units,
+        "stories": stories,
+        "parking_spaces": 100
+    }
@@ -0,0 +1,123 @@
+"""AI reports with the local fake model: SSE streaming, caching and fallbacks"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.config import settings
+from app.models.analysis import BuildingRequest
+from app.services import gemini_service
+from app.services.analysis_pipeline import run_analyses_concurrently
+from app.services.fake_gemini import FakeGenerativeModel
+from tests.conftest import site_body
+
+
+class FailingModel(FakeGenerativeModel):
+    """Fake model whose every call fails, like an unreachable API"""
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        raise RuntimeError("Gemini unavailable")
+
+
+@pytest.fixture
+def install_model(client):
+    """Install a model for one test with an empty report cache, then restore the fake"""
+    def install(model):
+        gemini_service.set_model(model)
+        return model
+
+    gemini_service._REPORT_CACHE.clear()
+    yield install
+    gemini_service._REPORT_CACHE.clear()
+    gemini_service.set_model(FakeGenerativeModel(0))
+
+
+def analysis_data(**site):
+    """Analyzer results for a site, as passed to the report generators"""
+    results, _, _ = asyncio.run(run_analyses_concurrently(BuildingRequest(**site_body(**site))))
+    return results
+
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+
+def parse_sse(text):
+    """[(event, data), ...] from a Server-Sent Events body"""
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_stream_sends_stages_then_report_chunks(client, install_model):
+    model = install_model(FakeGenerativeModel(0, chunk_count=8))
+    response = client.post("/api/v1/analyze-building/stream", json=site_body(lat=33.771))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_sse(response.text)
+    names = [name for name, _ in events]
+    assert names[-1] == "done"
+    assert names.index("bottlenecks") < names.index("report_chunk")
+    assert {data["stage"] for name, data in events if name == "stage"} >= {
+        "zoning", "school_impact", "traffic_impact", "transit_access", "shadow_analysis"
+    }
+
+    chunks = [data["text"] for name, data in events if name == "report_chunk"]
+    assert len(chunks) > 1
+    assert "".join(chunks).startswith("**Executive Summary**")
+    assert model.calls == 1
+
+
+def test_report_is_cached_after_the_first_call(install_model):
+    model = install_model(FakeGenerativeModel(0))
+    data = analysis_data(lat=33.772)
+
+    first = asyncio.run(gemini_service.generate_planning_report(data))
+    second = asyncio.run(gemini_service.generate_planning_report(data))
+    assert model.calls == 1
+    assert second["cached"] is True
+    assert second["ai_summary"] == first["ai_summary"]
+
+    # A streamed request for the same analysis is served from the cache too
+    streamed = asyncio.run(collect(gemini_service.stream_planning_report(data)))
+    assert "".join(streamed) == first["ai_summary"]
+    assert model.calls == 1
+
+
+def test_template_fallback_when_the_model_fails(install_model):
+    model = install_model(FailingModel(0))
+    data = analysis_data(lat=33.773)
+    template = gemini_service.generate_template_report(data)
+
+    report = asyncio.run(gemini_service.generate_planning_report(data))
+    assert report["ai_summary"] == template
+    streamed = asyncio.run(collect(gemini_service.stream_planning_report(data)))
+    assert "".join(streamed) == template
+    assert model.calls == 2
+
+    # The fallback is never cached: a working model is asked next time
+    working = install_model(FakeGenerativeModel(0))
+    report = asyncio.run(gemini_service.generate_planning_report(data))
+    assert working.calls == 1
+    assert report["ai_summary"] != template
+
+
+def test_stream_times_out_when_the_model_goes_quiet(install_model, monkeypatch):
+    monkeypatch.setattr(settings, "AI_REPORT_TIMEOUT_SECONDS", 0.05)
+    install_model(FakeGenerativeModel(latency_seconds=0.5, chunk_count=1))
+
+    async def first_chunk():
+        return await gemini_service.stream_model_output("prompt").__anext__()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(first_chunk())
+
+    # The report stream falls back to the template instead
+    data = analysis_data(lat=33.774)
+    streamed = asyncio.run(collect(gemini_service.stream_planning_report(data)))
+    assert "".join(streamed) == gemini_service.generate_template_report(data)
@@ -0,0 +1,90 @@
+"""Background job queue: results, cancellation and runner resilience"""
+
+import time
+
+from app.services.job_queue import queue as job_queue
+from tests.conftest import site_body
+
+
+def wait_for(predicate, timeout=30.0, interval=0.02):
+    """Poll predicate() until it returns something truthy"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = predicate()
+        if value:
+            return value
+        time.sleep(interval)
+    raise AssertionError("timed out waiting for condition")
+
+
+def job_status(client, job_id):
+    return client.get(f"/api/v1/jobs/{job_id}").json()
+
+
+def finished(client, job_id):
+    job = job_status(client, job_id)
+    return job if job["status"] in ("succeeded", "failed", "cancelled") else None
+
+
+def test_result_is_served_separately_from_status(client):
+    job = client.post("/api/v1/jobs", json={"kind": "single", "params": site_body()}).json()
+    assert client.get(f"/api/v1/jobs/{job['job_id']}/result").status_code in (200, 409)
+
+    done = wait_for(lambda: finished(client, job["job_id"]))
+    assert done["status"] == "succeeded"
+    assert done["result_ready"] is True
+    assert "result" not in done
+
+    result = client.get(f"/api/v1/jobs/{job['job_id']}/result")
+    assert result.status_code == 200
+    assert result.json()["zoning"]["zone"]
+    assert client.get("/api/v1/jobs/no-such-job/result").status_code == 404
+
+
+def test_cancelling_a_running_job_releases_its_worker_slot(client):
+    before = client.get("/api/v1/worker-stats").json()
+    # A long sweep, so the job is still on the worker tier when cancelled
+    study = {
+        "location": {"lat": 33.78, "lng": -84.385},
+        "footprint": site_body()["footprint"],
+        "stories": 30,
+        "start_date": "2025-01-01",
+        "end_date": "2025-12-31",
+        "step_minutes": 5
+    }
+    job = client.post("/api/v1/jobs", json={"kind": "shadow_study", "params": study}).json()
+    wait_for(lambda: client.get("/api/v1/worker-stats").json()["pending"] == before["pending"] + 1)
+
+    cancelled = client.delete(f"/api/v1/jobs/{job['job_id']}").json()
+    assert cancelled["status"] == "cancelled"
+
+    stats = wait_for(lambda: (lambda s: s if s["pending"] == before["pending"] else None)(
+        client.get("/api/v1/worker-stats").json()
+    ), timeout=5)
+    assert stats["cancelled"] == before["cancelled"] + 1
+    assert client.get(f"/api/v1/jobs/{job['job_id']}/result").status_code == 409
+
+
+def test_runner_survives_a_database_error(client, monkeypatch):
+    real_mark_running = job_queue._mark_running
+    calls = []
+
+    def flaky_mark_running(job_id):
+        calls.append(job_id)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        return real_mark_running(job_id)
+
+    monkeypatch.setattr(job_queue, "_mark_running", flaky_mark_running)
+    failed_before = job_queue.stats()["failed"]
+
+    # More jobs than runners: every runner must still be alive afterwards
+    jobs = [
+        client.post("/api/v1/jobs", json={"kind": "single", "params": site_body(units=100 + i)}).json()
+        for i in range(job_queue.runners + 2)
+    ]
+    statuses = [wait_for(lambda: finished(client, job["job_id"]))["status"] for job in jobs]
+
+    assert statuses.count("failed") == 1
+    assert statuses.count("succeeded") == len(jobs) - 1
+    assert job_queue.stats()["failed"] == failed_before + 1
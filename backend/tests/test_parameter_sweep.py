@@ -0,0 +1,26 @@
+"""Parameter sweep request limits"""
+
+from tests.conftest import site_body
+
+
+def sweep_body(units, stories):
+    body = site_body()
+    return {"location": body["location"], "footprint": body["footprint"], "units": units, "stories": stories}
+
+
+def test_huge_range_is_rejected_without_building_it(client):
+    response = client.post("/api/v1/parameter-sweep", json=sweep_body(
+        {"start": 1, "stop": 1_000_000_000_000}, {"start": 1, "stop": 10}
+    ))
+    assert response.status_code == 413
+
+
+def test_sweep_grid_matches_the_ranges(client):
+    response = client.post("/api/v1/parameter-sweep", json=sweep_body(
+        {"start": 10, "stop": 100, "step": 10}, {"start": 1, "stop": 5}
+    ))
+    assert response.status_code == 200
+    result = response.json()
+    assert result["units"] == list(range(10, 101, 10))
+    assert result["stories"] == [1, 2, 3, 4, 5]
+    assert len(result["bottleneck_count"]) == 5
@@ -0,0 +1,81 @@
+"""Cumulative scenario updates, threshold crossings and trigger replay"""
+
+import math
+
+from app.config import settings
+from app.services import infrastructure_analyzer
+from tests.conftest import site_body
+
+# Units that put one building's water demand just under the water main threshold
+UNDER_THRESHOLD_UNITS = math.floor(
+    infrastructure_analyzer.WATER_MAIN_THRESHOLD / settings.WATER_DEMAND_GPD_PER_UNIT * 0.6
+)
+
+
+def create_scenario(client, *unit_counts):
+    response = client.post("/api/v1/scenarios", json={
+        "name": "test", "buildings": [site_body(units=units) for units in unit_counts]
+    })
+    assert response.status_code == 200
+    return response.json()["scenario_id"]
+
+
+def add_building(client, scenario_id, units):
+    response = client.post(f"/api/v1/scenarios/{scenario_id}/buildings", json=site_body(units=units))
+    assert response.status_code == 200
+    return response.json()
+
+
+def water_main(summary):
+    return next(f for f in summary["facilities"] if f["facility"] == "water_main")
+
+
+def test_seeded_scenario_totals(client):
+    scenario_id = create_scenario(client, 100, 50)
+    summary = client.get(f"/api/v1/scenarios/{scenario_id}").json()
+    assert summary["building_count"] == 2
+    assert summary["totals"]["units"] == 150
+    assert summary["totals"]["water_demand"] == 150 * settings.WATER_DEMAND_GPD_PER_UNIT
+    assert water_main(summary)["contributing_buildings"] == 2
+
+
+def test_add_reports_the_building_that_crosses_a_threshold(client):
+    scenario_id = create_scenario(client)
+    first = add_building(client, scenario_id, UNDER_THRESHOLD_UNITS)
+    assert "water_main" not in [f["facility"] for f in first["newly_over_threshold"]]
+
+    second = add_building(client, scenario_id, UNDER_THRESHOLD_UNITS)
+    crossed = {f["facility"]: f for f in second["newly_over_threshold"]}
+    assert crossed["water_main"]["triggered_by"] == second["building_id"]
+    assert second["building_count"] == 2
+    assert "water_main" in [f["facility"] for f in second["analysis"]["triggered_thresholds"]]
+
+    # Already over threshold, so a third building crosses nothing new
+    third = add_building(client, scenario_id, UNDER_THRESHOLD_UNITS)
+    assert "water_main" not in [f["facility"] for f in third["newly_over_threshold"]]
+
+
+def test_remove_replays_the_trigger_in_insertion_order(client):
+    scenario_id = create_scenario(client)
+    add_building(client, scenario_id, UNDER_THRESHOLD_UNITS)
+    trigger = add_building(client, scenario_id, UNDER_THRESHOLD_UNITS)["building_id"]
+    third = add_building(client, scenario_id, UNDER_THRESHOLD_UNITS)["building_id"]
+
+    response = client.delete(f"/api/v1/scenarios/{scenario_id}/buildings/{trigger}")
+    assert response.status_code == 200
+    assert response.json()["building_count"] == 2
+    summary = client.get(f"/api/v1/scenarios/{scenario_id}").json()
+    assert water_main(summary)["over_threshold"]
+    assert water_main(summary)["triggered_by"] == third
+
+    # Back under threshold with one building left: no trigger
+    client.delete(f"/api/v1/scenarios/{scenario_id}/buildings/{third}")
+    summary = client.get(f"/api/v1/scenarios/{scenario_id}").json()
+    assert not water_main(summary)["over_threshold"]
+    assert water_main(summary)["triggered_by"] is None
+
+
+def test_unknown_building_is_404(client):
+    scenario_id = create_scenario(client, 100)
+    assert client.delete(f"/api/v1/scenarios/{scenario_id}/buildings/missing").status_code == 404
+    assert client.get(f"/api/v1/scenarios/{scenario_id}/buildings/missing").status_code == 404
@@ -0,0 +1,35 @@
+"""Coalescing of identical in-flight analyses"""
+
+import asyncio
+
+from app.models.analysis import BuildingRequest
+from app.routers.building_analysis import analysis_flights, analyze_building
+from tests.conftest import site_body
+
+
+def test_profiled_request_is_not_coalesced(client):
+    building = BuildingRequest(**site_body(lat=33.776, units=250))
+    executions = analysis_flights.executions
+
+    async def both():
+        return await asyncio.gather(analyze_building(building, profile=False),
+                                    analyze_building(building, profile=True))
+
+    plain, profiled = asyncio.run(both())
+    assert "profile" not in plain
+    assert profiled["profile"]["spans"]
+    assert plain["building_id"] != profiled["building_id"]
+    assert analysis_flights.executions == executions + 1
+
+
+def test_identical_requests_share_one_analysis(client):
+    building = BuildingRequest(**site_body(lat=33.777, units=260))
+    executions, coalesced = analysis_flights.executions, analysis_flights.coalesced
+
+    async def three():
+        return await asyncio.gather(*(analyze_building(building) for _ in range(3)))
+
+    responses = asyncio.run(three())
+    assert len({response["building_id"] for response in responses}) == 1
+    assert analysis_flights.executions == executions + 1
+    assert analysis_flights.coalesced == coalesced + 2
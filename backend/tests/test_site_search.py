@@ -0,0 +1,13 @@
+"""Site search over explicit candidate lists"""
+
+
+def test_empty_candidate_list_is_rejected(client):
+    response = client.post("/api/v1/site-search", json={"units": 100, "stories": 5, "candidates": []})
+    assert response.status_code == 422
+
+
+def test_explicit_candidates_replace_the_grid(client):
+    candidates = [{"lat": 33.78, "lng": -84.385}, {"lat": 33.75, "lng": -84.39}]
+    response = client.post("/api/v1/site-search", json={"units": 100, "stories": 5, "candidates": candidates})
+    assert response.status_code == 200
+    assert response.json()["candidates_evaluated"] == len(candidates)